@@ -1,43 +1,63 @@
 import streamlit as st
 import os
 from src.data_processing.csv_bill_loader import BillDataManager, display_account_bills
+from src.data_processing.file_watch import watch_bill_file
+from src.data_processing.shared_data import shared_bill_data
+
+# Accounts listed in the selector at a time
+ACCOUNT_PAGE_SIZE = 200
 
 def bill_query_page():
     st.title("📊 Yearly Bill Query")
     
-    # Initialize session state for bill data manager
-    if "bill_data_manager" not in st.session_state:
-        # Default path to the CSV file
-        default_csv_path = os.path.join("data", "Monthly_Bills_for_Each_Account.csv")
-        
-        if os.path.exists(default_csv_path):
-            st.session_state.bill_data_manager = BillDataManager(default_csv_path)
+    # Default path to the CSV file
+    default_csv_path = os.path.join("data", "Monthly_Bills_for_Each_Account.csv")
+    
+    if os.path.exists(default_csv_path):
+        # Updates to the file are applied in the background as they are written
+        watch_bill_file(os.path.abspath(default_csv_path))
+        # One read-only manager per process, shared by every session and reloaded when the file changes
+        with shared_bill_data().lease(default_csv_path) as bill_data_manager:
             st.info(f"Loaded bill data from: {default_csv_path}")
-        else:
-            st.error(f"Default data file not found at: {default_csv_path}")
-            # Allow user to upload a CSV file
-            uploaded_file = st.file_uploader("Upload your bill data CSV file:", type=["csv"])
-            if uploaded_file is not None:
-                st.session_state.bill_data_manager = BillDataManager()
-                if st.session_state.bill_data_manager.load_data(uploaded_file):
-                    st.success("Successfully loaded bill data from uploaded file.")
-                else:
-                    st.error("Failed to load data from uploaded file.")
-                    return
-            else:
-                return
+            query_accounts(bill_data_manager)
+        return
     
+    st.error(f"Default data file not found at: {default_csv_path}")
+    # Allow user to upload a CSV file; an uploaded file is private to the session
+    if "uploaded_bill_data_manager" not in st.session_state:
+        uploaded_file = st.file_uploader("Upload your bill data CSV file:", type=["csv"])
+        if uploaded_file is None:
+            return
+        bill_data_manager = BillDataManager()
+        if not bill_data_manager.load_data(uploaded_file):
+            st.error("Failed to load data from uploaded file.")
+            return
+        st.session_state.uploaded_bill_data_manager = bill_data_manager
+        st.success("Successfully loaded bill data from uploaded file.")
+    
+    query_accounts(st.session_state.uploaded_bill_data_manager)
+
+def query_accounts(bill_data_manager):
+    """Account selection and bill display; only the selected account is kept in session state."""
     # Account selection
     st.subheader("🔍 Select Account")
-    accounts = st.session_state.bill_data_manager.get_all_accounts()
+    # Only one page of accounts is fetched; typing a prefix narrows it down
+    search = st.text_input("Search accounts by prefix:")
+    accounts = bill_data_manager.get_accounts_page(prefix=search.strip(), limit=ACCOUNT_PAGE_SIZE)
     
     if not accounts:
         st.warning("No account data available. Please check the data file.")
     else:
+        if len(accounts) == ACCOUNT_PAGE_SIZE:
+            st.caption(f"Showing the first {ACCOUNT_PAGE_SIZE} matching accounts.")
+        # Drop a selection that the current search no longer lists
+        if st.session_state.get("selected_account") not in accounts:
+            st.session_state.pop("selected_account", None)
         # Allow user to select an account
         selected_account = st.selectbox(
             "Select an account number:",
-            options=accounts
+            options=accounts,
+            key="selected_account"
         )
         
         # Add a text input for direct account number entry
@@ -48,7 +68,13 @@ def bill_query_page():
             account_to_query = account_input if account_input else selected_account
             
             # Display the bill data
-            display_account_bills(account_to_query, st.session_state.bill_data_manager)
+            display_account_bills(account_to_query, bill_data_manager)
+        
+        # Portfolio-wide comparison, computed once per dataset
+        with st.expander("💰 Accounts that would save by paying annually"):
+            savings = bill_data_manager.get_savings_table()
+            if savings is not None:
+                st.dataframe(savings[savings['recommendation'] == 'annual'].head(100))
 
 if __name__ == "__main__":
-    bill_query_page() 
\ No newline at end of file
+    bill_query_page()
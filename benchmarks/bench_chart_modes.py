@@ -0,0 +1,106 @@
+"""
+Server CPU per page view: matplotlib images vs. browser-drawn Vega-Lite charts.
+
+A page view draws the three bill charts the app shows: the account
+generation vs. consumption breakdown, a bill's charges pie and the monthly
+comparison chart. For each renderer this measures the process CPU time the
+server spends producing what it sends to the browser (PNG bytes, or the
+Vega-Lite spec serialized to JSON) and the payload size. Every view uses
+different synthetic data, so the matplotlib numbers are for uncached renders
+(the chart cache only helps repeat views of unchanged data).
+
+Usage:
+    python -m benchmarks.bench_chart_modes --views 30
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.soak_rendering import sample_bills
+from src.data_processing.charts import APP_DPI, breakdown_chart
+from src.data_processing.savings import BILL_COL, COST_COL, CREDIT_COL
+from src.pdf_processing.bill_visualizer import _charges_pie, _comparison_chart
+from src.utils.vega_charts import breakdown_spec, charges_pie_spec, comparison_spec
+
+CHARGE_TYPES = ['Generation', 'Delivery', 'Taxes', 'Fees']
+
+def page_data(seed: int) -> Dict[str, Any]:
+    """Inputs of one page view's three charts."""
+    bills = sample_bills(seed=seed)
+    amounts = [round(20.0 + (seed * 7 + i * 13) % 50, 2) for i in range(len(CHARGE_TYPES))]
+    months = bills['Month'].tolist()
+    return {
+        'bills': bills,
+        'charges': (CHARGE_TYPES, amounts),
+        'comparison': (months, bills[BILL_COL].tolist(), (bills[COST_COL] * 3).tolist()),
+    }
+
+def matplotlib_view(data: Dict[str, Any]) -> List[bytes]:
+    return [
+        breakdown_chart(data['bills'], figsize=(3, 2), dpi=APP_DPI, bbox_inches='tight'),
+        _charges_pie(*data['charges']),
+        _comparison_chart(*data['comparison']),
+    ]
+
+def vega_view(data: Dict[str, Any]) -> List[bytes]:
+    specs = [
+        breakdown_spec(data['bills'], COST_COL, CREDIT_COL, BILL_COL),
+        charges_pie_spec(*data['charges']),
+        comparison_spec(*data['comparison']),
+    ]
+    return [json.dumps(spec).encode('utf-8') for spec in specs]
+
+RENDERERS: Dict[str, Callable[[Dict[str, Any]], List[bytes]]] = {
+    'matplotlib': matplotlib_view,
+    'vega': vega_view,
+}
+
+def run_benchmark(views: int, warmup: int = 3) -> Dict[str, Dict[str, float]]:
+    """CPU ms per view (mean, p50, p95) and payload bytes per view for each renderer."""
+    pages = [page_data(seed) for seed in range(views + warmup)]
+    report = {}
+    for name, render in RENDERERS.items():
+        for data in pages[:warmup]:
+            render(data)
+        cpu_ms, payload = [], []
+        for data in pages[warmup:]:
+            start = time.process_time()
+            outputs = render(data)
+            cpu_ms.append((time.process_time() - start) * 1000)
+            payload.append(sum(len(out) for out in outputs))
+        cpu_ms.sort()
+        report[name] = {
+            'cpu_ms_mean': round(statistics.mean(cpu_ms), 2),
+            'cpu_ms_p50': round(statistics.median(cpu_ms), 2),
+            'cpu_ms_p95': round(cpu_ms[min(len(cpu_ms) - 1, int(0.95 * len(cpu_ms)))], 2),
+            'payload_bytes': int(statistics.mean(payload)),
+        }
+    return report
+
+def format_report(report: Dict[str, Dict[str, float]]) -> str:
+    lines = [f"{'renderer':<12} {'cpu_ms_mean':>12} {'cpu_ms_p50':>11} {'cpu_ms_p95':>11} {'payload_bytes':>14}"]
+    for name, row in report.items():
+        lines.append(f"{name:<12} {row['cpu_ms_mean']:>12} {row['cpu_ms_p50']:>11} {row['cpu_ms_p95']:>11} "
+                     f"{row['payload_bytes']:>14}")
+    if 'matplotlib' in report and 'vega' in report and report['vega']['cpu_ms_mean']:
+        ratio = report['matplotlib']['cpu_ms_mean'] / report['vega']['cpu_ms_mean']
+        lines.append(f"vega uses {ratio:.0f}x less server CPU per page view")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare server CPU per page view of the chart renderers.")
+    parser.add_argument('--views', type=int, default=30)
+    parser.add_argument('--json', default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.views)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
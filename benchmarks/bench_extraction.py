@@ -0,0 +1,264 @@
+"""
+Extraction accuracy and latency benchmark over synthetic bills.
+
+Generates SDG&E/PG&E/SCE monthly and annual bills with known ground truth
+(see ``benchmarks.synthetic_bills``) and runs three pipelines over them:
+
+* ``bill_parser``  - pdfplumber + ``BillParser.parse_bill``
+* ``upload_bill``  - PyMuPDF + ``app.pages.upload_bill.extract_bill_data``
+* ``rules_llm``    - the batch pipeline: rules first, LLM fallback for bills the
+                     rules cannot resolve (every ``--variant-every``-th bill
+                     uses a relabelled layout the rules miss, so the fallback
+                     is exercised). The OpenAI API is stubbed with an
+                     "oracle" that only returns values literally present in the
+                     prompt it receives, so accuracy reflects what the prompt
+                     construction preserves, with zero network cost.
+
+Reports per-field accuracy, p50/p95 latency and peak Python memory per pipeline.
+
+Usage:
+    python -m benchmarks.bench_extraction --count 30 --seed 7
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+from unittest.mock import patch
+
+import pdfplumber
+
+from app.pages import upload_bill
+from benchmarks.synthetic_bills import SyntheticBill, generate_bills
+from src.pdf_processing import batch_extract
+from src.pdf_processing.bill_record import BillRecord, parse_amount, parse_billing_period, parse_date, parse_kwh
+from src.pdf_processing.pdf_extractor import BillParser
+
+FIELDS = ['account_number', 'period_start', 'period_end', 'due_date', 'total_amount', 'total_kwh',
+          'generation_charges', 'delivery_charges', 'nem_credits', 'true_up_date', 'annual_net_kwh']
+
+# Fields each pipeline is expected to produce; others are reported as n/a
+PIPELINE_FIELDS = {
+    'bill_parser': FIELDS[:9],
+    'upload_bill': ['account_number', 'period_start', 'period_end', 'total_amount', 'total_kwh',
+                    'true_up_date', 'annual_net_kwh'],
+    'rules_llm': ['account_number', 'period_start', 'period_end', 'total_amount', 'total_kwh',
+                  'generation_charges', 'delivery_charges', 'nem_credits'],
+}
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _charge(record: BillRecord, *keywords) -> Optional[float]:
+    for charge in record.charges:
+        name = charge.charge_type.lower()
+        if charge.amount is not None and any(k in name for k in keywords):
+            return charge.amount
+    return None
+
+
+def canonical_from_record(record: BillRecord) -> Dict[str, Any]:
+    """Map a BillRecord onto the benchmark's canonical field names."""
+    nem = record.nem_credits if record.nem_credits is not None else _charge(record, 'nem', 'surplus')
+    return {
+        'account_number': record.account_number,
+        'period_start': _iso(record.period_start),
+        'period_end': _iso(record.period_end),
+        'due_date': _iso(record.due_date),
+        'total_amount': record.total_amount_due,
+        'total_kwh': record.total_kwh,
+        'generation_charges': _charge(record, 'generation'),
+        'delivery_charges': _charge(record, 'delivery'),
+        'nem_credits': abs(nem) if nem is not None else None,
+    }
+
+
+def run_bill_parser(path: str) -> Dict[str, Any]:
+    with pdfplumber.open(path) as pdf:
+        return canonical_from_record(BillRecord.from_extraction(BillParser().parse_bill(pdf)))
+
+
+def run_upload_bill(path: str) -> Dict[str, Any]:
+    data = upload_bill.extract_bill_data(path)
+    start, end = parse_billing_period(data.get("Billing Period"))
+    return {
+        'account_number': None if data.get("Account Number") in (None, "Not Found") else data["Account Number"],
+        'period_start': _iso(start),
+        'period_end': _iso(end),
+        'total_amount': parse_amount(data.get("Total Amount Due")),
+        'total_kwh': parse_kwh(data.get("Electric Usage (kWh)")),
+        'true_up_date': _iso(parse_date(data.get("True-Up Date"))),
+        'annual_net_kwh': parse_kwh(data.get("Annual Net Usage (kWh)")),
+    }
+
+
+def run_rules_llm(path: str) -> Dict[str, Any]:
+    record = batch_extract.parse_pdf_file(path)
+    text = record.pop('text', None)
+    if text:
+        llm_result = batch_extract.extract_with_openai(text)
+        if 'error' not in llm_result:
+            record['result'] = llm_result
+    return canonical_from_record(BillRecord.from_extraction(record.get('result') or {}))
+
+
+PIPELINES: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    'bill_parser': run_bill_parser,
+    'upload_bill': run_upload_bill,
+    'rules_llm': run_rules_llm,
+}
+
+
+class OracleLLM:
+    """
+    Stand-in for ``openai.ChatCompletion.create``.
+
+    Answers with the ground-truth values of the bill named in the prompt, but
+    only those whose printed form actually appears in the prompt text.
+    """
+
+    def __init__(self, truths: List[SyntheticBill]):
+        self.by_account = {t.account_number: t for t in truths}
+        self.calls = 0
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        prompt = kwargs['messages'][-1]['content']
+        truth = next((t for acct, t in self.by_account.items() if acct in prompt), None)
+        summary, charges = {}, []
+        if truth is not None:
+            summary['account_number'] = truth.account_number
+            total = f"{truth.total_amount:,.2f}"
+            if total in prompt:
+                summary['total_amount_due'] = total
+            start, end = (parse_date(truth.period_start), parse_date(truth.period_end))
+            printed = [d.strftime('%B %-d, %Y') for d in (start, end)]
+            if all(p in prompt for p in printed):
+                summary['billing_period'] = f"{printed[0]} to {printed[1]}"
+            for name, value in [('Generation Charges', truth.generation_charges),
+                                ('Delivery Charges', truth.delivery_charges),
+                                ('NEM Credits', -truth.nem_credits)]:
+                if f"{abs(value):,.2f}" in prompt:
+                    charges.append({'charge_type': name, 'amount': f"{value:.2f}"})
+            if f"{truth.total_kwh:,.0f}" in prompt:
+                charges.append({'charge_type': 'Electricity Used', 'amount': f"{truth.total_kwh:.0f} kWh"})
+
+        arguments = json.dumps({'bill_summary': summary, 'charges_breakdown': charges})
+        message = _Message(function_call=SimpleNamespace(arguments=arguments))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)],
+                               usage=SimpleNamespace(prompt_tokens=len(prompt) // 4,
+                                                     completion_tokens=len(arguments) // 4))
+
+
+class _Message(dict):
+    content = None
+
+
+def _matches(expected, actual) -> bool:
+    if expected is None:
+        return actual is None
+    if isinstance(expected, float):
+        return actual is not None and abs(float(actual) - expected) < 0.01
+    return actual is not None and str(actual).strip() == str(expected)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct * (len(ordered) - 1))))]
+
+
+def run_benchmark(bills_dir: str, truths: List[SyntheticBill], measure_memory: bool = True) -> Dict[str, Any]:
+    """Run every pipeline over the bills and return the accuracy/latency/memory report."""
+    report = {}
+    oracle = OracleLLM(truths)
+    with patch('openai.ChatCompletion.create', oracle):
+        for name, pipeline in PIPELINES.items():
+            fields = PIPELINE_FIELDS[name]
+            correct = {f: 0 for f in fields}
+            expected_count = {f: 0 for f in fields}
+            latencies = []
+            calls_before = oracle.calls
+            for truth in truths:
+                path = os.path.join(bills_dir, truth.file_name)
+                start = time.perf_counter()
+                result = pipeline(path)
+                latencies.append(time.perf_counter() - start)
+                for field in fields:
+                    expected = getattr(truth, field)
+                    if expected is None:
+                        continue
+                    expected_count[field] += 1
+                    correct[field] += _matches(expected, result.get(field))
+            # Counted over the timed pass only; the memory pass runs the pipeline again
+            llm_calls = oracle.calls - calls_before
+
+            peak_mb = None
+            if measure_memory:
+                tracemalloc.start()
+                peak = 0
+                for truth in truths:
+                    tracemalloc.reset_peak()
+                    pipeline(os.path.join(bills_dir, truth.file_name))
+                    peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+                peak_mb = round(peak / 1048576, 2)
+
+            report[name] = {
+                'accuracy': {f: round(correct[f] / expected_count[f], 3) if expected_count[f] else None
+                             for f in fields},
+                'latency_p50_ms': round(statistics.median(latencies) * 1000, 2),
+                'latency_p95_ms': round(_percentile(latencies, 0.95) * 1000, 2),
+                'peak_memory_mb': peak_mb,
+                'llm_calls': llm_calls,
+            }
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render the report as a plain-text table."""
+    names = list(PIPELINES)
+    lines = [f"{'field':20}" + "".join(f"{n:>14}" for n in names)]
+    for field in FIELDS:
+        cells = []
+        for name in names:
+            value = report[name]['accuracy'].get(field)
+            cells.append(f"{value:>14.1%}" if value is not None else f"{'n/a':>14}")
+        lines.append(f"{field:20}" + "".join(cells))
+    lines.append("")
+    for metric in ['latency_p50_ms', 'latency_p95_ms', 'peak_memory_mb']:
+        lines.append(f"{metric:20}" + "".join(f"{str(report[n][metric]):>14}" for n in names))
+    lines.append(f"{'llm_calls':20}{'':28}{report['rules_llm']['llm_calls']:>14}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark bill extraction on synthetic PDFs.")
+    parser.add_argument('--count', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--max-appendix-pages', type=int, default=12)
+    parser.add_argument('--variant-every', type=int, default=4,
+                        help="Every Nth bill uses the relabelled layout the rules miss (0 for none)")
+    parser.add_argument('--bills-dir', default=None, help="Keep the generated PDFs in this directory")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc pass")
+    parser.add_argument('--json', default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bills_dir = args.bills_dir or tmp
+        truths = generate_bills(bills_dir, args.count, args.seed, args.max_appendix_pages, args.variant_every)
+        report = run_benchmark(bills_dir, truths, measure_memory=not args.no_memory)
+
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
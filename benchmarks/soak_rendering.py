@@ -0,0 +1,139 @@
+"""
+Memory soak test for chart rendering.
+
+Renders the account breakdown chart thousands of times and samples the
+process RSS and the number of live matplotlib artists along the way (plus
+the Python heap with ``--trace-heap``; tracemalloc slows rendering several
+times over). With the rendering layer (``src.utils.rendering``) memory stays
+flat; the ``pyplot`` mode reproduces the old pattern (``plt.subplots`` per
+render, never closed) for comparison.
+
+Usage:
+    python -m benchmarks.soak_rendering --renders 5000
+    python -m benchmarks.soak_rendering --renders 500 --mode pyplot
+"""
+import argparse
+import gc
+import io
+import json
+import time
+import tracemalloc
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from matplotlib.artist import Artist
+
+from src.data_processing.charts import breakdown_chart
+from src.data_processing.savings import BILL_COL, COST_COL, CREDIT_COL
+
+def sample_bills(months: int = 12, seed: int = 0) -> pd.DataFrame:
+    """A year of bills for one synthetic account."""
+    rng = np.random.default_rng(seed)
+    cost = rng.uniform(40, 200, months).round(2)
+    credit = rng.uniform(0, 150, months).round(2)
+    return pd.DataFrame({
+        'Month': [f"2024-{m:02d}" for m in range(1, months + 1)],
+        COST_COL: cost,
+        CREDIT_COL: credit,
+        BILL_COL: cost - credit,
+    })
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB (Linux; 0 elsewhere)."""
+    try:
+        import resource
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / (1024 * 1024)
+    except (OSError, ImportError):
+        return 0.0
+
+def live_artists() -> int:
+    """Matplotlib artists (figures, axes, lines, texts...) still alive after a full collection."""
+    gc.collect()
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, Artist))
+
+def _render_pyplot(bills: pd.DataFrame) -> bytes:
+    """The pattern the app used before: a pyplot figure per render that is never closed."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(3, 2))
+    ax.bar(bills['Month'], bills[COST_COL])
+    ax.bar(bills['Month'], -bills[CREDIT_COL])
+    ax.plot(bills['Month'], bills[BILL_COL], 'ko-')
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=100)
+    return buf.getvalue()
+
+def run_soak(renders: int, mode: str = 'figure', sample_every: int = 250,
+             trace_heap: bool = False) -> Dict[str, Any]:
+    """
+    Render ``renders`` charts and sample memory every ``sample_every`` renders.
+
+    Returns:
+        dict: mode, renders, seconds (rendering only), renders_per_second and
+            samples (render count, RSS MB, live artists and, with ``trace_heap``, heap MB)
+    """
+    bills = sample_bills()
+    render = _render_pyplot if mode == 'pyplot' else (lambda data: breakdown_chart(data, dpi=100))
+    # Warm up font and text caches before the baseline sample
+    for _ in range(20):
+        render(bills)
+
+    if trace_heap:
+        tracemalloc.start()
+    samples = []
+    elapsed = 0.0
+    for i in range(1, renders + 1):
+        start = time.perf_counter()
+        render(bills)
+        elapsed += time.perf_counter() - start
+        if i % sample_every == 0 or i == renders:
+            sample = {'renders': i, 'rss_mb': round(rss_mb(), 1), 'artists': live_artists()}
+            if trace_heap:
+                sample['heap_mb'] = round(tracemalloc.get_traced_memory()[0] / (1024 * 1024), 2)
+            samples.append(sample)
+    if trace_heap:
+        tracemalloc.stop()
+    return {
+        'mode': mode,
+        'renders': renders,
+        'seconds': round(elapsed, 2),
+        'renders_per_second': round(renders / elapsed, 1) if elapsed else None,
+        'samples': samples,
+    }
+
+def format_report(report: Dict[str, Any]) -> str:
+    columns = [c for c in ('renders', 'rss_mb', 'artists', 'heap_mb') if c in report['samples'][0]]
+    lines = [f"{report['mode']}: {report['renders']} renders in {report['seconds']}s "
+             f"({report['renders_per_second']}/s)",
+             " ".join(f"{c:>8}" for c in columns)]
+    for sample in report['samples']:
+        lines.append(" ".join(f"{sample[c]:>8}" for c in columns))
+    first, last = report['samples'][0], report['samples'][-1]
+    lines.append(f"growth after first sample: {last['rss_mb'] - first['rss_mb']:+.1f} MB RSS, "
+                 f"{last['artists'] - first['artists']:+d} artists")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak-test chart rendering memory.")
+    parser.add_argument('--renders', type=int, default=5000)
+    parser.add_argument('--mode', choices=['figure', 'pyplot'], default='figure')
+    parser.add_argument('--sample-every', type=int, default=250)
+    parser.add_argument('--trace-heap', action='store_true', help="Also sample the Python heap (slow)")
+    parser.add_argument('--json', default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = run_soak(args.renders, args.mode, args.sample_every, args.trace_heap)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""
+Deterministic generator of synthetic NEM bill PDFs with known ground truth.
+
+Bills imitate the layouts of SDG&E, PG&E and SCE monthly statements and annual
+true-up statements. Each bill has a summary page, a charges page, an optional
+NEM true-up page and a variable number of usage-detail appendix pages, so
+parsers are exercised on realistic page counts.
+
+Usage:
+    python -m benchmarks.synthetic_bills out_dir/ --count 30 --seed 7
+"""
+import argparse
+import json
+import os
+import random
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+UTILITIES = ['sdge', 'pge', 'sce']
+BILL_TYPES = ['monthly', 'annual']
+
+LINES_PER_PAGE = 58
+FONT_SIZE = 9
+
+# Summary and charge labels per utility, matching the wording each utility prints
+LAYOUTS = {
+    'sdge': {
+        'header': ["SDG&E", "San Diego Gas & Electric", "P.O. Box 129831, San Diego, CA 92112"],
+        'account': "ACCOUNT NUMBER {account}",
+        'period': "Billing period: {start} to {end}",
+        'total': "TOTAL AMOUNT DUE ${total}",
+        'due': "Due Date: {due}",
+        'kwh': "Total kWh this month: {kwh}",
+        'generation': "Generation: ${generation}",
+        'delivery': "Delivery: ${delivery}",
+        'nem': "NEM Credit: ${nem}",
+    },
+    'pge': {
+        'header': ["PG&E", "Pacific Gas and Electric Company", "Box 997300, Sacramento, CA 95899"],
+        'account': "Account No: {account}",
+        'period': "Service from: {start} to {end}",
+        'total': "Total Amount Due: ${total}",
+        'due': "Due Date: {due}",
+        'kwh': "Total Usage {kwh} kWh",
+        'generation': "Generation: ${generation}",
+        'delivery': "Delivery: ${delivery}",
+        'nem': "Net Surplus Compensation: ${nem}",
+    },
+    'sce': {
+        'header': ["SCE", "Southern California Edison", "P.O. Box 300, Rosemead, CA 91772"],
+        'account': "Account number: {account}",
+        'period': "Billing period: {start} to {end}",
+        'total': "Total amount due: ${total}",
+        'due': "Payment Due by: {due}",
+        'kwh': "Total kWh: {kwh}",
+        'generation': "Generation: ${generation}",
+        'delivery': "Delivery: ${delivery}",
+        'nem': "NEM Credits: ${nem}",
+    },
+}
+
+# Relabelled summary lines of the "variant" layout, which the per-utility rules
+# do not recognise, so those bills go through the LLM fallback
+VARIANT_LABELS = {
+    'total': "Amount owed this cycle: ${total}",
+}
+
+FILLER = [
+    "Thank you for being a valued customer.",
+    "Visit our website to enroll in paperless billing and AutoPay.",
+    "Save energy during peak hours from 4 p.m. to 9 p.m.",
+    "For questions about your bill, call customer service.",
+]
+
+
+@dataclass
+class SyntheticBill:
+    """Ground truth for one generated bill."""
+    file_name: str
+    utility: str
+    bill_type: str
+    pages: int
+    account_number: str
+    period_start: str
+    period_end: str
+    due_date: str
+    total_amount: float
+    total_kwh: float
+    generation_charges: float
+    delivery_charges: float
+    nem_credits: float
+    true_up_date: Optional[str] = None
+    annual_net_kwh: Optional[float] = None
+    layout: str = 'standard'
+
+
+def _fmt_date(value: date) -> str:
+    return value.strftime('%B %-d, %Y')
+
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def _make_truth(rng: random.Random, index: int, utility: str, bill_type: str, appendix_pages: int) -> SyntheticBill:
+    start = date(2024, 1, 1) + timedelta(days=30 * rng.randrange(12))
+    end = start + timedelta(days=rng.randint(28, 31))
+    generation = round(rng.uniform(10, 180), 2)
+    delivery = round(rng.uniform(15, 220), 2)
+    nem = round(rng.uniform(0, 120), 2)
+    truth = SyntheticBill(
+        file_name=f"{index:05d}_{utility}_{bill_type}.pdf",
+        utility=utility,
+        bill_type=bill_type,
+        pages=0,
+        account_number=str(rng.randrange(10 ** 9, 10 ** 10)),
+        period_start=start.isoformat(),
+        period_end=end.isoformat(),
+        due_date=(end + timedelta(days=21)).isoformat(),
+        total_amount=round(max(generation + delivery - nem, 0.0), 2),
+        total_kwh=float(rng.randint(50, 1400)),
+        generation_charges=generation,
+        delivery_charges=delivery,
+        nem_credits=nem,
+    )
+    if bill_type == 'annual':
+        truth.true_up_date = (end + timedelta(days=365)).isoformat()
+        truth.annual_net_kwh = float(rng.randint(-3000, 6000))
+    truth.pages = 2 + (bill_type == 'annual') + appendix_pages
+    return truth
+
+
+def _render_pages(rng: random.Random, truth: SyntheticBill, appendix_pages: int) -> List[List[str]]:
+    layout = dict(LAYOUTS[truth.utility])
+    if truth.layout == 'variant':
+        layout.update(VARIANT_LABELS)
+    start, end = date.fromisoformat(truth.period_start), date.fromisoformat(truth.period_end)
+    due = date.fromisoformat(truth.due_date)
+    previous = round(rng.uniform(-80, 150), 2)
+    payment = max(previous, 0.0)
+    values = {
+        'account': truth.account_number, 'start': _fmt_date(start), 'end': _fmt_date(end),
+        'total': _money(truth.total_amount), 'due': _fmt_date(due), 'kwh': f"{truth.total_kwh:,.0f}",
+        'generation': _money(truth.generation_charges), 'delivery': _money(truth.delivery_charges),
+        'nem': _money(truth.nem_credits),
+    }
+
+    summary = list(layout['header']) + [
+        "",
+        layout['account'].format(**values),
+        "SERVICE ADDRESS: " + f"{rng.randint(100, 9999)} Sunset Blvd",
+        "DATE MAILED " + _fmt_date(end + timedelta(days=2)),
+        "",
+        layout['period'].format(**values),
+        "",
+        "Account Summary",
+        f"Previous Balance ${_money(previous)}",
+        f"Payment Received -${_money(payment)}",
+        f"Current Charges +${_money(truth.total_amount)}",
+        layout['total'].format(**values),
+        layout['due'].format(**values),
+        "",
+        rng.choice(FILLER),
+        rng.choice(FILLER),
+    ]
+
+    charges = [
+        "Details of Current Charges",
+        "",
+        layout['kwh'].format(**values),
+        f"Electric Delivery {truth.total_kwh:.0f} kWh",
+        layout['delivery'].format(**values),
+        layout['generation'].format(**values),
+        f"Wildfire Fund Charge ${_money(round(truth.total_kwh * 0.0058, 2))}",
+        "Taxes & Fees $0.00",
+        layout['nem'].format(**values),
+        "",
+        "Total Charges this Month",
+        rng.choice(FILLER),
+    ]
+    pages = [summary, charges]
+
+    if truth.bill_type == 'annual':
+        true_up = date.fromisoformat(truth.true_up_date)
+        ytd = round(truth.total_amount * rng.uniform(3, 9), 2)
+        nem_page = [
+            "Net Energy Metering Annual Summary",
+            "",
+            f"Your account will true-up on {_fmt_date(true_up)}.",
+            f"Annual Net Usage (kWh) {truth.annual_net_kwh:,.0f}",
+            f"YTD Net Metering Charges/Credits ${_money(ytd)}",
+            f"Current Account Balance ${_money(ytd)}",
+            "",
+            "Month      Net kWh     Charges",
+        ]
+        for month in range(12):
+            nem_page.append(f"{(start + timedelta(days=30 * month)).strftime('%b %Y'):10} "
+                            f"{rng.randint(-400, 600):8} {rng.uniform(-60, 90):10.2f}")
+        pages.append(nem_page)
+
+    day = start
+    for _ in range(appendix_pages):
+        detail = ["Usage Detail (continued)", ""]
+        for _ in range(LINES_PER_PAGE - 2):
+            detail.append(f"{day.strftime('%m/%d/%Y')}  Import {rng.uniform(5, 40):6.1f} kWh  "
+                          f"Export {rng.uniform(0, 30):6.1f} kWh  Peak {rng.uniform(0, 8):5.1f} kW")
+            day += timedelta(days=1)
+        pages.append(detail)
+    return pages
+
+
+def write_pdf(path: str, pages: List[List[str]]):
+    """Render lines of text into a PDF, one list of lines per page."""
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        page.insert_text((54, 60), "\n".join(lines[:LINES_PER_PAGE]), fontsize=FONT_SIZE)
+    doc.save(path)
+    doc.close()
+
+
+def generate_bills(out_dir: str, count: int = 30, seed: int = 7,
+                   max_appendix_pages: int = 12, variant_every: int = 4) -> List[SyntheticBill]:
+    """
+    Generate ``count`` bill PDFs in ``out_dir`` and return their ground truth.
+
+    Utilities and bill types are cycled so every combination is covered; the
+    same seed always produces the same bills. Every ``variant_every``-th bill
+    (0 for none) uses the relabelled variant layout. Ground truth is also
+    written to ``out_dir/ground_truth.jsonl``.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    combos = [(u, t) for u in UTILITIES for t in BILL_TYPES]
+    bills = []
+    for index in range(count):
+        utility, bill_type = combos[index % len(combos)]
+        appendix_pages = rng.randint(0, max_appendix_pages)
+        truth = _make_truth(rng, index, utility, bill_type, appendix_pages)
+        if variant_every and index % variant_every == variant_every - 1:
+            truth.layout = 'variant'
+        write_pdf(os.path.join(out_dir, truth.file_name), _render_pages(rng, truth, appendix_pages))
+        bills.append(truth)
+
+    with open(os.path.join(out_dir, 'ground_truth.jsonl'), 'w', encoding='utf-8') as f:
+        for truth in bills:
+            f.write(json.dumps(asdict(truth)) + "\n")
+    return bills
+
+
+def load_ground_truth(out_dir: str) -> Dict[str, SyntheticBill]:
+    """Read ``ground_truth.jsonl`` back, keyed by file name."""
+    with open(os.path.join(out_dir, 'ground_truth.jsonl'), encoding='utf-8') as f:
+        bills = [SyntheticBill(**json.loads(line)) for line in f if line.strip()]
+    return {bill.file_name: bill for bill in bills}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic NEM bill PDFs.")
+    parser.add_argument('out_dir')
+    parser.add_argument('--count', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--max-appendix-pages', type=int, default=12)
+    parser.add_argument('--variant-every', type=int, default=4,
+                        help="Every Nth bill uses the relabelled layout the rules miss (0 for none)")
+    args = parser.parse_args(argv)
+    bills = generate_bills(args.out_dir, args.count, args.seed, args.max_appendix_pages, args.variant_every)
+    print(f"Wrote {len(bills)} bills to {args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,12 @@ import asyncio
 import streamlit as st
 from src.chatbot.rag import get_response
 from src.chatbot.conversation import ConversationManager
-from src.pdf_processing.pdf_extractor import extract_bill_data
 from src.agents.website_agent import execute_website_agent
 from src.utils.customer_database import fetch_customer_details
-from src.pdf_processing.bill_visualizer import visualize_bill_data, get_monthly_comparison_chart
+from src.utils.storage import upload_fingerprint
+from src.pdf_processing.bill_visualizer import visualize_bill_data, display_monthly_comparison_chart
 from src.pdf_processing.bill_display import display_bill_data
+from src.pdf_processing.bill_timeline import BillTimeline, extract_records
 from app.pages.bill_query import bill_query_page
 
 from dotenv import load_dotenv
@@ -279,43 +280,76 @@ if page == "Chat":
         # ---- Upload Bill Section ----
         st.markdown("<h3>📄 Upload your NEM Bill:</h3>", unsafe_allow_html=True)
         
-        # Track if we've already processed this file and its data
-        if "processed_file" not in st.session_state:
-            st.session_state.processed_file = None
+        # Track which files we've already processed and the bills extracted so far
+        if "processed_files" not in st.session_state:
+            st.session_state.processed_files = set()
         if "extracted_bill_data" not in st.session_state:
             st.session_state.extracted_bill_data = None
+        if "bill_timeline" not in st.session_state:
+            st.session_state.bill_timeline = BillTimeline()
         
-        uploaded_file = st.file_uploader("", type=["pdf"])
-
-        # Process new uploads
-        if uploaded_file and uploaded_file != st.session_state.processed_file:
-            with st.spinner("Extracting data from your bill..."):
-                extracted_data = extract_bill_data(uploaded_file)
-                st.session_state.extracted_bill_data = extracted_data
-                
-                # Add the bill data to the conversation context
-                if 'error' not in extracted_data:
-                    summary = extracted_data.get('bill_summary', {})
+        uploaded_files = st.file_uploader("", type=["pdf"], accept_multiple_files=True)
+
+        # Process only uploads we haven't seen; a year of bills is extracted concurrently
+        new_files = [f for f in uploaded_files or []
+                     if upload_fingerprint(f) not in st.session_state.processed_files]
+        if new_files:
+            with st.spinner(f"Extracting data from {len(new_files)} bill(s)..."):
+                results = extract_records(new_files)
+            
+            added = []
+            for fingerprint, result in results:
+                # Mark this file as processed (only its id is kept, not the file itself)
+                st.session_state.processed_files.add(fingerprint)
+                if isinstance(result, dict):
+                    # Keep the error so it is displayed below
+                    st.session_state.extracted_bill_data = result
+                    continue
+                st.session_state.bill_timeline.add(result)
+                added.append(result)
+            
+            # Add the bill data to the conversation context
+            if added:
+                st.session_state.extracted_bill_data = added[-1]
+                totals = [b.total_amount_due for b in added if b.total_amount_due is not None]
+                if len(added) == 1:
+                    total = totals[0] if totals else None
                     bill_info = (
                         f"I've uploaded a bill with "
-                        f"total amount ${summary.get('total_amount_due', 'unknown')}."
+                        f"total amount {f'${total:,.2f}' if total is not None else '$unknown'}."
+                    )
+                else:
+                    bill_info = (
+                        f"I've uploaded {len(added)} bills totaling ${sum(totals):,.2f}."
                     )
-                    st.session_state.conversation.add_message("user", bill_info)
-                    
-                    # Get assistant response about the bill
-                    conversation_history = st.session_state.conversation.get_formatted_history()
-                    answer = get_response(conversation_history)
-                    st.session_state.conversation.add_message("assistant", answer)
-                    
-                    # Mark this file as processed
-                    st.session_state.processed_file = uploaded_file
-                    
-                    # Trigger a rerun to update the chat display
-                    st.experimental_rerun()
+                st.session_state.conversation.add_message("user", bill_info)
+                
+                # Get assistant response about the bill
+                conversation_history = st.session_state.conversation.get_formatted_history()
+                answer = get_response(conversation_history)
+                st.session_state.conversation.add_message("assistant", answer)
+                
+                # Trigger a rerun to update the chat display
+                st.experimental_rerun()
     
     # Always display bill data if it exists (even after reruns)
     if st.session_state.extracted_bill_data is not None:
         display_bill_data(st.session_state.extracted_bill_data)
+    
+    # Per-account timeline across all uploaded bills
+    timeline = st.session_state.bill_timeline
+    for account in timeline.accounts():
+        summary = timeline.true_up_summary(account)
+        if summary['bills'] < 2:
+            continue
+        st.subheader(f"📅 Bill Timeline for Account: {account}")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Bills", summary['bills'])
+        col2.metric("Total Billed", f"${summary['total_billed']:,.2f}")
+        col3.metric("Total Usage", f"{summary['total_kwh']:,.0f} kWh")
+        
+        # Cached image or browser-drawn spec, depending on NEM_CHART_RENDERER
+        display_monthly_comparison_chart(timeline.bills(account))
                 
 elif page == "Yearly Bill Query":
     # Store current page for next navigation
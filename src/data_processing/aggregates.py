@@ -0,0 +1,115 @@
+"""
+Per-account aggregate table for monthly bill data.
+
+The table is materialized once when a dataset is loaded and holds one row per
+account: annual totals of usage, generation, costs, credits and bills, the
+number of monthly bills, the net (annual) balance and the latest bill's
+month. Account summaries and rankings read this small table instead of
+rescanning monthly rows, and only the accounts whose rows change are
+recomputed.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing.savings import BILL_COL, COST_COL, CREDIT_COL, savings_metrics
+
+USAGE_COL = 'Usage (kWh)'
+GENERATION_COL = 'Generation (kWh)'
+MONTH_COL = 'Month'
+
+# Aggregate column -> display column it sums
+SUM_COLUMNS = {
+    'total_usage_kwh': USAGE_COL,
+    'total_generation_kwh': GENERATION_COL,
+    'total_consumption': COST_COL,
+    'total_generation': CREDIT_COL,
+    'monthly_bills_total': BILL_COL,
+}
+
+AGGREGATE_COLUMNS = ['months', *SUM_COLUMNS, 'net_balance', 'last_bill_date']
+
+def aggregate_sorted(display: pd.DataFrame, accounts: list, starts: np.ndarray, stops: np.ndarray) -> pd.DataFrame:
+    """
+    Aggregate a display frame whose rows are grouped by account.
+
+    ``starts``/``stops`` are each account's row offsets, so every total is a
+    single ``np.add.reduceat`` pass over its column. Missing values count as
+    zero, as in the per-account view.
+
+    Returns:
+        DataFrame: AGGREGATE_COLUMNS indexed by account
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    stops = np.asarray(stops, dtype=np.int64)
+    table = pd.DataFrame(index=pd.Index(accounts, name='account'))
+    table['months'] = stops - starts
+    for name, display_col in SUM_COLUMNS.items():
+        values = np.nan_to_num(display[display_col].to_numpy(dtype=np.float64))
+        table[name] = np.add.reduceat(values, starts) if len(starts) else np.zeros(0)
+    table['net_balance'] = savings_metrics(table['total_consumption'], table['total_generation'],
+                                           table['monthly_bills_total'])['net_balance']
+    # Rows keep file order within an account, so its last row is the latest bill
+    months = display[MONTH_COL].to_numpy(dtype=object)
+    table['last_bill_date'] = months[stops - 1] if len(stops) else []
+    return table
+
+def refresh_accounts(table: pd.DataFrame, display: pd.DataFrame, offsets: dict,
+                     changed: Iterable) -> pd.DataFrame:
+    """
+    Recompute the aggregate rows of ``changed`` accounts only.
+
+    Accounts that no longer have rows are dropped; new accounts are added and
+    the table is kept sorted by account.
+
+    Args:
+        table: Current aggregate table
+        display: Display frame grouped by account
+        offsets: Account -> (start, stop) row offsets into ``display``
+        changed: Accounts whose rows were added, changed or removed
+
+    Returns:
+        DataFrame: The updated aggregate table
+    """
+    changed = list(dict.fromkeys(changed))
+    present = [account for account in changed if account in offsets]
+    if present:
+        # Aggregate each changed account's slice on its own, concatenated back to back
+        slices = [display.iloc[offsets[account][0]:offsets[account][1]] for account in present]
+        lengths = np.array([len(part) for part in slices], dtype=np.int64)
+        stops = np.cumsum(lengths)
+        fresh = aggregate_sorted(pd.concat(slices), present, stops - lengths, stops)
+    else:
+        fresh = table.iloc[0:0]
+    kept = table.drop(index=[account for account in changed if account in table.index])
+    return pd.concat([kept, fresh]).sort_index()
+
+def account_month_matrix(display: pd.DataFrame, starts: np.ndarray, stops: np.ndarray,
+                         columns: List[str]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Lay the monthly rows of each account out as an (accounts x months) matrix.
+
+    Row ``i`` holds account ``i``'s bills in file order, padded with zeros
+    up to the longest account, so per-month arithmetic over every account is
+    plain array broadcasting.
+
+    Returns:
+        tuple: (display column -> float64 matrix with missing values as 0,
+            boolean matrix of the cells that hold a bill)
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    counts = np.asarray(stops, dtype=np.int64) - starts
+    width = int(counts.max()) if len(counts) else 0
+    rows = np.repeat(np.arange(len(counts)), counts)
+    cols = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    source = np.repeat(starts, counts) + cols
+    valid = np.zeros((len(counts), width), dtype=bool)
+    valid[rows, cols] = True
+    matrices = {}
+    for column in columns:
+        values = np.nan_to_num(display[column].to_numpy(dtype=np.float64))
+        matrix = np.zeros((len(counts), width))
+        matrix[rows, cols] = values[source]
+        matrices[column] = matrix
+    return matrices, valid
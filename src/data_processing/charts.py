@@ -0,0 +1,68 @@
+"""
+Bill charts for monthly bill data.
+
+Charts are drawn into axes of standalone figures (see ``utils.rendering``):
+nothing here touches ``pyplot`` or ``rcParams``, so charts can be rendered
+from Streamlit session threads and worker processes without interfering
+with each other.
+"""
+from typing import Any, Dict, Tuple
+
+import pandas as pd
+from matplotlib.axes import Axes
+
+from src.data_processing.savings import BILL_COL, COST_COL, CREDIT_COL
+from src.utils.rendering import apply_style, render_chart
+
+# Font sizes and line widths of the breakdown chart
+COMPACT_STYLE = {
+    'title': 4, 'label': 3.5, 'tick': 3, 'legend': 3,
+    'line_width': 0.6, 'marker_size': 2, 'grid_width': 0.2,
+}
+# Pixel density of charts shown in the app (what st.pyplot used)
+APP_DPI = 200
+
+REPORT_STYLE = {
+    'title': 12, 'label': 10, 'tick': 8, 'legend': 9,
+    'line_width': 1.5, 'marker_size': 4, 'grid_width': 0.5,
+}
+
+def draw_breakdown(ax: Axes, breakdown_data: pd.DataFrame, cost_col: str = COST_COL, credit_col: str = CREDIT_COL,
+                   bill_col: str = BILL_COL, style: Dict[str, Any] = COMPACT_STYLE):
+    """
+    Draw the generation vs. consumption bars with the monthly bill as a line.
+
+    Args:
+        ax: Axes to draw into
+        breakdown_data: Bills with numeric cost, credit and bill columns
+        style: Font sizes and line widths (see ``COMPACT_STYLE``)
+    """
+    x_values = breakdown_data.index
+    if 'Month' in breakdown_data.columns:
+        x_values = breakdown_data['Month'].astype(object).astype(str)
+
+    usage_bars = ax.bar(x_values, breakdown_data[cost_col], color='indianred', label='Cost for Usage')
+    credit_bars = ax.bar(x_values, -breakdown_data[credit_col], color='forestgreen', label='Credit for Generation')
+    bill_line = ax.plot(x_values, breakdown_data[bill_col], 'ko-', linewidth=style['line_width'],
+                        markersize=style['marker_size'], label='Monthly Bill')
+
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Amount ($)')
+    ax.set_title('Generation vs. Consumption')
+    ax.legend([usage_bars, credit_bars, bill_line[0]], ['Cost', 'Credit', 'Bill'],
+              loc='best', frameon=True, framealpha=0.7)
+    ax.grid(True, linestyle='--', alpha=0.3, linewidth=style['grid_width'])
+    ax.tick_params(axis='both', width=style['grid_width'])
+    ax.tick_params(axis='x', labelrotation=45)
+    apply_style(ax, style)
+
+def breakdown_chart(breakdown_data: pd.DataFrame, cost_col: str = COST_COL, credit_col: str = CREDIT_COL,
+                    bill_col: str = BILL_COL, figsize: Tuple[float, float] = (3, 2),
+                    style: Dict[str, Any] = COMPACT_STYLE, fmt: str = 'png', dpi: int = APP_DPI,
+                    **savefig_kwargs) -> bytes:
+    """Render the breakdown chart on its own to image bytes."""
+    def build(fig):
+        draw_breakdown(fig.subplots(), breakdown_data, cost_col, credit_col, bill_col, style)
+        fig.tight_layout(pad=0.1)
+
+    return render_chart(build, figsize, fmt, dpi, **savefig_kwargs)
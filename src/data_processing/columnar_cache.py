@@ -0,0 +1,184 @@
+"""
+Columnar cache for the monthly bills CSV.
+
+The CSV is parsed once (see ``ingest``), normalized (lowercase column names,
+compact dtypes, rows sorted by account) and written to an uncompressed Arrow IPC
+(Feather v2) file next to it. Later loads memory-map that file and read only
+the requested columns, so they skip CSV parsing and type inference entirely
+and several processes share the same pages through the OS page cache.
+
+The cache is keyed by the CSV's mtime and size, with its SHA-256 as a
+fallback: if only the mtime changed (e.g. the file was copied or touched) the
+cache is still used once the content hash matches.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from typing import List, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+
+from src.data_processing.ingest import find_account_column, normalize_column_name, read_bill_csv
+
+logger = logging.getLogger(__name__)
+
+# Bump when the normalization below changes so existing caches are rebuilt
+CACHE_FORMAT = "2"
+
+# Cache directory, overridable with the NEM_BILL_CACHE_DIR environment variable
+DEFAULT_CACHE_DIRNAME = ".cache"
+
+def cache_path_for(csv_path: str, cache_dir: Optional[str] = None) -> str:
+    """Path of the Feather cache file for ``csv_path``."""
+    cache_dir = cache_dir or os.getenv("NEM_BILL_CACHE_DIR") or os.path.join(
+        os.path.dirname(os.path.abspath(csv_path)), DEFAULT_CACHE_DIRNAME)
+    return os.path.join(cache_dir, os.path.basename(csv_path) + ".feather")
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def normalize_bill_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply the cache's explicit schema to a freshly parsed bills frame.
+
+    Column names are normalized, the account column is kept as text (so
+    "00123" keeps its leading zeros and matches typed-in account numbers), and
+    rows are stably sorted by account.
+    """
+    data.columns = [normalize_column_name(col) for col in data.columns]
+    account_col = find_account_column(data.columns)
+    if account_col:
+        if not isinstance(data[account_col].dtype, pd.CategoricalDtype):
+            data[account_col] = data[account_col].astype('string')
+        data = data.sort_values(account_col, kind='stable', na_position='last', ignore_index=True)
+    return data
+
+class SourceState(NamedTuple):
+    """Size and SHA-256 of the CSV bytes a cache (or loaded frame) was built from."""
+    size: int
+    sha256: str
+
+def _source_metadata(csv_path: str, sha256: str, size: Optional[int] = None) -> dict:
+    stat = os.stat(csv_path)
+    # A cache built from a prefix of the file is only matched by content hash
+    mtime_ns = stat.st_mtime_ns if size is None or size == stat.st_size else 0
+    return {
+        b'cache_format': CACHE_FORMAT.encode(),
+        b'source_mtime_ns': str(mtime_ns).encode(),
+        b'source_size': str(stat.st_size if size is None else size).encode(),
+        b'source_sha256': sha256.encode(),
+    }
+
+def _write_table(table: pa.Table, cache_path: str):
+    """Write the cache atomically so readers never see a partial file."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.tmp')
+    os.close(fd)
+    try:
+        # Uncompressed so the file can be memory-mapped without decoding
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def build_cache(csv_path: str, cache_path: str) -> str:
+    """Parse the CSV once (in chunks) and write its normalized Feather cache."""
+    sha256 = file_sha256(csv_path)
+    data = normalize_bill_frame(read_bill_csv(csv_path)[0])
+    return write_cache(csv_path, data, SourceState(os.stat(csv_path).st_size, sha256), cache_path)
+
+def write_cache(csv_path: str, data: pd.DataFrame, source: SourceState,
+                cache_path: Optional[str] = None) -> str:
+    """
+    Write an already-parsed bills frame as the cache of ``csv_path``.
+
+    Args:
+        csv_path: Path to the source CSV
+        data: Normalized bills (all columns)
+        source: State of the CSV bytes ``data`` was parsed from
+        cache_path: Cache file (defaults to ``cache_path_for(csv_path)``)
+
+    Returns:
+        str: Path of the cache file
+    """
+    cache_path = cache_path or cache_path_for(csv_path)
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           **_source_metadata(csv_path, source.sha256, source.size)})
+    _write_table(table, cache_path)
+    logger.info(f"Built columnar cache {cache_path} ({table.num_rows} rows)")
+    return cache_path
+
+def cached_source_state(csv_path: str, cache_dir: Optional[str] = None) -> Optional[SourceState]:
+    """State of the CSV bytes the current cache of ``csv_path`` was built from, if there is a cache."""
+    try:
+        with pa.memory_map(cache_path_for(csv_path, cache_dir)) as source:
+            metadata = ipc.open_file(source).schema.metadata or {}
+    except (pa.ArrowInvalid, OSError):
+        return None
+    if b'source_size' not in metadata or b'source_sha256' not in metadata:
+        return None
+    return SourceState(int(metadata[b'source_size']), metadata[b'source_sha256'].decode())
+
+def _cache_is_current(csv_path: str, cache_path: str) -> bool:
+    """Check the cache against the CSV's mtime/size, falling back to its hash."""
+    if not os.path.exists(cache_path):
+        return False
+    try:
+        with pa.memory_map(cache_path) as source:
+            metadata = ipc.open_file(source).schema.metadata or {}
+    except (pa.ArrowInvalid, OSError):
+        return False
+    if metadata.get(b'cache_format') != CACHE_FORMAT.encode():
+        return False
+
+    stat = os.stat(csv_path)
+    if (metadata.get(b'source_mtime_ns') == str(stat.st_mtime_ns).encode()
+            and metadata.get(b'source_size') == str(stat.st_size).encode()):
+        return True
+    sha256 = file_sha256(csv_path)
+    if metadata.get(b'source_sha256') != sha256.encode():
+        return False
+
+    # Same content with a new mtime: refresh the key so the hash is not recomputed next time
+    table = feather.read_table(cache_path, memory_map=True)
+    _write_table(table.replace_schema_metadata({**metadata, **_source_metadata(csv_path, sha256)}),
+                 cache_path)
+    return True
+
+def load_cached_csv(csv_path: str, columns: Optional[List[str]] = None,
+                    cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Load the bills CSV through its columnar cache, building the cache if needed.
+
+    Args:
+        csv_path: Path to the source CSV
+        columns: Lowercase column names to read (None reads all columns)
+        cache_dir: Directory for the cache file (defaults to ``.cache`` next to the CSV)
+
+    Returns:
+        DataFrame: Normalized bills, sorted by account
+    """
+    cache_path = cache_path_for(csv_path, cache_dir)
+    if not _cache_is_current(csv_path, cache_path):
+        try:
+            build_cache(csv_path, cache_path)
+        except OSError as e:
+            # Read-only data directory and the like: fall back to parsing the CSV
+            logger.warning(f"Could not write columnar cache {cache_path}: {e}")
+            data = normalize_bill_frame(read_bill_csv(csv_path)[0])
+            return data[columns] if columns else data
+
+    table = feather.read_table(cache_path, columns=columns, memory_map=True)
+    # split_blocks lets null-free numeric columns reference the mapped buffers without a copy
+    return table.to_pandas(split_blocks=True, types_mapper={pa.string(): pd.StringDtype()}.get)
@@ -1,55 +1,362 @@
 import pandas as pd
+import numpy as np
 import streamlit as st
-import matplotlib.pyplot as plt
 import os
+import time
+from bisect import bisect_left, bisect_right
+from src.data_processing.aggregates import account_month_matrix, aggregate_sorted, refresh_accounts
+from src.data_processing.charts import APP_DPI, breakdown_chart
+from src.data_processing.columnar_cache import cached_source_state, load_cached_csv, normalize_bill_frame
+from src.data_processing.savings import SAVINGS_TOLERANCE, rank_savings, savings_metrics
+from src.data_processing.ingest import (concat_bill_frames, find_account_column, normalize_column_name,
+                                        peak_rss_mb, read_bill_csv)
+from src.utils.chart_cache import chart_cache, chart_key, data_version
+from src.utils.vega_charts import breakdown_spec, chart_renderer
+
+# Canonical fields shown for an account, in display order
+DISPLAY_COLUMNS = [
+    'Month',
+    'Usage (kWh)',
+    'Generation (kWh)',
+    'Net Usage (kWh)',
+    'Cost for Usage ($)',
+    'Credit for Generation ($)',
+    'Final Monthly Bill ($)'
+]
+
+# Display fields stored as numbers
+NUMERIC_DISPLAY_COLUMNS = DISPLAY_COLUMNS[1:]
+
+def resolve_display_schema(columns):
+    """
+    Map each display column to the source column that holds it.
+    
+    Case-insensitive exact matches win; the remaining display columns fall
+    back to the first source column containing the name (ignoring spaces).
+    
+    Returns:
+        dict: Display column -> source column, for the columns found
+    """
+    schema = {}
+    for target_col in DISPLAY_COLUMNS:
+        for db_col in columns:
+            if target_col.lower() == db_col.lower():
+                schema[target_col] = db_col
+                break
+    for target_col in DISPLAY_COLUMNS:
+        if target_col not in schema:
+            for db_col in columns:
+                if target_col.lower().replace(' ', '') in db_col.lower().replace(' ', ''):
+                    schema[target_col] = db_col
+                    break
+    return schema
+
+def build_display_frame(data, schema):
+    """
+    Project ``data`` onto the display columns, with numeric fields coerced once.
+    
+    Display columns missing from ``schema`` are filled with NaN.
+    """
+    display = pd.DataFrame(index=data.index)
+    for target_col in DISPLAY_COLUMNS:
+        if target_col not in schema:
+            display[target_col] = np.nan
+            continue
+        values = data[schema[target_col]]
+        if target_col in NUMERIC_DISPLAY_COLUMNS and not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors='coerce')
+        display[target_col] = values
+    return display
 
 class BillDataManager:
-    """Manages bill data loaded from CSV files."""
+    """
+    Manages bill data loaded from CSV files.
+    
+    The account column is resolved once per dataset, and the rows are grouped
+    by account (stable sort, so each account keeps its file order) with an
+    account -> (start, stop) offset index. Per-account lookups slice the
+    grouped frame instead of scanning every row.
+    
+    The display schema (display column -> source column) is resolved at the
+    same time, and a display frame with numeric fields already coerced is
+    kept alongside, so an account view is a slice of it. A per-account
+    aggregate table (see ``aggregates``) is materialized from it as well.
+    """
     
     def __init__(self, csv_path=None):
         """Initialize with optional CSV path."""
         self.data = None
+        # Rows, load time, memory and peak RSS of the last load_data call
+        self.load_stats = {}
         if csv_path and os.path.exists(csv_path):
             self.load_data(csv_path)
     
-    def load_data(self, csv_path):
-        """Load bill data from CSV file."""
+    @property
+    def data(self):
+        return self._data
+    
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self._index_columns = None
+        self.account_col = None
+        self._grouped = None
+        self._offsets = {}
+        self._accounts = []
+        self.display_schema = {}
+        self._display = None
+        self._savings = None
+        self._account_keys = None
+        self.aggregates = None
+        # CSV bytes the data was loaded from (see ``incremental``); None if unknown
+        self.source_state = None
+        # Deltas and rows applied since the columnar cache was last written (see ``incremental``)
+        self.uncached_deltas = 0
+        self.uncached_rows = 0
+    
+    def load_data(self, csv_path, columns=None):
+        """
+        Load bill data from a CSV file path or an uploaded file object.
+        
+        Paths on disk are read through the columnar cache (memory-mapped, only
+        ``columns`` if given); uploads are parsed directly.
+        """
         try:
-            self.data = pd.read_csv(csv_path)
-            # Convert column names to lowercase for consistency
-            self.data.columns = [col.lower() for col in self.data.columns]
+            start = time.perf_counter()
+            if isinstance(csv_path, str) and os.path.exists(csv_path):
+                data = load_cached_csv(csv_path, columns=columns)
+                source_state = cached_source_state(csv_path) if columns is None else None
+                stats = {'source': 'cache'}
+            else:
+                # Streamed in chunks; account IDs and months become categoricals
+                data, stats = read_bill_csv(csv_path)
+                data = normalize_bill_frame(data)
+                source_state = None
+                stats['source'] = 'csv'
+            self.data = data
+            self.source_state = source_state
+            self._build_index()
+            stats.update({
+                'rows': len(data),
+                'load_seconds': round(time.perf_counter() - start, 4),
+                'memory_mb': round(data.memory_usage(deep=True).sum() / (1024 * 1024), 3),
+                'peak_rss_mb': round(peak_rss_mb(), 1),
+            })
+            self.load_stats = stats
             return True
         except Exception as e:
             st.error(f"Error loading CSV file: {e}")
             return False
     
+    def _build_index(self):
+        """Resolve the account column and group rows by account with offsets."""
+        data = self._data
+        self._index_columns = data.columns
+        # Look for account column (might be named differently)
+        self.account_col = find_account_column(data.columns)
+        self.display_schema = resolve_display_schema(data.columns)
+        self._grouped = None
+        self._display = None
+        self._savings = None
+        self._account_keys = None
+        self.aggregates = None
+        self._offsets = {}
+        self._accounts = []
+        if not self.account_col:
+            return
+        
+        codes, uniques = pd.factorize(data[self.account_col], sort=True)
+        order = np.argsort(codes, kind='stable')
+        self._grouped = data.take(order)
+        # Rows without an account number (code -1) sort first and are skipped
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        stops = np.cumsum(counts) + int((codes < 0).sum())
+        starts = stops - counts
+        self._display = build_display_frame(self._grouped, self.display_schema)
+        self._accounts = uniques.tolist()
+        self._offsets = {account: (int(start), int(stop))
+                         for account, start, stop in zip(self._accounts, starts, stops)}
+        self.aggregates = aggregate_sorted(self._display, self._accounts, starts, stops)
+    
+    def with_rows(self, rows, replaced_accounts=()):
+        """
+        Return a new manager with ``rows`` applied as a delta; this one is left untouched.
+        
+        Every row of ``replaced_accounts`` is dropped first, then ``rows`` are
+        added after their account's remaining rows. Unchanged accounts are
+        moved as whole blocks (no re-sorting), and only the accounts touched by
+        the delta get their aggregates recomputed.
+        
+        Args:
+            rows: New bill rows with the same (normalized) columns as ``data``
+            replaced_accounts: Accounts whose current rows are removed
+        
+        Returns:
+            BillDataManager: The updated manager
+        """
+        self._ensure_index()
+        replaced = set(replaced_accounts)
+        base = len(self._grouped)
+        combined = concat_bill_frames([self._grouped, rows])
+        
+        codes, uniques = pd.factorize(rows[self.account_col], sort=True)
+        new_order = np.argsort(codes, kind='stable')
+        new_counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        new_missing = int((codes < 0).sum())
+        new_starts = base + new_missing + np.cumsum(new_counts) - new_counts
+        new_ranges = {account: (int(start), int(count))
+                      for account, start, count in zip(uniques.tolist(), new_starts, new_counts)}
+        # Positions into ``combined``: old rows in place, new rows grouped by account
+        source = np.concatenate([np.arange(base), base + new_order])
+        
+        # Segments of ``source`` in the new order: rows without an account first, then
+        # each account's kept rows followed by its new rows
+        old_missing = self._offsets[self._accounts[0]][0] if self._accounts else base
+        seg_starts, seg_lengths = [0, base], [old_missing, new_missing]
+        accounts = sorted(set(self._accounts).difference(replaced).union(new_ranges))
+        for account in accounts:
+            start, stop = self._offsets.get(account, (0, 0))
+            if account in replaced:
+                start = stop
+            new_start, new_count = new_ranges.get(account, (0, 0))
+            seg_starts += [start, new_start]
+            seg_lengths += [stop - start, new_count]
+        seg_starts = np.array(seg_starts, dtype=np.int64)
+        seg_lengths = np.array(seg_lengths, dtype=np.int64)
+        seg_stops = np.cumsum(seg_lengths)
+        seg_shift = seg_starts - (seg_stops - seg_lengths)
+        order = source[np.repeat(seg_shift, seg_lengths) + np.arange(int(seg_stops[-1]))]
+        
+        manager = BillDataManager()
+        grouped = combined.take(order)
+        manager._data = grouped
+        manager._index_columns = grouped.columns
+        manager.account_col = self.account_col
+        manager.display_schema = resolve_display_schema(grouped.columns)
+        manager._grouped = grouped
+        manager._display = build_display_frame(grouped, manager.display_schema)
+        manager._accounts = accounts
+        account_stops = seg_stops[3::2]
+        manager._offsets = {account: (int(stop - length), int(stop)) for account, stop, length
+                            in zip(accounts, account_stops, seg_lengths[2::2] + seg_lengths[3::2])}
+        manager.aggregates = refresh_accounts(self.aggregates, manager._display, manager._offsets,
+                                              replaced.union(new_ranges))
+        manager.load_stats = {'source': 'delta', 'rows': len(grouped), 'delta_rows': len(rows),
+                              'replaced_accounts': len(replaced)}
+        return manager
+    
+    def _ensure_index(self):
+        """Build the index on first use, or again if the columns were replaced."""
+        if self._data is not None and self._index_columns is not self._data.columns:
+            self._build_index()
+    
     def get_all_accounts(self):
         """Return list of all account numbers."""
         if self.data is None:
             return []
+        self._ensure_index()
+        return list(self._accounts)
+    
+    def get_accounts_page(self, prefix='', after=None, limit=100):
+        """
+        Return up to ``limit`` sorted accounts starting with ``prefix``.
         
-        # Look for account column (might be named differently)
-        account_col = next((col for col in self.data.columns if 'account' in col.lower()), None)
-        if account_col:
-            return sorted(self.data[account_col].unique().tolist())
-        return []
+        Pass the last account of the previous page as ``after`` to get the next page.
+        """
+        if self.data is None:
+            return []
+        self._ensure_index()
+        if self._account_keys is None:
+            # Text keys in text order, so prefixes and pages work for numeric account IDs too
+            pairs = sorted((str(account), account) for account in self._accounts)
+            self._account_keys = [key for key, _ in pairs]
+            self._accounts_by_key = [account for _, account in pairs]
+        keys = self._account_keys
+        start = bisect_left(keys, prefix)
+        if after is not None:
+            start = max(start, bisect_right(keys, str(after)))
+        stop = start
+        while stop < len(keys) and stop - start < limit and keys[stop].startswith(prefix):
+            stop += 1
+        return self._accounts_by_key[start:stop]
     
     def get_account_data(self, account_number):
         """Get all bill data for a specific account."""
         if self.data is None:
             return None
+        self._ensure_index()
+        if not self.account_col:
+            return None
         
-        # Find the account column
-        account_col = next((col for col in self.data.columns if 'account' in col.lower()), None)
-        if not account_col:
+        offsets = self._offsets.get(account_number)
+        if offsets is None:
+            return None
+        start, stop = offsets
+        return self._grouped.iloc[start:stop].copy()
+    
+    def get_display_data(self, account_number):
+        """Get an account's bills projected onto DISPLAY_COLUMNS (a slice of the cached display frame)."""
+        if self.data is None:
+            return None
+        self._ensure_index()
+        offsets = self._offsets.get(account_number)
+        if offsets is None:
             return None
+        start, stop = offsets
+        return self._display.iloc[start:stop]
+    
+    def get_savings_table(self):
+        """
+        Monthly vs. annual payment comparison for every account, largest savings first.
         
-        # Filter data for the specified account
-        account_data = self.data[self.data[account_col] == account_number]
-        if account_data.empty:
+        Ranked from the aggregate table, once per dataset.
+        """
+        if self.data is None:
+            return None
+        self._ensure_index()
+        if not self.account_col:
+            return None
+        if self._savings is None:
+            self._savings = rank_savings(self.aggregates.reset_index())
+        return self._savings
+    
+    def get_aggregates(self):
+        """The whole per-account aggregate table, indexed by account."""
+        if self.data is None:
             return None
+        self._ensure_index()
+        return self.aggregates
+    
+    def get_account_matrix(self, columns, accounts=None):
+        """
+        Display columns as (accounts x months) matrices (see ``aggregates.account_month_matrix``).
         
-        return account_data
+        Args:
+            columns: Display columns to lay out
+            accounts: Accounts to include (default: all, in sorted order)
+        
+        Returns:
+            tuple: (accounts, column -> matrix, valid-cell matrix), or None without data
+        """
+        if self.data is None:
+            return None
+        self._ensure_index()
+        if not self.account_col:
+            return None
+        accounts = [account for account in (self._accounts if accounts is None else accounts)
+                    if account in self._offsets]
+        bounds = np.array([self._offsets[account] for account in accounts], dtype=np.int64).reshape(-1, 2)
+        matrices, valid = account_month_matrix(self._display, bounds[:, 0], bounds[:, 1], columns)
+        return accounts, matrices, valid
+    
+    def get_account_summary(self, account_number):
+        """Precomputed totals for an account (a row of the aggregate table), or None."""
+        if self.data is None:
+            return None
+        self._ensure_index()
+        if self.aggregates is None or account_number not in self.aggregates.index:
+            return None
+        return self.aggregates.loc[account_number].to_dict()
     
     def get_monthly_bills(self, account_number):
         """Get monthly bill amounts for a specific account."""
@@ -74,56 +381,20 @@ def display_account_bills(account_number, bill_manager):
     # Check if bill_manager is a BillDataManager object or a file path
     if isinstance(bill_manager, str):
         monthly_bills = load_monthly_bills(bill_manager)
+        filtered_df = None
+        if monthly_bills is not None:
+            monthly_bills.columns = [normalize_column_name(col) for col in monthly_bills.columns]
+            filtered_df = build_display_frame(monthly_bills, resolve_display_schema(monthly_bills.columns))
     else:
-        # Assume it's a BillDataManager instance
-        monthly_bills = bill_manager.get_monthly_bills(account_number)
+        # Assume it's a BillDataManager instance; its display schema was resolved at load
+        filtered_df = bill_manager.get_display_data(account_number)
     
-    if monthly_bills is None or monthly_bills.empty:
+    if filtered_df is None or filtered_df.empty:
         st.warning(f"No bill data found for account {account_number}")
         return
     
     st.subheader(f"📊 Monthly Bills for Account: {account_number}")
     
-    # Clean up column names to remove any special characters or formatting issues
-    monthly_bills.columns = [col.strip().replace('\n', ' ').replace('\r', '') for col in monthly_bills.columns]
-    
-    # Debug info box removed
-    
-    # Define the specific columns we want to display and their mappings
-    display_columns = [
-        'Month',
-        'Usage (kWh)',
-        'Generation (kWh)',
-        'Net Usage (kWh)',
-        'Cost for Usage ($)',
-        'Credit for Generation ($)',
-        'Final Monthly Bill ($)'
-    ]
-    
-    # Create a new DataFrame with only the desired columns
-    filtered_df = pd.DataFrame(columns=display_columns)
-    
-    # Map columns based on case-insensitive exact matches
-    column_mapping = {}
-    for target_col in display_columns:
-        for db_col in monthly_bills.columns:
-            if target_col.lower() == db_col.lower():
-                column_mapping[target_col] = db_col
-                break
-    
-    # Fill in the filtered dataframe with matched columns
-    for target_col, db_col in column_mapping.items():
-        filtered_df[target_col] = monthly_bills[db_col]
-    
-    # For any columns that weren't matched, try partial matching
-    for target_col in display_columns:
-        if target_col not in column_mapping:
-            for db_col in monthly_bills.columns:
-                # Check if the target column name is contained within the database column name
-                if target_col.lower().replace(' ', '') in db_col.lower().replace(' ', ''):
-                    filtered_df[target_col] = monthly_bills[db_col]
-                    break
-    
     # Display the filtered dataframe
     st.dataframe(filtered_df)
     
@@ -140,84 +411,62 @@ def display_account_bills(account_number, bill_manager):
             filtered_df[cost_col].notna().sum() > 0 and 
             filtered_df[credit_col].notna().sum() > 0 and 
             filtered_df[bill_col].notna().sum() > 0):
+            summary = None
+            if not isinstance(bill_manager, str):
+                summary = bill_manager.get_account_summary(account_number)
             display_generation_consumption_breakdown(filtered_df, account_number, 
                                                    usage_col, cost_col, 
-                                                   credit_col, bill_col)
+                                                   credit_col, bill_col, summary)
         else:
             st.info("Not enough data to create a visualization. Please check your bill data.")
 
 def display_generation_consumption_breakdown(monthly_bills, account_number, 
                                            usage_col, cost_col, 
-                                           credit_col, bill_col):
-    """Display a breakdown of generation credits and consumption costs."""
+                                           credit_col, bill_col, summary=None):
+    """
+    Display a breakdown of generation credits and consumption costs.
+    
+    ``summary`` is the account's precomputed aggregate row; without it the
+    totals are summed from ``monthly_bills``.
+    """
     st.subheader("⚡ Generation vs. Consumption Breakdown")
     
     try:
-        # Create a copy to avoid modifying the original dataframe
-        breakdown_data = monthly_bills.copy()
-        
-        # Ensure the columns are numeric
-        for col in [cost_col, credit_col, bill_col]:
-            breakdown_data[col] = pd.to_numeric(breakdown_data[col], errors='coerce')
-        
-        # Create the visualization with a much smaller figure size
-        fig, ax = plt.subplots(figsize=(3, 2))  # Significantly smaller
-        
-        # Set even smaller font sizes for all text elements
-        plt.rcParams.update({
-            'font.size': 3,          # Base font size
-            'axes.titlesize': 4,     # Title font size
-            'axes.labelsize': 3.5,   # Axis label font size
-            'xtick.labelsize': 3,    # X-axis tick label font size
-            'ytick.labelsize': 3,    # Y-axis tick label font size
-            'legend.fontsize': 3     # Legend font size
-        })
-        
-        # Get month names for x-axis
-        x_values = breakdown_data.index
-        if 'Month' in breakdown_data.columns:
-            x_values = breakdown_data['Month']
-        
-        # Plot bars
-        usage_bars = ax.bar(x_values, breakdown_data[cost_col], 
-                           color='indianred', label='Cost for Usage')
-        credit_bars = ax.bar(x_values, -breakdown_data[credit_col], 
-                            color='forestgreen', label='Credit for Generation')
-        
-        # Add bill amount as a line
-        bill_line = ax.plot(x_values, breakdown_data[bill_col], 
-                          'ko-', linewidth=0.6, label='Monthly Bill')
-        
-        # Formatting
-        ax.set_xlabel('Month')
-        ax.set_ylabel('Amount ($)')
-        ax.set_title('Generation vs. Consumption')  # Shortened title
-        
-        # Create legend manually with smaller font
-        ax.legend([usage_bars, credit_bars, bill_line[0]], 
-                 ['Cost', 'Credit', 'Bill'],  # Shorter labels
-                 loc='best', frameon=True, framealpha=0.7, fontsize=3)
-        
-        # Add grid for better readability
-        ax.grid(True, linestyle='--', alpha=0.3, linewidth=0.2)
-        
-        # Make x-axis labels rotated for better fit
-        plt.xticks(rotation=45)
-        
-        # Adjust layout to ensure everything fits
-        plt.tight_layout(pad=0.1)  # Reduce padding
-        
-        # Display the plot with custom width
-        st.pyplot(fig, use_container_width=False)
-        
-        # Reset rcParams to default for other plots
-        plt.rcParams.update(plt.rcParamsDefault)
+        # Display frames arrive already numeric; only other input is copied and coerced
+        breakdown_data = monthly_bills
+        to_coerce = [col for col in [cost_col, credit_col, bill_col]
+                     if not pd.api.types.is_numeric_dtype(monthly_bills[col])]
+        if to_coerce:
+            breakdown_data = monthly_bills.copy()
+            for col in to_coerce:
+                breakdown_data[col] = pd.to_numeric(breakdown_data[col], errors='coerce')
+        
+        if chart_renderer() == 'vega':
+            # Drawn in the browser from a spec holding only the plotted values
+            st.vega_lite_chart(spec=breakdown_spec(breakdown_data, cost_col, credit_col, bill_col),
+                               use_container_width=True)
+        else:
+            # Rendered once per account and data version; reruns and other sessions reuse the image
+            chart_columns = [col for col in ['Month', cost_col, credit_col, bill_col] if col in breakdown_data.columns]
+            version = data_version(breakdown_data[chart_columns], breakdown_data.index.tolist())
+            chart = chart_cache().get_or_render(
+                chart_key('breakdown', account_number, version, ((3, 2), APP_DPI, 'png')),
+                lambda: breakdown_chart(breakdown_data, cost_col, credit_col, bill_col, figsize=(3, 2),
+                                        dpi=APP_DPI, bbox_inches='tight'))
+            st.image(chart)
         
         # Calculate totals
-        total_generation = breakdown_data[credit_col].sum()
-        total_consumption = breakdown_data[cost_col].sum()
-        net_balance = total_consumption - total_generation
-        monthly_bills_total = breakdown_data[bill_col].sum()
+        if summary is not None:
+            total_generation = summary['total_generation']
+            total_consumption = summary['total_consumption']
+            monthly_bills_total = summary['monthly_bills_total']
+        else:
+            total_generation = breakdown_data[credit_col].sum()
+            total_consumption = breakdown_data[cost_col].sum()
+            monthly_bills_total = breakdown_data[bill_col].sum()
+        # Same definitions as the portfolio savings table
+        metrics = savings_metrics(total_consumption, total_generation, monthly_bills_total)
+        net_balance = metrics['net_balance']
         
         # Display metrics
         col1, col2 = st.columns(2)
@@ -238,10 +487,10 @@ def display_generation_consumption_breakdown(monthly_bills, account_number,
             st.warning(f"⚠️ Your consumption costs exceed your generation credits by ${net_balance:.2f}.")
             
         # Add comparison between monthly bills total and annual payment
-        difference = monthly_bills_total - net_balance
+        difference = metrics['difference']
         
         # Use a small threshold to account for floating point precision issues
-        if abs(difference) < 0.01:
+        if abs(difference) < SAVINGS_TOLERANCE:
             st.info("💡 There is no significant difference between paying monthly or annually.")
         elif difference > 0:
             st.info(f"💡 By paying annually instead of monthly, you could save ${difference:.2f}.")
@@ -252,82 +501,6 @@ def display_generation_consumption_breakdown(monthly_bills, account_number,
         st.error(f"Error creating generation vs. consumption breakdown: {str(e)}")
         st.info("Could not create detailed breakdown with the available data.")
 
-def display_generation_consumption_breakdown_dynamic(monthly_bills, account_number, 
-                                                   usage_col, cost_col, 
-                                                   credit_col, bill_col):
-    """Display a breakdown of generation credits and consumption costs with dynamic column detection."""
-    st.subheader("⚡ Generation vs. Consumption Breakdown")
-    
-    try:
-        # Create a copy to avoid modifying the original dataframe
-        breakdown_data = monthly_bills.copy()
-        
-        # Ensure the columns are numeric
-        for col in [cost_col, credit_col, bill_col]:
-            breakdown_data[col] = pd.to_numeric(breakdown_data[col], errors='coerce')
-        
-        # Create the visualization
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        # Get month names or index for x-axis
-        x_values = breakdown_data.index
-        month_col = next((col for col in breakdown_data.columns if 'month' in col.lower()), None)
-        if month_col:
-            x_values = breakdown_data[month_col]
-        
-        # Plot bars
-        usage_bars = ax.bar(x_values, breakdown_data[cost_col], 
-                           color='indianred', label=f'{cost_col}')
-        credit_bars = ax.bar(x_values, -breakdown_data[credit_col], 
-                            color='forestgreen', label=f'{credit_col}')
-        
-        # Add bill amount as a line
-        bill_line = ax.plot(x_values, breakdown_data[bill_col], 
-                          'ko-', linewidth=2, label=f'{bill_col}')
-        
-        # Formatting
-        ax.set_xlabel('Month')
-        ax.set_ylabel('Amount ($)')
-        ax.set_title('Generation vs. Consumption Breakdown')
-        
-        # Create legend manually
-        ax.legend([usage_bars, credit_bars, bill_line[0]], 
-                 [cost_col, credit_col, bill_col])
-        
-        # Add grid for better readability
-        ax.grid(True, linestyle='--', alpha=0.7)
-        
-        # Display the plot
-        st.pyplot(fig)
-        
-        # Calculate totals
-        total_generation = breakdown_data[credit_col].sum()
-        total_consumption = breakdown_data[cost_col].sum()
-        net_balance = total_consumption - total_generation
-        
-        # Display metrics
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric("Total Generation Credits", f"${abs(total_generation):.2f}")
-        
-        with col2:
-            st.metric("Total Consumption Costs", f"${total_consumption:.2f}")
-        
-        with col3:
-            st.metric("Net Balance", f"${net_balance:.2f}", 
-                     delta="Credit" if net_balance <= 0 else "Debit")
-        
-        # Add a summary
-        if net_balance <= 0:
-            st.success(f"✅ Your generation credits exceed your consumption costs by ${abs(net_balance):.2f}.")
-        else:
-            st.warning(f"⚠️ Your consumption costs exceed your generation credits by ${net_balance:.2f}.")
-    
-    except Exception as e:
-        st.error(f"Error creating generation vs. consumption breakdown: {str(e)}")
-        st.info("Could not create detailed breakdown with the available data.")
-
 # Remove or comment out these lines
 # file_path = '/Users/junjiezhang/Documents/GitHub/nem-agent/data/Monthly_Bills_for_Each_Account.csv'
 # display_account_bills('123456', file_path) 
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Watch shared bill data files and refresh them as soon as they change.
+
+Without a watcher a changed CSV is only noticed by the next lease (see
+``SharedBillData``), so the first request after an update pays for the
+reload. The watcher listens for file-system events with watchdog and calls
+``SharedBillData.refresh`` once writes settle, so the delta is applied in the
+background and new requests get the updated data straight away.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+import logging
+import os
+import threading
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from src.data_processing.shared_data import SharedBillData, shared_bill_data
+
+logger = logging.getLogger(__name__)
+
+# Seconds without further events before a changed file is refreshed
+DEFAULT_DEBOUNCE = 0.5
+
+class BillFileWatcher(FileSystemEventHandler):
+    """Refreshes files in a SharedBillData registry when they are written."""
+
+    def __init__(self, shared: SharedBillData, paths: Iterable[str], debounce: float = DEFAULT_DEBOUNCE):
+        self.shared = shared
+        self.paths = {os.path.abspath(path) for path in paths}
+        self.debounce = debounce
+        self._timers: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+        self._observer: Optional[Observer] = None
+
+    def start(self) -> 'BillFileWatcher':
+        """Start watching the directories of the watched files."""
+        self._observer = Observer()
+        for directory in {os.path.dirname(path) for path in self.paths}:
+            self._observer.schedule(self, directory, recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+        return self
+
+    def stop(self):
+        """Stop watching and cancel pending refreshes."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        # Writes, and atomic replacements (moved onto the watched path)
+        for path in (getattr(event, 'dest_path', ''), event.src_path):
+            path = os.path.abspath(os.fsdecode(path)) if path else ''
+            if path in self.paths:
+                self._schedule(path)
+
+    def _schedule(self, path: str):
+        """Refresh ``path`` once no event has arrived for ``debounce`` seconds."""
+        with self._lock:
+            timer = self._timers.get(path)
+            if timer is not None:
+                timer.cancel()
+            timer = threading.Timer(self.debounce, self._refresh, args=(path,))
+            timer.daemon = True
+            self._timers[path] = timer
+            timer.start()
+
+    def _refresh(self, path: str):
+        with self._lock:
+            self._timers.pop(path, None)
+        if not os.path.exists(path):
+            return
+        try:
+            version = self.shared.refresh(path)
+            logger.info(f"Refreshed {path} (version {version})")
+        except Exception as e:
+            logger.warning(f"Could not refresh {path}: {e}")
+
+@lru_cache(maxsize=None)
+def watch_bill_file(path: str) -> BillFileWatcher:
+    """Start (once per process) a watcher that keeps ``path`` fresh in ``shared_bill_data()``."""
+    return BillFileWatcher(shared_bill_data(), [path]).start()
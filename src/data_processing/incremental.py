@@ -0,0 +1,194 @@
+"""
+Incremental reloads of a bills CSV that changed on disk.
+
+A loaded BillDataManager remembers the size and SHA-256 of the CSV bytes it
+was built from (``source_state``). When the file changes:
+
+* if the old bytes are still an unchanged prefix (new months were appended),
+  only the appended lines are parsed and added to the store;
+* otherwise the file is parsed again, compared account by account with the
+  loaded rows, and only the accounts whose rows differ are replaced.
+
+Either way the update produces a new manager (``BillDataManager.with_rows``),
+so readers of the current one are never disturbed, and only the touched
+accounts get their aggregates recomputed.
+
+Rewriting the columnar cache costs as much as the whole table, so appends do
+not rewrite it each time: it is written once the rows appended since the last
+write reach CACHE_REWRITE_FRACTION of the table (or CACHE_REWRITE_DELTAS
+appends pile up), keeping the cost per appended row constant. Edits, which
+parse the whole file anyway, always rewrite it, and ``flush_cache`` writes
+whatever is pending (the shared registry calls it at exit). Until then a cold
+start simply parses the CSV again.
+"""
+from typing import Optional, Tuple
+import hashlib
+import io
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing.columnar_cache import (SourceState, file_sha256, normalize_bill_frame,
+                                                write_cache)
+from src.data_processing.csv_bill_loader import BillDataManager
+from src.data_processing.ingest import read_bill_csv
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 1 << 20
+
+# Appended rows, as a fraction of the table, that trigger a columnar cache rewrite
+CACHE_REWRITE_FRACTION = 0.05
+
+# Appends after which the cache is rewritten however few rows they added
+CACHE_REWRITE_DELTAS = 50
+
+def read_appended_rows(csv_path: str, state: SourceState) -> Optional[Tuple[pd.DataFrame, SourceState]]:
+    """
+    Parse only the lines appended to ``csv_path`` since ``state``.
+
+    A trailing line that is still being written (no newline yet) is left for
+    the next call.
+
+    Returns:
+        tuple: (normalized new rows or None if there are none yet, state of
+            the bytes consumed), or None if the file was not simply appended to
+    """
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        f.seek(0)
+        digest = hashlib.sha256()
+        remaining = state.size
+        last = b''
+        while remaining:
+            block = f.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                return None
+            digest.update(block)
+            last = block[-1:]
+            remaining -= len(block)
+        if digest.hexdigest() != state.sha256 or last != b'\n':
+            return None
+        tail = f.read()
+
+    tail = tail[:tail.rfind(b'\n') + 1]
+    if not tail.strip():
+        return None, state
+    digest.update(tail)
+    rows = normalize_bill_frame(read_bill_csv(io.BytesIO(header + tail))[0])
+    return rows, SourceState(state.size + len(tail), digest.hexdigest())
+
+def account_digests(data: pd.DataFrame, accounts: list, starts, stops) -> pd.Series:
+    """
+    One order-sensitive hash per account over its rows.
+
+    Numbers are hashed as float64 and text by value, so the same bill hashes
+    the same whether a column was loaded as int32, float32 or categorical.
+    """
+    canonical = data.apply(lambda col: col.astype(np.float64)
+                           if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col)
+                           else col)
+    row_hashes = pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+    starts = np.asarray(starts, dtype=np.int64)
+    counts = np.asarray(stops, dtype=np.int64) - starts
+    if not len(counts):
+        return pd.Series([], index=pd.Index([], dtype=object), dtype=np.uint64)
+    # Row positions of every account, back to back, and each row's position within its account
+    firsts = np.cumsum(counts) - counts
+    within = np.arange(int(counts.sum())) - np.repeat(firsts, counts)
+    rows = np.repeat(starts, counts) + within
+    # Weighted by position so reordered rows count as a change (uint64 arithmetic wraps)
+    weighted = row_hashes[rows] * (2 * within.astype(np.uint64) + np.uint64(1))
+    sums = np.add.reduceat(weighted, firsts)
+    return pd.Series(sums, index=pd.Index(accounts, dtype=object))
+
+def changed_accounts(manager: BillDataManager, data: pd.DataFrame) -> set:
+    """Accounts whose rows in ``data`` (a normalized frame) differ from the manager's."""
+    account_col = manager.account_col
+    codes, uniques = pd.factorize(data[account_col], sort=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    # normalize_bill_frame sorts rows without an account last
+    stops = np.cumsum(counts)
+    new = account_digests(data, uniques.tolist(), stops - counts, stops)
+
+    accounts = manager._accounts
+    bounds = [manager._offsets[account] for account in accounts]
+    old = account_digests(manager._grouped, accounts,
+                          [start for start, _ in bounds], [stop for _, stop in bounds])
+    both = old.index.intersection(new.index)
+    changed = set(old.index.symmetric_difference(new.index))
+    changed.update(both[old[both].to_numpy() != new[both].to_numpy()])
+    return changed
+
+def apply_file_changes(manager: BillDataManager, csv_path: str) -> Optional[BillDataManager]:
+    """
+    Bring a loaded manager up to date with its CSV, applying only the delta.
+
+    Args:
+        manager: Manager loaded from ``csv_path`` (left untouched)
+        csv_path: The changed CSV
+
+    Returns:
+        BillDataManager: The updated manager (``manager`` itself if nothing
+            changed), or None if the delta cannot be applied and the file
+            has to be loaded again from scratch
+    """
+    if not isinstance(manager, BillDataManager) or manager.source_state is None:
+        return None
+    manager._ensure_index()
+    if not manager.account_col:
+        return None
+
+    appended = read_appended_rows(csv_path, manager.source_state)
+    if appended is not None:
+        rows, state = appended
+        if rows is None:
+            return manager
+        if list(rows.columns) != list(manager.data.columns):
+            return None
+        updated = manager.with_rows(rows)
+        logger.info(f"Appended {len(rows)} rows from {csv_path}")
+    else:
+        sha256 = file_sha256(csv_path)
+        data = normalize_bill_frame(read_bill_csv(csv_path)[0])
+        if list(data.columns) != list(manager.data.columns) or file_sha256(csv_path) != sha256:
+            # Different layout, or still being written: reload it once it settles
+            return None
+        state = SourceState(os.path.getsize(csv_path), sha256)
+        changed = changed_accounts(manager, data)
+        rows = data[data[manager.account_col].isin(changed)]
+        updated = manager.with_rows(rows, replaced_accounts=changed)
+        logger.info(f"Replaced the rows of {len(changed)} changed account(s) from {csv_path}")
+
+    updated.source_state = state
+    if appended is not None:
+        updated.uncached_deltas = manager.uncached_deltas + 1
+        updated.uncached_rows = manager.uncached_rows + len(rows)
+        if (updated.uncached_rows < CACHE_REWRITE_FRACTION * len(updated.data)
+                and updated.uncached_deltas < CACHE_REWRITE_DELTAS):
+            return updated
+    flush_cache(updated, csv_path, force=True)
+    return updated
+
+def flush_cache(manager: BillDataManager, csv_path: str, force: bool = False) -> bool:
+    """
+    Write the manager's data to the columnar cache of ``csv_path`` if it has
+    deltas the cache does not have yet (or always, with ``force``).
+
+    Returns:
+        bool: True if the cache was written
+    """
+    if not isinstance(manager, BillDataManager) or manager.source_state is None:
+        return False
+    if not force and not manager.uncached_deltas:
+        return False
+    try:
+        write_cache(csv_path, manager.data, manager.source_state)
+    except OSError as e:
+        logger.warning(f"Could not update the columnar cache for {csv_path}: {e}")
+        return False
+    manager.uncached_deltas = 0
+    manager.uncached_rows = 0
+    return True
@@ -0,0 +1,185 @@
+"""
+Chunked ingestion of monthly bill CSV exports.
+
+The file is streamed in fixed-size chunks instead of being parsed in one
+``pd.read_csv`` call. Each chunk gets the column-name mapping and numeric
+coercion applied and is downcast (float32/int32, account IDs and months as
+categoricals) before the next one is read, so peak memory stays close to the
+size of the compact result rather than several times the raw CSV.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+import re
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+logger = logging.getLogger(__name__)
+
+# Rows parsed per chunk
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Characters stripped from money columns before numeric coercion ("$1,234.50")
+CURRENCY_CHARS = re.compile(r'[$,\s]')
+
+# A text column is treated as numeric when at least this share of its values parse
+NUMERIC_THRESHOLD = 0.9
+
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+def normalize_column_name(name: str) -> str:
+    """Map a raw CSV header to the loader's column name (trimmed, single-line, lowercase)."""
+    return ' '.join(str(name).replace('\r', ' ').replace('\n', ' ').split()).lower()
+
+def find_account_column(columns) -> Optional[str]:
+    """Return the first column whose name contains 'account'."""
+    return next((col for col in columns if 'account' in col.lower()), None)
+
+def find_month_column(columns) -> Optional[str]:
+    """Return the billing month column ('month', not e.g. 'final monthly bill ($)')."""
+    return next((col for col in columns if col.lower() == 'month' or col.lower().startswith('month ')), None)
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _coerce_numeric(values: pd.Series) -> Optional[pd.Series]:
+    """Parse a text column as numbers, or return None if it is not numeric."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values
+    text = values.astype('string').str.replace(CURRENCY_CHARS, '', regex=True)
+    parsed = pd.to_numeric(text, errors='coerce')
+    present = values.notna().sum()
+    if present and parsed.notna().sum() / present >= NUMERIC_THRESHOLD:
+        return parsed
+    return None
+
+def _downcast(values: pd.Series) -> pd.Series:
+    """Store whole numbers as int32 where they fit, everything else as float32."""
+    if pd.api.types.is_bool_dtype(values):
+        return values
+    if values.notna().all() and len(values) and (values % 1 == 0).all() \
+            and values.min() >= INT32_MIN and values.max() <= INT32_MAX:
+        return values.astype(np.int32)
+    return values.astype(np.float32)
+
+def _prepare_chunk(chunk: pd.DataFrame, text_columns: set, category_columns: List[str],
+                   downcast: bool = True) -> pd.DataFrame:
+    chunk.columns = [normalize_column_name(col) for col in chunk.columns]
+    for col in chunk.columns:
+        if col in category_columns:
+            chunk[col] = chunk[col].astype('string').str.strip().astype('category')
+        elif col in text_columns:
+            continue
+        else:
+            parsed = _coerce_numeric(chunk[col])
+            if parsed is None:
+                text_columns.add(col)
+            else:
+                chunk[col] = _downcast(parsed) if downcast else parsed
+    return chunk
+
+def _combine(chunks: List[pd.DataFrame], category_columns: List[str], account_col: Optional[str]) -> pd.DataFrame:
+    """Concatenate chunks, merging categoricals without expanding them to strings."""
+    if not chunks:
+        return pd.DataFrame()
+    categories = {col: union_categoricals([chunk[col] for chunk in chunks], sort_categories=(col == account_col))
+                  for col in category_columns}
+    other = [col for col in chunks[0].columns if col not in categories]
+    data = pd.concat([chunk[other] for chunk in chunks], ignore_index=True)
+    for col, values in categories.items():
+        data[col] = values
+    data = data[list(chunks[0].columns)]
+    # A column that was whole in some chunks and fractional/missing in others concatenates to float64
+    for col in data.columns:
+        if data[col].dtype == np.float64 or (col not in categories and data[col].dtype == np.int64):
+            data[col] = _downcast(data[col])
+    return data
+
+def _read_header(source) -> Tuple[List[str], Dict[str, type], List[str], Optional[str]]:
+    header = pd.read_csv(source, nrows=0)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    raw_columns = list(header.columns)
+    columns = [normalize_column_name(col) for col in raw_columns]
+    account_col = find_account_column(columns)
+    month_col = find_month_column(columns)
+    category_columns = [col for col in (account_col, month_col) if col]
+    # Category columns are read as text so account IDs keep their leading zeros
+    dtype = {raw: str for raw, col in zip(raw_columns, columns) if col in category_columns}
+    return columns, dtype, category_columns, account_col
+
+def iter_bill_chunks(source, chunksize: int = DEFAULT_CHUNK_ROWS, downcast: bool = True) -> Iterator[pd.DataFrame]:
+    """
+    Yield the prepared chunks of a bills CSV one at a time.
+
+    Each chunk has normalized column names, numeric columns coerced and
+    downcast, and account/month columns as categoricals. A column can turn
+    out to be text part-way through the file, so chunk dtypes may differ.
+    With ``downcast=False`` numbers keep their parsed int64/float64 dtypes.
+    """
+    _, dtype, category_columns, _ = _read_header(source)
+    text_columns: set = set()
+    reader = pd.read_csv(source, dtype=dtype or None, chunksize=chunksize)
+    # Accept a plain DataFrame too (e.g. a stubbed read_csv)
+    for chunk in [reader] if isinstance(reader, pd.DataFrame) else reader:
+        yield _prepare_chunk(chunk, text_columns, category_columns, downcast)
+
+def read_bill_csv(source, chunksize: int = DEFAULT_CHUNK_ROWS) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Stream a bills CSV (path or file object) into a compact DataFrame.
+
+    Args:
+        source: Path or file-like object
+        chunksize: Rows parsed per chunk
+
+    Returns:
+        tuple: (DataFrame, load stats with rows, chunks, load_seconds, memory_mb and peak_rss_mb)
+    """
+    start = time.perf_counter()
+    columns, _, category_columns, account_col = _read_header(source)
+    chunks = list(iter_bill_chunks(source, chunksize))
+    # Columns found to hold text part-way through must be text in every chunk
+    text_columns = {col for chunk in chunks for col in chunk.columns if chunk[col].dtype == object}
+    for chunk in chunks:
+        for col in text_columns:
+            if chunk[col].dtype != object:
+                chunk[col] = chunk[col].astype(object)
+
+    data = _combine(chunks, category_columns, account_col)
+    if data.empty and not len(data.columns):
+        data = pd.DataFrame(columns=columns)
+    stats = {
+        'rows': len(data),
+        'chunks': len(chunks),
+        'load_seconds': round(time.perf_counter() - start, 4),
+        'memory_mb': round(data.memory_usage(deep=True).sum() / (1024 * 1024), 3),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    logger.info(f"Ingested {stats['rows']} rows in {stats['chunks']} chunk(s) "
+                f"in {stats['load_seconds']}s ({stats['memory_mb']} MB, peak RSS {stats['peak_rss_mb']} MB)")
+    return data, stats
+
+def concat_bill_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate bill frames with the same columns (e.g. loaded data and newly appended rows).
+
+    Columns that are categorical in every frame stay categorical (with merged
+    categories) and numbers are downcast as in ``read_bill_csv``.
+    """
+    columns = list(frames[0].columns)
+    category_columns = [col for col in columns
+                        if all(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames)]
+    if category_columns:
+        # Categories read back from Arrow are strings rather than objects; align them without recoding
+        frames = [frame.assign(**{
+            col: pd.Categorical.from_codes(frame[col].cat.codes, categories=frame[col].cat.categories.astype(object))
+            for col in category_columns if frame[col].cat.categories.dtype != object
+        }) for frame in frames]
+    return _combine(frames, category_columns, find_account_column(columns))
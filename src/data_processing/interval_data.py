@@ -0,0 +1,530 @@
+"""
+Interval (15-minute / hourly) import and export data per account.
+
+Green Button downloads come as CSV ("Download My Data") or ESPI XML ("Connect
+My Data"); a year of 15-minute data is about 35k readings per account. Both
+are parsed in a streaming fashion (CSV in chunks, XML entry by entry) and
+spooled to disk, then written as an ``IntervalStore``: flat binary arrays
+(local start time in seconds, import kWh, export kWh) grouped by account and
+sorted by time, with an account -> (start, stop) offset index, like the
+monthly bills index. Stores are opened memory-mapped, so simulations over
+thousands of accounts only page in the accounts they are working on.
+
+Usage:
+    python -m src.data_processing.interval_data data/intervals usage/*.csv usage/*.xml
+"""
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+from src.data_processing.ingest import normalize_column_name
+
+logger = logging.getLogger(__name__)
+
+# Rows parsed per CSV chunk
+DEFAULT_CHUNK_ROWS = 200_000
+
+# Bump when the store layout changes
+STORE_FORMAT = 1
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+ESPI_NS = '{http://naesb.org/espi}'
+
+# Trailing UTC offset of an ISO timestamp ("...T12:00:00-07:00", "...Z")
+UTC_OFFSET = re.compile(r'(?:[+-]\d{2}:?\d{2}|Z)$')
+
+# ESPI ReadingType codes
+FLOW_FORWARD, FLOW_NET, FLOW_REVERSE = 1, 4, 19
+UOM_WH = 72
+
+class IntervalChunk(NamedTuple):
+    """Readings of one or more accounts: local start (seconds), import and export kWh."""
+    account: Union[str, np.ndarray]
+    start: np.ndarray
+    import_kwh: np.ndarray
+    export_kwh: np.ndarray
+
+def to_local_seconds(values: pd.Series) -> np.ndarray:
+    """Naive (wall-clock) timestamps as seconds since 1970-01-01."""
+    return values.to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+def us_dst_mask(standard_seconds: np.ndarray) -> np.ndarray:
+    """
+    Which local standard times fall in US daylight saving time.
+
+    DST runs from 2:00 on the second Sunday of March to 2:00 daylight time
+    (1:00 standard) on the first Sunday of November.
+    """
+    years = standard_seconds.astype('datetime64[s]').astype('datetime64[Y]')
+    mask = np.zeros(len(standard_seconds), dtype=bool)
+    for year in np.unique(years):
+        march = np.datetime64(f"{year}-03-01")
+        november = np.datetime64(f"{year}-11-01")
+        start = np.busday_offset(march, 1, roll='forward', weekmask='Sun') + np.timedelta64(2, 'h')
+        end = np.busday_offset(november, 0, roll='forward', weekmask='Sun') + np.timedelta64(1, 'h')
+        start_s = start.astype('datetime64[s]').astype(np.int64)
+        end_s = end.astype('datetime64[s]').astype(np.int64)
+        in_year = years == year
+        mask[in_year] = (standard_seconds[in_year] >= start_s) & (standard_seconds[in_year] < end_s)
+    return mask
+
+class IntervalStore:
+    """
+    Per-account interval series in flat arrays.
+
+    Rows are grouped by account and sorted by start time within an account;
+    ``offsets[i]:offsets[i + 1]`` are the rows of ``accounts[i]``. On disk each
+    array is a raw little-endian file next to an ``index.json`` holding the
+    account order, so it can be memory-mapped directly.
+    """
+
+    ARRAYS = {'start': '<i8', 'import_kwh': '<f4', 'export_kwh': '<f4'}
+
+    def __init__(self, accounts: List[str], offsets: np.ndarray, start: np.ndarray,
+                 import_kwh: np.ndarray, export_kwh: np.ndarray):
+        self.accounts = list(accounts)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.start = start
+        self.import_kwh = import_kwh
+        self.export_kwh = export_kwh
+        self._positions = {account: i for i, account in enumerate(self.accounts)}
+
+    @classmethod
+    def open(cls, path: str, mmap: bool = True) -> 'IntervalStore':
+        """Open a store directory (memory-mapped unless ``mmap`` is False)."""
+        if not os.path.exists(path) and os.path.exists(path.rstrip(os.sep) + '.old'):
+            # An ingest stopped while swapping the new store in
+            path = path.rstrip(os.sep) + '.old'
+        with open(os.path.join(path, 'index.json')) as f:
+            index = json.load(f)
+        if index.get('format') != STORE_FORMAT:
+            raise ValueError(f"Unsupported interval store format in {path}: {index.get('format')}")
+        arrays = {}
+        for name, dtype in cls.ARRAYS.items():
+            file_path = os.path.join(path, f"{name}.bin")
+            if mmap and index['rows']:
+                arrays[name] = np.memmap(file_path, dtype=dtype, mode='r', shape=(index['rows'],))
+            else:
+                arrays[name] = np.fromfile(file_path, dtype=dtype)
+        return cls(index['accounts'], np.array(index['offsets'], dtype=np.int64), **arrays)
+
+    def __len__(self):
+        return len(self.accounts)
+
+    @property
+    def rows(self) -> int:
+        return int(self.offsets[-1]) if len(self.offsets) else 0
+
+    def account_rows(self, account: str) -> Optional[Tuple[int, int]]:
+        """(start, stop) rows of ``account``, or None if it is not in the store."""
+        position = self._positions.get(account)
+        if position is None:
+            return None
+        return int(self.offsets[position]), int(self.offsets[position + 1])
+
+    def get_account(self, account: str) -> Optional[pd.DataFrame]:
+        """One account's readings as a DataFrame (timestamp, import_kwh, export_kwh)."""
+        rows = self.account_rows(account)
+        if rows is None:
+            return None
+        start, stop = rows
+        return pd.DataFrame({
+            'timestamp': np.asarray(self.start[start:stop]).astype('datetime64[s]'),
+            'import_kwh': np.asarray(self.import_kwh[start:stop]),
+            'export_kwh': np.asarray(self.export_kwh[start:stop]),
+        })
+
+    def batches(self, max_accounts: int) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """Yield consecutive accounts in groups of ``max_accounts`` with their offsets."""
+        for first in range(0, len(self.accounts), max_accounts):
+            last = min(first + max_accounts, len(self.accounts))
+            yield self.accounts[first:last], self.offsets[first:last + 1]
+
+class IntervalStoreWriter:
+    """
+    Builds an IntervalStore from chunks in any order.
+
+    Chunks are spooled to raw files as they arrive, split into buckets by
+    account, so ``close`` only holds one bucket in memory while it sorts it by
+    (account, start) and appends it to the store. Readings of the same
+    account and interval are merged by taking each field's largest value, so
+    separate import and export readings of one interval combine into one row
+    and overlapping downloads are not counted twice.
+    """
+
+    SPOOL = dict(IntervalStore.ARRAYS, account='<i4')
+
+    def __init__(self, path: str, buckets: int = 16):
+        self.path = path
+        self.buckets = buckets
+        os.makedirs(path, exist_ok=True)
+        self._codes: Dict[str, int] = {}
+        self._spool = [{name: open(self._spool_path(name, bucket), 'wb') for name in self.SPOOL}
+                       for bucket in range(buckets)]
+        self.rows = 0
+
+    def _spool_path(self, name: str, bucket: int) -> str:
+        return os.path.join(self.path, f"_spool_{bucket}_{name}.bin")
+
+    def append(self, chunk: IntervalChunk):
+        """Spool one chunk of readings."""
+        n = len(chunk.start)
+        if not n:
+            return
+        if isinstance(chunk.account, str):
+            codes = np.full(n, self._codes.setdefault(chunk.account, len(self._codes)), dtype=np.int32)
+        else:
+            local, names = pd.factorize(pd.Series(chunk.account).astype(str))
+            lookup = np.array([self._codes.setdefault(name, len(self._codes)) for name in names], dtype=np.int32)
+            codes = lookup[local]
+        values = {'start': chunk.start, 'import_kwh': chunk.import_kwh,
+                  'export_kwh': chunk.export_kwh, 'account': codes}
+        values = {name: np.asarray(values[name], dtype=dtype) for name, dtype in self.SPOOL.items()}
+        bucket_of = codes % self.buckets
+        for bucket in np.unique(bucket_of):
+            rows = bucket_of == bucket
+            for name, array in values.items():
+                array[rows].tofile(self._spool[bucket][name])
+        self.rows += n
+
+    def close(self) -> IntervalStore:
+        """Sort, merge duplicate intervals and write the store; returns it opened memory-mapped."""
+        names = {code: account for account, code in self._codes.items()}
+        accounts: List[str] = []
+        counts: List[np.ndarray] = []
+        outputs = {name: open(os.path.join(self.path, f"{name}.bin"), 'wb') for name in IntervalStore.ARRAYS}
+        try:
+            for bucket, files in enumerate(self._spool):
+                for f in files.values():
+                    f.close()
+                spooled = {name: np.fromfile(self._spool_path(name, bucket), dtype=dtype)
+                           for name, dtype in self.SPOOL.items()}
+                for name in self.SPOOL:
+                    os.remove(self._spool_path(name, bucket))
+                if not len(spooled['start']):
+                    continue
+                # Accounts of the bucket in sorted order
+                bucket_accounts = sorted(names[code] for code in np.unique(spooled['account']))
+                rank = {self._codes[account]: i for i, account in enumerate(bucket_accounts)}
+                lookup = np.zeros(int(spooled['account'].max()) + 1, dtype=np.int32)
+                lookup[list(rank)] = list(rank.values())
+                codes = lookup[spooled['account']]
+                order = np.lexsort((spooled['start'], codes))
+                codes = codes[order]
+                start = spooled['start'][order]
+
+                # First row of every distinct (account, start)
+                first = np.ones(len(order), dtype=bool)
+                first[1:] = (codes[1:] != codes[:-1]) | (start[1:] != start[:-1])
+                groups = np.flatnonzero(first)
+                start[groups].tofile(outputs['start'])
+                for name in ('import_kwh', 'export_kwh'):
+                    np.maximum.reduceat(spooled[name][order], groups).tofile(outputs[name])
+                accounts.extend(bucket_accounts)
+                counts.append(np.bincount(codes[groups], minlength=len(bucket_accounts)))
+        finally:
+            for f in outputs.values():
+                f.close()
+
+        offsets = np.concatenate([[0], np.cumsum(np.concatenate(counts))]) if counts else np.zeros(1)
+        index = {'format': STORE_FORMAT, 'rows': int(offsets[-1]), 'accounts': accounts,
+                 'offsets': offsets.astype(np.int64).tolist()}
+        with open(os.path.join(self.path, 'index.json'), 'w') as f:
+            json.dump(index, f)
+        logger.info(f"Wrote interval store {self.path}: {len(accounts)} accounts, {index['rows']} intervals "
+                    f"({self.rows - index['rows']} duplicate readings merged)")
+        return IntervalStore.open(self.path)
+
+def _find_column(columns: List[str], *keywords: str, exclude: Tuple[str, ...] = ()) -> Optional[str]:
+    return next((col for col in columns
+                 if any(keyword in col for keyword in keywords)
+                 and not any(word in col for word in exclude)), None)
+
+def _csv_layout(columns: List[str]) -> Dict[str, Optional[str]]:
+    """Map normalized Green Button CSV headers to the fields the store needs."""
+    layout = {
+        'account': _find_column(columns, 'account', 'meter', 'service id', 'service agreement'),
+        'date': next((col for col in columns if col == 'date'), None),
+        'time': _find_column(columns, 'start time'),
+        'start': _find_column(columns, 'start', 'timestamp', 'datetime', 'date', exclude=('end',)),
+        'import': _find_column(columns, 'import', 'usage', 'consumption', 'delivered', exclude=('net',)),
+        'export': _find_column(columns, 'export', 'generation', 'received'),
+        'net': _find_column(columns, 'net'),
+    }
+    if layout['import'] is None and layout['export'] is None and layout['net'] is None:
+        raise ValueError(f"No usage columns found in {columns}")
+    if layout['start'] is None:
+        raise ValueError(f"No interval start column found in {columns}")
+    return layout
+
+def _timestamp_format(text: pd.Series) -> Optional[str]:
+    """strptime format of the first parseable timestamp (None if it cannot be guessed)."""
+    sample = text.dropna()
+    sample = sample[sample != '']
+    return guess_datetime_format(sample.iloc[0]) if len(sample) else None
+
+def _parse_timestamps(text: pd.Series, fmt: Optional[str]) -> pd.Series:
+    """Parse with the file's format; rows that do not match it are parsed one by one."""
+    if fmt is None:
+        return pd.to_datetime(text, errors='coerce')
+    timestamps = pd.to_datetime(text, errors='coerce', format=fmt)
+    unmatched = timestamps.isna() & text.notna() & (text != '')
+    if unmatched.any():
+        timestamps[unmatched] = pd.to_datetime(text[unmatched], errors='coerce')
+    return timestamps
+
+def _kwh(values: pd.Series, column: str) -> np.ndarray:
+    values = pd.to_numeric(values.astype(str).str.replace(r'[,\s]', '', regex=True), errors='coerce')
+    scale = 0.001 if '(wh)' in column else 1.0
+    return values.fillna(0).to_numpy(dtype=np.float64) * scale
+
+def iter_green_button_csv(source, account: Optional[str] = None,
+                          chunksize: int = DEFAULT_CHUNK_ROWS) -> Iterator[IntervalChunk]:
+    """
+    Stream a Green Button CSV as IntervalChunks.
+
+    Accepts split date/start-time columns or a single start timestamp, and
+    separate import/export columns or one signed usage column (negative values
+    are exports). Files without an account column are attributed to
+    ``account`` (default: the account number in the file's preamble, else the
+    file name).
+
+    Args:
+        source: Path or file-like object
+        account: Account for files without an account column
+        chunksize: Rows parsed per chunk
+    """
+    skiprows, preamble_account = _csv_preamble(source)
+    if account is None:
+        account = preamble_account
+    if account is None and isinstance(source, str):
+        account = os.path.splitext(os.path.basename(source))[0]
+    layout = None
+    time_format = None
+    for chunk in pd.read_csv(source, chunksize=chunksize, dtype=str, skiprows=skiprows,
+                             skipinitialspace=True):
+        chunk.columns = [normalize_column_name(col) for col in chunk.columns]
+        if layout is None:
+            layout = _csv_layout(list(chunk.columns))
+        if layout['date'] and layout['time']:
+            text = chunk[layout['date']].str.strip() + ' ' + chunk[layout['time']].str.strip()
+        else:
+            text = chunk[layout['start']]
+        # Keep the wall-clock time of timestamps that carry a UTC offset
+        text = text.str.strip().str.replace(UTC_OFFSET, '', regex=True)
+        if time_format is None:
+            time_format = _timestamp_format(text)
+        timestamps = _parse_timestamps(text, time_format)
+        valid = timestamps.notna().to_numpy()
+
+        if layout['import'] or layout['export']:
+            imported = _kwh(chunk[layout['import']], layout['import']) if layout['import'] else 0.0
+            exported = _kwh(chunk[layout['export']], layout['export']) if layout['export'] else 0.0
+            if layout['export'] is None:
+                # A single usage column holds net flow: negative readings are exports
+                imported, exported = np.clip(imported, 0, None), np.clip(-imported, 0, None)
+        else:
+            net = _kwh(chunk[layout['net']], layout['net'])
+            imported, exported = np.clip(net, 0, None), np.clip(-net, 0, None)
+        imported = np.broadcast_to(imported, valid.shape)[valid]
+        exported = np.broadcast_to(exported, valid.shape)[valid]
+        accounts = (chunk[layout['account']].astype(str).str.strip().to_numpy()[valid]
+                    if layout['account'] else account)
+        yield IntervalChunk(accounts, to_local_seconds(timestamps[valid]),
+                            imported.astype(np.float32), exported.astype(np.float32))
+
+def _csv_preamble(source) -> Tuple[int, Optional[str]]:
+    """
+    Lines above the header row, and the account number they mention if any.
+
+    Utility downloads often start with a few "Label,value" lines of customer
+    details (name, address, account number) before the interval table.
+    """
+    if not isinstance(source, str):
+        return 0, None
+    account = None
+    with open(source, newline='') as f:
+        for number, line in enumerate(f):
+            if number >= 50:
+                break
+            fields = [field.strip() for field in line.split(',')]
+            header = [normalize_column_name(field) for field in fields]
+            if len(header) > 2 and any(col == 'date' or 'start' in col for col in header):
+                return number, account
+            if len(fields) >= 2 and 'account' in header[0] and fields[1]:
+                account = fields[1]
+    return 0, None
+
+def _links(entry: ET.Element) -> Dict[str, List[str]]:
+    """An entry's link hrefs by rel, in document order (an entry may have several 'related' links)."""
+    links: Dict[str, List[str]] = {}
+    for link in entry.findall(f'{ATOM_NS}link'):
+        links.setdefault(link.get('rel'), []).append(link.get('href') or '')
+    return links
+
+def _reading_type_link(links: Dict[str, List[str]]) -> str:
+    """The ReadingType among a MeterReading's related links (others point at its IntervalBlocks)."""
+    related = links.get('related', [])
+    return next((href.rstrip('/') for href in related if '/ReadingType/' in href), '')
+
+def _int(element: ET.Element, tag: str, default: int = 0) -> int:
+    child = element.find(f'{ESPI_NS}{tag}')
+    return int(child.text) if child is not None and child.text else default
+
+def iter_green_button_xml(source, account: Optional[str] = None) -> Iterator[IntervalChunk]:
+    """
+    Stream a Green Button (ESPI) XML feed as IntervalChunks.
+
+    Entries are parsed one at a time and dropped once read. Interval blocks
+    are linked to their ReadingType (flow direction and unit multiplier)
+    through their MeterReading; blocks that arrive before their ReadingType
+    is known are kept until the end of the feed. Timestamps are shifted to
+    local time with the feed's LocalTimeParameters, including US daylight
+    saving time when the feed has a DST offset.
+
+    Args:
+        source: Path or file-like object
+        account: Account name (default: the UsagePoint title, else its id)
+    """
+    reading_types: Dict[str, Tuple[int, float]] = {}
+    meter_readings: Dict[str, str] = {}
+    usage_points: Dict[str, str] = {}
+    pending: List[Tuple[str, np.ndarray, np.ndarray]] = []
+    tz = {'offset': 0, 'dst': 0}
+
+    def resolve(reading_href: str, starts: np.ndarray, values: np.ndarray) -> Optional[IntervalChunk]:
+        reading_type = reading_types.get(meter_readings.get(reading_href, ''))
+        if reading_type is None:
+            return None
+        flow, kwh_per_unit = reading_type
+        usage_point = reading_href.split('/MeterReading')[0]
+        name = account or usage_points.get(usage_point) or usage_point.rstrip('/').rsplit('/', 1)[-1]
+        local = starts + tz['offset']
+        if tz['dst']:
+            local = local + us_dst_mask(local) * tz['dst']
+        kwh = values * kwh_per_unit
+        if flow == FLOW_REVERSE:
+            imported, exported = np.zeros_like(kwh), kwh
+        elif flow == FLOW_NET:
+            imported, exported = np.clip(kwh, 0, None), np.clip(-kwh, 0, None)
+        else:
+            imported, exported = kwh, np.zeros_like(kwh)
+        return IntervalChunk(name, local, imported.astype(np.float32), exported.astype(np.float32))
+
+    context = ET.iterparse(source, events=('start', 'end'))
+    root = None
+    for event, element in context:
+        if root is None:
+            root = element
+        if event != 'end' or element.tag != f'{ATOM_NS}entry':
+            continue
+        links = _links(element)
+        href = links.get('self', [''])[0]
+        content = element.find(f'{ATOM_NS}content')
+        for body in (content if content is not None else []):
+            kind = body.tag.replace(ESPI_NS, '')
+            if kind == 'UsagePoint':
+                title = element.findtext(f'{ATOM_NS}title')
+                if title and title.strip():
+                    usage_points[href.rstrip('/')] = title.strip()
+            elif kind == 'MeterReading':
+                meter_readings[href.rstrip('/')] = _reading_type_link(links)
+            elif kind == 'ReadingType':
+                uom = _int(body, 'uom', UOM_WH)
+                if uom != UOM_WH:
+                    continue
+                reading_types[href.rstrip('/')] = (_int(body, 'flowDirection', FLOW_FORWARD),
+                                       10.0 ** _int(body, 'powerOfTenMultiplier') / 1000.0)
+            elif kind == 'LocalTimeParameters':
+                tz['offset'] = _int(body, 'tzOffset')
+                tz['dst'] = _int(body, 'dstOffset')
+            elif kind == 'IntervalBlock':
+                reading_href = links.get('up', [''])[0].rsplit('/IntervalBlock', 1)[0]
+                readings = body.findall(f'{ESPI_NS}IntervalReading')
+                starts = np.array([int(r.findtext(f'{ESPI_NS}timePeriod/{ESPI_NS}start')) for r in readings],
+                                  dtype=np.int64)
+                values = np.array([float(r.findtext(f'{ESPI_NS}value')) for r in readings], dtype=np.float64)
+                chunk = resolve(reading_href, starts, values)
+                if chunk is None:
+                    pending.append((reading_href, starts, values))
+                else:
+                    yield chunk
+        # Drop parsed entries so memory does not grow with the feed
+        root.clear()
+
+    for reading_href, starts, values in pending:
+        chunk = resolve(reading_href, starts, values)
+        if chunk is None:
+            logger.warning(f"Skipping {len(starts)} readings without an energy ReadingType ({reading_href})")
+        else:
+            yield chunk
+
+def iter_green_button(source: str, account: Optional[str] = None,
+                      chunksize: int = DEFAULT_CHUNK_ROWS) -> Iterator[IntervalChunk]:
+    """Stream a Green Button file, choosing the CSV or XML reader by extension."""
+    if source.lower().endswith('.xml'):
+        return iter_green_button_xml(source, account)
+    return iter_green_button_csv(source, account, chunksize)
+
+def ingest_green_button(sources: Iterable[str], store_path: str,
+                        chunksize: int = DEFAULT_CHUNK_ROWS) -> IntervalStore:
+    """
+    Build an IntervalStore from Green Button CSV/XML files.
+
+    Args:
+        sources: Green Button files (one or many accounts each)
+        store_path: Store directory (replaced if it exists)
+        chunksize: CSV rows parsed per chunk
+
+    Returns:
+        IntervalStore: The new store, opened memory-mapped
+    """
+    tmp_path = store_path.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    writer = IntervalStoreWriter(tmp_path)
+    for source in sources:
+        for chunk in iter_green_button(source, chunksize=chunksize):
+            writer.append(chunk)
+    writer.close()
+    # Swap the finished store in, so readers never see a half-written one: the
+    # old store is renamed aside (not deleted) first, so a crash between the
+    # two renames leaves it at '<store>.old', where IntervalStore.open finds it
+    old_path = store_path.rstrip(os.sep) + '.old'
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(store_path):
+        os.replace(store_path, old_path)
+    os.replace(tmp_path, store_path)
+    # Readers that still map the old files keep them until they close them
+    shutil.rmtree(old_path, ignore_errors=True)
+    return IntervalStore.open(store_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build an interval store from Green Button CSV/XML files.")
+    parser.add_argument('store', help="Store directory to write")
+    parser.add_argument('sources', nargs='+', help="Green Button CSV or XML files")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_ROWS, help="CSV rows per chunk")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    store = ingest_green_button(args.sources, args.store, args.chunksize)
+    logger.info(f"Ingested {store.rows} intervals for {len(store)} accounts "
+                f"in {time.perf_counter() - start:.2f}s")
+    return 0
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,243 @@
+"""
+Headless per-account bill reports.
+
+Renders each account's generation vs. consumption chart and its monthly vs.
+annual payment metrics to one PNG, PDF or HTML file per account, e.g. for
+mailing annual true-up summaries.
+
+Usage:
+    python -m src.data_processing.reports data/Monthly_Bills_for_Each_Account.csv -o reports/ --format pdf --workers 8
+
+Accounts are rendered in chunks by a process pool. The manager (and its
+account index and aggregate table) is loaded once in the parent; forked
+workers inherit it, and spawned workers load it from the columnar cache or
+SQLite database the parent already built. Pages are drawn on standalone
+figures (see ``utils.rendering``), so workers share no pyplot state.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import base64
+import html
+import logging
+import os
+import re
+import time
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+from src.data_processing.charts import REPORT_STYLE, draw_breakdown
+from src.data_processing.savings import (
+    BILL_COL, COST_COL, CREDIT_COL, SAVINGS_TOLERANCE, savings_metrics,
+)
+from src.utils.executors import InlineExecutor
+from src.utils.rendering import render_chart
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMATS = ('png', 'pdf', 'html')
+
+REPORT_MARGINS = {'left': 0.1, 'right': 0.97, 'top': 0.9, 'bottom': 0.04, 'hspace': 0.35}
+
+# Accounts rendered per pool task
+DEFAULT_CHUNK_ACCOUNTS = 200
+
+# Manager used by the rendering functions of this process (inherited by forked workers)
+_manager = None
+
+def account_metrics(display: pd.DataFrame, summary: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+    """
+    Totals and monthly vs. annual comparison of one account.
+
+    Args:
+        display: The account's display rows
+        summary: The account's precomputed aggregate row (totals are summed from ``display`` without it)
+
+    Returns:
+        dict: total_generation, total_consumption, monthly_bills_total, net_balance and difference
+    """
+    if summary is not None:
+        totals = {key: float(summary[key]) for key in ('total_generation', 'total_consumption', 'monthly_bills_total')}
+    else:
+        totals = {
+            'total_generation': float(pd.to_numeric(display[CREDIT_COL], errors='coerce').sum()),
+            'total_consumption': float(pd.to_numeric(display[COST_COL], errors='coerce').sum()),
+            'monthly_bills_total': float(pd.to_numeric(display[BILL_COL], errors='coerce').sum()),
+        }
+    totals.update(savings_metrics(totals['total_consumption'], totals['total_generation'],
+                                  totals['monthly_bills_total']))
+    return totals
+
+def metric_lines(metrics: Dict[str, float]) -> List[Tuple[str, str]]:
+    """(label, value) pairs shown in a report, in the account view's wording."""
+    net_balance, difference = metrics['net_balance'], metrics['difference']
+    if abs(difference) < SAVINGS_TOLERANCE:
+        comparison = "No significant difference between paying monthly or annually"
+    elif difference > 0:
+        comparison = f"Paying annually instead of monthly saves ${difference:.2f}"
+    else:
+        comparison = f"Paying monthly is ${abs(difference):.2f} less than paying annually"
+    return [
+        ("Total Generation Credits", f"${abs(metrics['total_generation']):.2f}"),
+        ("Total Consumption Costs", f"${metrics['total_consumption']:.2f}"),
+        ("Monthly Bills Total", f"${metrics['monthly_bills_total']:.2f}"),
+        ("If paid annually", f"${net_balance:.2f} ({'Credit' if net_balance <= 0 else 'Debit'})"),
+        ("Recommendation", comparison),
+    ]
+
+def draw_report(fig: Figure, display: pd.DataFrame, account_number: str, metrics: Dict[str, float]):
+    """One-page report: the breakdown chart above a metrics table."""
+    chart_ax, text_ax = fig.subplots(2, 1, gridspec_kw={'height_ratios': [3, 1]})
+    draw_breakdown(chart_ax, display, style=REPORT_STYLE)
+    fig.suptitle(f"Account {account_number}", fontsize=14)
+
+    text_ax.axis('off')
+    lines = metric_lines(metrics)
+    for row, (label, value) in enumerate(lines):
+        y = 1 - row / len(lines)
+        text_ax.text(0.02, y, label, fontsize=10, va='top', weight='bold')
+        text_ax.text(0.40, y, value, fontsize=10, va='top')
+    # Fixed margins: tight_layout would lay the figure out with an extra full draw
+    fig.subplots_adjust(**REPORT_MARGINS)
+
+def report_html(display: pd.DataFrame, account_number: str, metrics: Dict[str, float]) -> str:
+    """Self-contained HTML report with the chart embedded as a PNG."""
+    def build(fig):
+        draw_breakdown(fig.subplots(), display, style=REPORT_STYLE)
+        fig.subplots_adjust(left=0.1, right=0.97, top=0.92, bottom=0.2)
+
+    image = base64.b64encode(render_chart(build, (8, 4.5), 'png')).decode('ascii')
+    rows = "\n".join(f"<tr><th>{html.escape(label)}</th><td>{html.escape(value)}</td></tr>"
+                     for label, value in metric_lines(metrics))
+    title = html.escape(f"Account {account_number}")
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{title}</title></head>\n"
+            f"<body><h1>{title}</h1>\n"
+            f"<img src=\"data:image/png;base64,{image}\" alt=\"Generation vs. Consumption\">\n"
+            f"<table>\n{rows}\n</table>\n</body></html>\n")
+
+def render_report(display: pd.DataFrame, account_number: str, fmt: str = 'pdf',
+                  summary: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Render one account's report.
+
+    Args:
+        display: The account's display rows
+        account_number: Account shown in the title
+        fmt: 'png', 'pdf' or 'html'
+        summary: The account's precomputed aggregate row, if any
+
+    Returns:
+        bytes: The rendered file
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report format '{fmt}' (expected one of {', '.join(REPORT_FORMATS)})")
+    metrics = account_metrics(display, summary)
+    if fmt == 'html':
+        return report_html(display, account_number, metrics).encode('utf-8')
+    return render_chart(lambda fig: draw_report(fig, display, account_number, metrics), (8.5, 6.5), fmt)
+
+def report_filename(account_number: str, fmt: str) -> str:
+    """File name of an account's report (characters unsafe in paths are replaced)."""
+    return re.sub(r'[^\w.-]', '_', str(account_number)) + '.' + fmt
+
+def _init_worker(csv_path: str, loader):
+    """Load the manager in a spawned worker (forked workers already inherited it)."""
+    global _manager
+    if _manager is None:
+        _manager = loader(csv_path)
+
+def _render_chunk(accounts: List[str], fmt: str, output_dir: str) -> Tuple[int, List[Tuple[str, str]]]:
+    """Write the reports of one chunk of accounts (runs in a worker process)."""
+    written, failed = 0, []
+    for account in accounts:
+        try:
+            display = _manager.get_display_data(account)
+            if display is None or display.empty:
+                raise ValueError("no bill data")
+            data = render_report(display, account, fmt, _manager.get_account_summary(account))
+            with open(os.path.join(output_dir, report_filename(account, fmt)), 'wb') as f:
+                f.write(data)
+            written += 1
+        except Exception as e:
+            failed.append((account, str(e)))
+    return written, failed
+
+def run_reports(manager, csv_path: str, output_dir: str, fmt: str = 'pdf', workers: int = 0,
+                chunk_accounts: int = DEFAULT_CHUNK_ACCOUNTS, accounts: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Render a report for every account.
+
+    Args:
+        manager: Loaded BillDataManager or SQLiteBillDataManager
+        csv_path: The manager's CSV (spawned workers load their own manager from it)
+        output_dir: Directory for the report files
+        fmt: 'png', 'pdf' or 'html'
+        workers: Worker processes (0 renders in this process)
+        chunk_accounts: Accounts per pool task
+        accounts: Accounts to render (default: all)
+
+    Returns:
+        dict: accounts, failed, errors (first few), seconds and accounts_per_second
+    """
+    global _manager
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report format '{fmt}' (expected one of {', '.join(REPORT_FORMATS)})")
+    os.makedirs(output_dir, exist_ok=True)
+    accounts = list(manager.get_all_accounts() if accounts is None else accounts)
+    chunks = [accounts[first:first + chunk_accounts] for first in range(0, len(accounts), chunk_accounts)]
+
+    start = time.perf_counter()
+    _manager = manager
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(csv_path, type(manager)))
+    else:
+        executor = InlineExecutor()
+    written, failed = 0, []
+    try:
+        futures = [executor.submit(_render_chunk, chunk, fmt, output_dir) for chunk in chunks]
+        for future in as_completed(futures):
+            chunk_written, chunk_failed = future.result()
+            written += chunk_written
+            failed.extend(chunk_failed)
+            logger.debug(f"{written + len(failed)}/{len(accounts)} accounts rendered")
+    finally:
+        executor.shutdown(wait=True)
+        _manager = None
+    elapsed = time.perf_counter() - start
+
+    for account, error in failed[:10]:
+        logger.warning(f"Report for account {account} failed: {error}")
+    return {
+        'accounts': written,
+        'failed': len(failed),
+        'errors': failed[:10],
+        'seconds': round(elapsed, 3),
+        'accounts_per_second': round(written / elapsed, 1) if elapsed else None,
+    }
+
+def main(argv=None):
+    from src.data_processing.shared_data import configured_loader
+
+    parser = argparse.ArgumentParser(description="Render a bill report for every account.")
+    parser.add_argument('csv_path', help="Monthly bills CSV")
+    parser.add_argument('--output', '-o', required=True, help="Output directory")
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='pdf', help="Report file format")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes (0: inline)")
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK_ACCOUNTS, help="Accounts per pool task")
+    parser.add_argument('--accounts', nargs='*', default=None, help="Only these accounts")
+    args = parser.parse_args(argv)
+
+    # NEM_BILL_BACKEND selects the pandas or SQLite manager, as in the app
+    manager = configured_loader()(args.csv_path)
+    if not manager.load_stats:
+        return 1
+    stats = run_reports(manager, args.csv_path, args.output, args.format, args.workers, args.chunk, args.accounts)
+    logger.info(f"Rendered {stats['accounts']} {args.format} reports ({stats['failed']} failed) "
+                f"in {stats['seconds']}s ({stats['accounts_per_second']} accounts/s) -> {args.output}")
+    return 0 if not stats['failed'] else 1
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
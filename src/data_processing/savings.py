@@ -0,0 +1,92 @@
+"""
+Monthly vs. annual (true-up) payment comparison for every account at once.
+
+Usage:
+    python -m src.data_processing.savings data/Monthly_Bills_for_Each_Account.csv --top 20
+
+The per-account "If paid annually" view and the portfolio table share
+``savings_metrics``, so both report the same numbers for an account.
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Differences smaller than this are treated as "no significant difference"
+SAVINGS_TOLERANCE = 0.01
+
+COST_COL = 'Cost for Usage ($)'
+CREDIT_COL = 'Credit for Generation ($)'
+BILL_COL = 'Final Monthly Bill ($)'
+
+def savings_metrics(total_consumption, total_generation, monthly_bills_total):
+    """
+    Compare paying the monthly bills with settling once a year.
+
+    Works on scalars and on aligned Series/arrays alike.
+
+    Args:
+        total_consumption: Sum of the costs for usage
+        total_generation: Sum of the credits for generation
+        monthly_bills_total: Sum of the final monthly bills
+
+    Returns:
+        dict: net_balance (what would be paid annually) and difference
+            (monthly total minus net balance; positive means paying annually saves)
+    """
+    net_balance = total_consumption - total_generation
+    return {
+        'net_balance': net_balance,
+        'difference': monthly_bills_total - net_balance,
+    }
+
+def rank_savings(totals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add net_balance, difference and recommendation to per-account totals and rank them.
+
+    Args:
+        totals: One row per account with total_consumption, total_generation
+            and monthly_bills_total
+
+    Returns:
+        DataFrame: ``totals`` with the metrics added, largest savings first
+    """
+    totals = totals.copy()
+    metrics = savings_metrics(totals['total_consumption'], totals['total_generation'],
+                              totals['monthly_bills_total'])
+    totals['net_balance'] = metrics['net_balance']
+    totals['difference'] = metrics['difference']
+    totals['recommendation'] = np.select(
+        [totals['difference'] >= SAVINGS_TOLERANCE, totals['difference'] <= -SAVINGS_TOLERANCE],
+        ['annual', 'monthly'], default='either')
+    return totals.sort_values('difference', ascending=False, kind='stable').reset_index(drop=True)
+
+def main(argv=None):
+    from src.data_processing.csv_bill_loader import BillDataManager
+
+    parser = argparse.ArgumentParser(description="Rank accounts by savings from annual true-up.")
+    parser.add_argument('csv_path', help="Monthly bills CSV")
+    parser.add_argument('--top', type=int, default=20, help="Number of accounts to print")
+    parser.add_argument('--output', '-o', default=None, help="Write the full table to this CSV")
+    args = parser.parse_args(argv)
+
+    manager = BillDataManager()
+    if not manager.load_data(args.csv_path):
+        return 1
+    start = time.perf_counter()
+    table = manager.get_savings_table()
+    elapsed = time.perf_counter() - start
+    logger.info(f"Ranked {len(table)} accounts in {elapsed:.3f}s")
+
+    if args.output:
+        table.to_csv(args.output, index=False)
+    print(table.head(args.top).to_string(index=False))
+    return 0
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+"""
+Process-wide, read-only BillDataManager instances shared by all sessions.
+
+Streamlit runs every browser session in the same process, so one manager per
+data file is enough. Sessions lease the current manager for the duration of a
+script run; when the file changes, the next lease loads a new manager and
+swaps it in, while runs still holding the old one finish with it. A replaced
+manager is dropped once its last lease is released (and closed, for managers
+holding connections such as SQLiteBillDataManager), so memory scales with the
+data size rather than with the number of users.
+
+With an ``updater`` (see ``incremental.apply_file_changes``) a changed file
+is applied to the current manager as a delta instead of being loaded again,
+and ``file_watch`` can trigger that as soon as the file is written. Deltas
+the columnar cache does not have yet are written to it at exit.
+"""
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+import atexit
+import logging
+import os
+import threading
+import time
+
+from src.data_processing.csv_bill_loader import BillDataManager
+from src.data_processing.incremental import apply_file_changes, flush_cache
+from src.data_processing.sqlite_store import SQLiteBillDataManager
+
+logger = logging.getLogger(__name__)
+
+# How often (in seconds) a shared file is checked for changes
+DEFAULT_CHECK_INTERVAL = 1.0
+
+class _Entry:
+    """A loaded manager with the file signature it was loaded from and its lease count."""
+
+    def __init__(self, path: str, manager: BillDataManager, signature: Tuple[int, int], version: int):
+        self.path = path
+        self.manager = manager
+        self.signature = signature
+        self.version = version
+        self.refs = 0
+
+def _close(manager):
+    """Release what a dropped manager holds open (connections), if it has a ``close``."""
+    close = getattr(manager, 'close', None)
+    if close is not None:
+        close()
+
+class SharedBillData:
+    """
+    Registry of shared BillDataManagers keyed by CSV path.
+
+    Managers handed out here must be treated as read-only; per-session state
+    (such as the selected account) belongs in ``st.session_state``.
+    """
+
+    def __init__(self, loader: Callable[[str], BillDataManager] = BillDataManager,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL,
+                 updater: Optional[Callable[[BillDataManager, str], Optional[BillDataManager]]] = None):
+        self.loader = loader
+        self.check_interval = check_interval
+        # Builds an updated manager from the current one and the changed file (None: load from scratch)
+        self.updater = updater
+        self._lock = threading.Lock()
+        self._path_locks: Dict[str, threading.Lock] = {}
+        self._current: Dict[str, _Entry] = {}
+        self._checked_at: Dict[str, float] = {}
+        # Replaced entries that still have leases, keyed by id(manager)
+        self._retired: Dict[int, _Entry] = {}
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, path: str, entry: Optional[_Entry]) -> BillDataManager:
+        """Apply the file's changes to the current manager if possible, else load it from scratch."""
+        if entry is not None and self.updater is not None:
+            try:
+                manager = self.updater(entry.manager, path)
+            except Exception as e:
+                logger.warning(f"Incremental reload of {path} failed, loading it again: {e}")
+                manager = None
+            if manager is not None:
+                return manager
+        return self.loader(path)
+
+    def _current_entry(self, path: str, force: bool = False) -> _Entry:
+        """Return the entry for ``path``, loading or reloading it if the file changed."""
+        path = os.path.abspath(path)
+        with self._lock:
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+        # Loads happen under a per-path lock so concurrent sessions parse the file only once
+        with path_lock:
+            entry = self._current.get(path)
+            now = time.monotonic()
+            if not force and entry is not None and now - self._checked_at.get(path, 0.0) < self.check_interval:
+                return entry
+            self._checked_at[path] = now
+            signature = self._signature(path)
+            if entry is not None and entry.signature == signature:
+                return entry
+
+            manager = self._load(path, entry)
+            if entry is not None and manager is entry.manager:
+                # Nothing to apply yet (e.g. a line still being written)
+                entry.signature = signature
+                return entry
+            new_entry = _Entry(path, manager, signature, entry.version + 1 if entry else 1)
+            with self._lock:
+                self._current[path] = new_entry
+                leased = entry is not None and entry.refs > 0
+                if leased:
+                    self._retired[id(entry.manager)] = entry
+            if entry is not None and not leased:
+                _close(entry.manager)
+            logger.info(f"Loaded shared bill data {path} (version {new_entry.version})")
+            return new_entry
+
+    def acquire(self, path: str) -> BillDataManager:
+        """Lease the current manager for ``path``; pair with ``release``."""
+        entry = self._current_entry(path)
+        with self._lock:
+            entry.refs += 1
+        return entry.manager
+
+    def release(self, manager: BillDataManager):
+        """End a lease taken with ``acquire``."""
+        with self._lock:
+            entry = self._retired.get(id(manager))
+            if entry is None:
+                entry = next((e for e in self._current.values() if e.manager is manager), None)
+            if entry is None:
+                return
+            entry.refs = max(0, entry.refs - 1)
+            retired = entry.refs == 0 and self._retired.get(id(manager)) is entry
+            if retired:
+                del self._retired[id(manager)]
+        if retired:
+            _close(manager)
+
+    @contextmanager
+    def lease(self, path: str):
+        """Context manager around ``acquire``/``release``."""
+        manager = self.acquire(path)
+        try:
+            yield manager
+        finally:
+            self.release(manager)
+
+    def refresh(self, path: str) -> int:
+        """Check ``path`` now (ignoring ``check_interval``) and return the current version."""
+        return self._current_entry(path, force=True).version
+
+    def version(self, path: str) -> Optional[int]:
+        """Load counter of the current manager for ``path`` (None if never loaded)."""
+        entry = self._current.get(os.path.abspath(path))
+        return entry.version if entry else None
+
+    def managers(self) -> Dict[str, BillDataManager]:
+        """Current manager per path."""
+        with self._lock:
+            return {path: entry.manager for path, entry in self._current.items()}
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Current version and lease counts per path, plus retired managers still leased."""
+        with self._lock:
+            return {
+                path: {
+                    'version': entry.version,
+                    'refs': entry.refs,
+                    'retired': sum(1 for e in self._retired.values() if e.path == path),
+                }
+                for path, entry in self._current.items()
+            }
+
+def configured_loader() -> Callable[[str], BillDataManager]:
+    """Manager class for the backend selected with NEM_BILL_BACKEND ('pandas' or 'sqlite')."""
+    if os.getenv("NEM_BILL_BACKEND", "pandas").lower() == "sqlite":
+        return SQLiteBillDataManager
+    return BillDataManager
+
+@lru_cache(maxsize=1)
+def shared_bill_data() -> SharedBillData:
+    """Process-wide registry used by the app pages."""
+    loader = configured_loader()
+    # Deltas are applied to in-memory managers; the SQLite store is re-imported
+    updater = apply_file_changes if loader is BillDataManager else None
+    registry = SharedBillData(loader=loader, updater=updater)
+    if updater is not None:
+        atexit.register(flush_caches, registry)
+    return registry
+
+def flush_caches(registry: SharedBillData):
+    """Write deltas applied to the registry's managers to their columnar caches."""
+    for path, manager in registry.managers().items():
+        flush_cache(manager, path)
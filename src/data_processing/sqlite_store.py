@@ -0,0 +1,361 @@
+"""
+SQLite storage backend for monthly bill data.
+
+``SQLiteBillDataManager`` offers the same query API as ``BillDataManager``
+but keeps the bills in an on-disk SQLite database instead of a DataFrame.
+The CSV is bulk-imported once (streamed in chunks, so it never has to fit in
+memory) into a table indexed on account and billing month; afterwards the
+database is opened directly and every query reads only the rows it needs.
+
+Select it for the Yearly Bill Query page with ``NEM_BILL_BACKEND=sqlite``.
+"""
+from typing import Dict, List, Optional
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.data_processing.columnar_cache import DEFAULT_CACHE_DIRNAME, file_sha256
+from src.data_processing.csv_bill_loader import build_display_frame, resolve_display_schema
+from src.data_processing.ingest import (
+    DEFAULT_CHUNK_ROWS, find_account_column, find_month_column, iter_bill_chunks, peak_rss_mb,
+)
+from src.data_processing.aggregates import AGGREGATE_COLUMNS, SUM_COLUMNS, account_month_matrix
+from src.data_processing.savings import rank_savings, savings_metrics
+
+logger = logging.getLogger(__name__)
+
+# Bump when the table layout changes so existing databases are rebuilt
+SCHEMA_VERSION = "2"
+
+def database_path_for(csv_path: str, db_dir: Optional[str] = None) -> str:
+    """Path of the SQLite database for ``csv_path``."""
+    db_dir = db_dir or os.getenv("NEM_BILL_DB_DIR") or os.path.join(
+        os.path.dirname(os.path.abspath(csv_path)), DEFAULT_CACHE_DIRNAME)
+    return os.path.join(db_dir, os.path.basename(csv_path) + ".sqlite")
+
+def quote_identifier(name: str) -> str:
+    """Quote a column name for use in SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+def _sql_value(value):
+    """Convert a pandas/numpy cell to a value sqlite3 can bind."""
+    if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+def materialize_aggregates(conn: sqlite3.Connection, account_col: str, month_col: Optional[str],
+                           display_schema: Dict[str, str]) -> int:
+    """
+    (Re)compute the ``account_aggregates`` table.
+
+    Args:
+        conn: Writable connection
+        account_col, month_col: Source columns holding the account and billing month
+        display_schema: Display column -> source column mapping
+
+    Returns:
+        int: Number of aggregate rows written
+    """
+    account = quote_identifier(account_col)
+    sums = ", ".join(
+        f"TOTAL({quote_identifier(display_schema[display_col])}) AS {name}" if display_col in display_schema
+        else f"0.0 AS {name}"
+        for name, display_col in SUM_COLUMNS.items())
+    # Rows are stored in file order, so an account's highest row_id is its latest bill
+    latest = (f"(SELECT {quote_identifier(month_col)} FROM bills AS latest WHERE latest.{account} = bills.{account} "
+              f"ORDER BY row_id DESC LIMIT 1)" if month_col else "NULL")
+    select = (f"SELECT {account} AS account, COUNT(*) AS months, {sums}, {latest} AS last_bill_date "
+              f"FROM bills WHERE {account} IS NOT NULL")
+    columns = ", ".join(['account', *AGGREGATE_COLUMNS])
+    insert = f"INSERT INTO account_aggregates ({columns}) VALUES ({', '.join('?' for _ in range(len(AGGREGATE_COLUMNS) + 1))})"
+
+    conn.execute("DELETE FROM account_aggregates")
+    totals = pd.read_sql_query(select + f" GROUP BY {account}", conn)
+    # Same definition as the per-account view and the savings table
+    totals['net_balance'] = savings_metrics(totals['total_consumption'], totals['total_generation'],
+                                            totals['monthly_bills_total'])['net_balance']
+    records = totals[['account', *AGGREGATE_COLUMNS]].astype(object).itertuples(index=False, name=None)
+    conn.executemany(insert, ([_sql_value(v) for v in record] for record in records))
+    return len(totals)
+
+def import_csv(csv_path: str, db_path: str, chunksize: int = DEFAULT_CHUNK_ROWS) -> Dict[str, float]:
+    """
+    Bulk-import a bills CSV into a new SQLite database.
+
+    The database is written to a temporary file and moved into place when
+    complete, so readers never see a half-imported table.
+
+    Returns:
+        dict: rows, import_seconds and peak_rss_mb
+    """
+    start = time.perf_counter()
+    stat = os.stat(csv_path)
+    sha256 = file_sha256(csv_path)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(db_path), suffix='.tmp')
+    os.close(fd)
+    rows = 0
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            # Nothing to protect until the file is moved into place
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            columns = None
+            # SQLite stores every REAL as 8 bytes, so keep full precision
+            for chunk in iter_bill_chunks(csv_path, chunksize, downcast=False):
+                if columns is None:
+                    columns = list(chunk.columns)
+                    column_sql = ", ".join(quote_identifier(col) for col in columns)
+                    conn.execute(f"CREATE TABLE bills (row_id INTEGER PRIMARY KEY, {column_sql})")
+                    insert_sql = (f"INSERT INTO bills ({column_sql}) "
+                                  f"VALUES ({', '.join('?' for _ in columns)})")
+                records = chunk.astype(object).itertuples(index=False, name=None)
+                conn.executemany(insert_sql, ([_sql_value(v) for v in record] for record in records))
+                rows += len(chunk)
+            if columns is None:
+                raise ValueError(f"No columns found in {csv_path}")
+
+            account_col = find_account_column(columns)
+            month_col = find_month_column(columns)
+            if account_col:
+                conn.execute(f"CREATE INDEX idx_bills_account ON bills ({quote_identifier(account_col)})")
+            if month_col:
+                conn.execute(f"CREATE INDEX idx_bills_month ON bills ({quote_identifier(month_col)})")
+            conn.execute("CREATE TABLE account_aggregates (account TEXT PRIMARY KEY, months INTEGER, "
+                         + ", ".join(f"{name} REAL" for name in SUM_COLUMNS)
+                         + ", net_balance REAL, last_bill_date TEXT)")
+            if account_col:
+                materialize_aggregates(conn, account_col, month_col, resolve_display_schema(columns))
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ('schema_version', SCHEMA_VERSION),
+                ('source_mtime_ns', str(stat.st_mtime_ns)),
+                ('source_size', str(stat.st_size)),
+                ('source_sha256', sha256),
+                ('account_col', account_col or ''),
+                ('month_col', month_col or ''),
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    stats = {
+        'rows': rows,
+        'import_seconds': round(time.perf_counter() - start, 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    logger.info(f"Imported {rows} rows from {csv_path} into {db_path} in {stats['import_seconds']}s")
+    return stats
+
+def _read_meta(db_path: str) -> Dict[str, str]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return dict(conn.execute("SELECT key, value FROM meta"))
+    finally:
+        conn.close()
+
+def database_is_current(csv_path: str, db_path: str) -> bool:
+    """Check an imported database against the CSV's mtime/size, falling back to its hash."""
+    if not os.path.exists(db_path):
+        return False
+    try:
+        meta = _read_meta(db_path)
+    except sqlite3.Error:
+        return False
+    if meta.get('schema_version') != SCHEMA_VERSION:
+        return False
+    stat = os.stat(csv_path)
+    if meta.get('source_mtime_ns') == str(stat.st_mtime_ns) and meta.get('source_size') == str(stat.st_size):
+        return True
+    return meta.get('source_sha256') == file_sha256(csv_path)
+
+class SQLiteBillDataManager:
+    """
+    Bill data stored in SQLite, with the same query API as BillDataManager.
+
+    Each thread gets its own read-only connection, so one instance can be
+    shared by every Streamlit session; ``close`` closes all of them once the
+    instance is no longer used.
+    """
+
+    def __init__(self, csv_path=None, db_path=None):
+        """Initialize with an optional CSV path (imported on first use) or an existing database."""
+        self.db_path = db_path
+        self.account_col = None
+        self.month_col = None
+        self.columns: List[str] = []
+        self.display_schema: Dict[str, str] = {}
+        self.load_stats = {}
+        self._local = threading.local()
+        # Every thread's connection, so close() can reach them all
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._savings = None
+        if csv_path and os.path.exists(csv_path):
+            self.load_data(csv_path)
+        elif db_path and os.path.exists(db_path):
+            self._open()
+
+    def load_data(self, csv_path, db_path=None):
+        """Import ``csv_path`` unless an up-to-date database for it already exists."""
+        try:
+            start = time.perf_counter()
+            self.db_path = db_path or self.db_path or database_path_for(csv_path)
+            stats = {'source': 'sqlite'}
+            if not database_is_current(csv_path, self.db_path):
+                stats = {'source': 'csv', **import_csv(csv_path, self.db_path)}
+            self._open()
+            stats['load_seconds'] = round(time.perf_counter() - start, 4)
+            self.load_stats = stats
+            return True
+        except Exception as e:
+            st.error(f"Error loading bill data into SQLite: {e}")
+            return False
+
+    def _open(self):
+        self.close()
+        self._savings = None
+        meta = _read_meta(self.db_path)
+        self.account_col = meta.get('account_col') or None
+        self.month_col = meta.get('month_col') or None
+        cursor = self._connection().execute("SELECT * FROM bills LIMIT 0")
+        self.columns = [d[0] for d in cursor.description if d[0] != 'row_id']
+        self.display_schema = resolve_display_schema(self.columns)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Close the connections of every thread (a later query opens a new one)."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
+
+    def _query(self, sql: str, params=()) -> pd.DataFrame:
+        return pd.read_sql_query(sql, self._connection(), params=params)
+
+    def get_all_accounts(self):
+        """Return list of all account numbers."""
+        if not self.account_col:
+            return []
+        rows = self._connection().execute("SELECT account FROM account_aggregates ORDER BY account")
+        return [row[0] for row in rows]
+
+    def get_accounts_page(self, prefix='', after=None, limit=100):
+        """
+        Return up to ``limit`` sorted accounts starting with ``prefix``.
+
+        Pages are read from the aggregate table's primary key; pass the last
+        account of the previous page as ``after`` to get the next page.
+        """
+        if not self.account_col:
+            return []
+        account = 'account'
+        sql = f"SELECT {account} FROM account_aggregates WHERE {account} >= ?"
+        params = [prefix]
+        if prefix:
+            # Every string starting with prefix sorts below prefix + U+10FFFF
+            sql += f" AND {account} < ?"
+            params.append(prefix + '\U0010ffff')
+        if after is not None:
+            sql += f" AND {account} > ?"
+            params.append(str(after))
+        sql += f" ORDER BY {account} LIMIT ?"
+        params.append(limit)
+        return [row[0] for row in self._connection().execute(sql, params)]
+
+    def get_account_data(self, account_number):
+        """Get all bill data for a specific account, in file order."""
+        if not self.account_col:
+            return None
+        columns = ", ".join(quote_identifier(col) for col in self.columns)
+        data = self._query(f"SELECT {columns} FROM bills WHERE {quote_identifier(self.account_col)} = ? "
+                           f"ORDER BY row_id", (str(account_number),))
+        if data.empty:
+            return None
+        return data
+
+    def get_display_data(self, account_number):
+        """Get an account's bills projected onto DISPLAY_COLUMNS."""
+        account_data = self.get_account_data(account_number)
+        if account_data is None:
+            return None
+        return build_display_frame(account_data, self.display_schema)
+
+    def get_monthly_bills(self, account_number):
+        """Get monthly bill amounts for a specific account."""
+        return self.get_account_data(account_number)
+
+    def get_account_matrix(self, columns, accounts=None):
+        """
+        Display columns as (accounts x months) matrices (see ``aggregates.account_month_matrix``).
+
+        The bills are read in one pass ordered by account and file order.
+
+        Args:
+            columns: Display columns to lay out
+            accounts: Accounts to include (default: all, in sorted order)
+
+        Returns:
+            tuple: (accounts, column -> matrix, valid-cell matrix), or None without data
+        """
+        if not self.account_col:
+            return None
+        account_col = quote_identifier(self.account_col)
+        names = ", ".join(quote_identifier(col) for col in self.columns)
+        data = self._query(f"SELECT {names} FROM bills WHERE {account_col} IS NOT NULL "
+                           f"ORDER BY {account_col}, row_id")
+        keys = data[self.account_col].astype(str)
+        starts = np.flatnonzero(keys.ne(keys.shift()).to_numpy())
+        stops = np.append(starts[1:], len(keys))
+        offsets = dict(zip(keys.to_numpy()[starts], zip(starts, stops)))
+        accounts = [account for account in (list(offsets) if accounts is None else map(str, accounts))
+                    if account in offsets]
+        bounds = np.array([offsets[account] for account in accounts], dtype=np.int64).reshape(-1, 2)
+        display = build_display_frame(data, self.display_schema)
+        matrices, valid = account_month_matrix(display, bounds[:, 0], bounds[:, 1], columns)
+        return accounts, matrices, valid
+
+    def get_account_summary(self, account_number):
+        """Precomputed totals for an account (a row of the aggregate table), or None."""
+        if not self.account_col:
+            return None
+        summary = self._query("SELECT * FROM account_aggregates WHERE account = ?", (str(account_number),))
+        if summary.empty:
+            return None
+        return summary.iloc[0].drop('account').to_dict()
+
+    def get_aggregates(self):
+        """The whole per-account aggregate table, indexed by account."""
+        return self._query("SELECT * FROM account_aggregates ORDER BY account").set_index('account')
+
+    def get_savings_table(self):
+        """
+        Monthly vs. annual payment comparison for every account, largest savings first.
+
+        Ranked from the aggregate table, so no monthly rows are scanned.
+        """
+        if not self.account_col:
+            return None
+        if self._savings is None:
+            self._savings = rank_savings(self.get_aggregates().reset_index())
+        return self._savings
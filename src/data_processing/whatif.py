@@ -0,0 +1,259 @@
+"""
+What-if tariff comparison for every account.
+
+Each account's monthly usage and generation are laid out as an
+(accounts x months) matrix and evaluated against every scenario of
+``config/tariff_scenarios.yaml`` (tariff x export credit x settlement) at
+once: scenario parameters are broadcast against the matrix, giving a
+(scenarios x accounts x months) array of net charges. Large portfolios are
+split into account chunks evaluated in a process pool (a few chunks in flight
+per worker, so pending results do not pile up in memory), and results are
+streamed to a Parquet file one chunk (row group) at a time.
+
+Both storage backends (``NEM_BILL_BACKEND``) provide the account matrix.
+
+Usage:
+    python -m src.data_processing.whatif data/Monthly_Bills_for_Each_Account.csv -o whatif.parquet --workers 4
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+import argparse
+import itertools
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.data_processing.aggregates import GENERATION_COL, USAGE_COL
+from src.data_processing.savings import BILL_COL, COST_COL
+from src.utils.executors import InlineExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCENARIOS_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'tariff_scenarios.yaml')
+
+# Accounts per evaluated chunk (and per Parquet row group)
+DEFAULT_CHUNK_ACCOUNTS = 20_000
+
+# Chunks submitted to the pool ahead of the one being yielded, per worker
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+RESULT_COLUMNS = ['account', 'scenario', 'tariff', 'export_credit', 'settlement',
+                  'annual_cost', 'current_cost', 'savings', 'best']
+
+class Scenario(NamedTuple):
+    """One tariff / export credit / settlement combination."""
+    name: str
+    tariff: str
+    export_credit: str
+    settlement: str
+    import_rate: float          # NaN: the account's own effective rate
+    monthly_fixed: float
+    export_retail: bool         # credit exports at the import rate less non_bypassable
+    non_bypassable: float
+    export_rate: float
+    annual: bool
+
+def load_scenarios(path: Optional[str] = None) -> List[Scenario]:
+    """Every scenario of the scenarios file (NEM_TARIFF_SCENARIOS or config/tariff_scenarios.yaml)."""
+    path = path or os.getenv("NEM_TARIFF_SCENARIOS") or DEFAULT_SCENARIOS_PATH
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    scenarios = []
+    for (tariff, t), (credit, c), settlement in itertools.product(
+            (config.get('tariffs') or {}).items(), (config.get('export_credits') or {}).items(),
+            config.get('settlements') or ['monthly', 'annual']):
+        if settlement not in ('monthly', 'annual'):
+            raise ValueError(f"Unknown settlement '{settlement}' in {path}")
+        rate = t.get('import_rate', 'own')
+        retail = c.get('rate') == 'retail'
+        scenarios.append(Scenario(
+            name=f"{tariff}/{credit}/{settlement}", tariff=tariff, export_credit=credit, settlement=settlement,
+            import_rate=np.nan if rate == 'own' else float(rate),
+            monthly_fixed=float(t.get('monthly_fixed', 0.0)),
+            export_retail=retail, non_bypassable=float(c.get('non_bypassable', 0.0)),
+            export_rate=0.0 if retail else float(c.get('rate', 0.0)),
+            annual=settlement == 'annual'))
+    return scenarios
+
+def effective_rates(cost: np.ndarray, usage: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """
+    Each account-month's own $/kWh (cost for usage / usage).
+
+    Months without usage fall back to the account's overall rate, and
+    accounts without any usage to the portfolio's.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        monthly = np.where(usage > 0, cost / usage, np.nan)
+        account = cost.sum(axis=1) / usage.sum(axis=1)
+        overall = cost.sum() / usage.sum() if usage.sum() > 0 else 0.0
+    account = np.where(np.isfinite(account), account, overall)
+    rates = np.where(np.isnan(monthly), account[:, None], monthly)
+    return np.where(valid, rates, 0.0)
+
+def evaluate_scenarios(usage: np.ndarray, generation: np.ndarray, own_rate: np.ndarray,
+                       valid: np.ndarray, scenarios: List[Scenario]) -> np.ndarray:
+    """
+    Annual cost of every account under every scenario.
+
+    Args:
+        usage, generation: (accounts x months) kWh imported and exported
+        own_rate: (accounts x months) effective $/kWh of each account's bills
+        valid: (accounts x months) cells that hold a bill
+        scenarios: Scenarios to evaluate
+
+    Returns:
+        ndarray: (scenarios x accounts) annual cost in $
+    """
+    field = lambda name: np.array([getattr(s, name) for s in scenarios], dtype=np.float64)[:, None, None]
+    import_rate = field('import_rate')
+    # (scenarios x accounts x months) rates, broadcast from per-scenario constants
+    rate = np.where(np.isnan(import_rate), own_rate[None], import_rate)
+    export = np.where(field('export_retail') > 0, rate - field('non_bypassable'), field('export_rate'))
+    net = np.where(valid[None], usage[None] * rate - generation[None] * np.maximum(export, 0.0), 0.0)
+
+    monthly = np.maximum(net, 0.0).sum(axis=2)
+    annual = np.maximum(net.sum(axis=2), 0.0)
+    fixed = field('monthly_fixed')[:, :, 0] * valid.sum(axis=1)[None]
+    return np.where(field('annual')[:, :, 0] > 0, annual, monthly) + fixed
+
+def _scenario_labels(values: List[str], scenario_codes: np.ndarray) -> pd.Categorical:
+    """A per-row categorical of one scenario attribute, categories in scenario order."""
+    categories = pd.Index(pd.unique(pd.Series(values, dtype=object)))
+    return pd.Categorical.from_codes(categories.get_indexer(values)[scenario_codes], categories=categories)
+
+def _evaluate_chunk(accounts: List[str], usage: np.ndarray, generation: np.ndarray, own_rate: np.ndarray,
+                    valid: np.ndarray, current_cost: np.ndarray, scenarios: List[Scenario]) -> pd.DataFrame:
+    """Evaluate one chunk of accounts into the long results table (runs in a worker process)."""
+    costs = evaluate_scenarios(usage, generation, own_rate, valid, scenarios)
+    n_scenarios, n_accounts = costs.shape
+    best = np.zeros_like(costs, dtype=bool)
+    if n_accounts:
+        best[costs.argmin(axis=0), np.arange(n_accounts)] = True
+    # Repeated labels as categoricals: cheap to build and pickle, dictionary-encoded in Parquet
+    account_codes = np.tile(np.arange(n_accounts), n_scenarios)
+    scenario_codes = np.repeat(np.arange(n_scenarios), n_accounts)
+    label = lambda name: _scenario_labels([getattr(s, name) for s in scenarios], scenario_codes)
+    table = pd.DataFrame({
+        'account': pd.Categorical.from_codes(account_codes, categories=pd.Index(accounts, dtype=object)),
+        'scenario': label('name'),
+        'tariff': label('tariff'),
+        'export_credit': label('export_credit'),
+        'settlement': label('settlement'),
+        'annual_cost': costs.ravel(),
+        'current_cost': np.tile(current_cost, n_scenarios),
+    })
+    table['savings'] = table['current_cost'] - table['annual_cost']
+    table['best'] = best.ravel()
+    return table
+
+def iter_whatif(manager, scenarios: List[Scenario], workers: int = 0,
+                chunk_accounts: int = DEFAULT_CHUNK_ACCOUNTS, accounts: Optional[List[str]] = None
+                ) -> Iterator[pd.DataFrame]:
+    """
+    Evaluate the accounts of a BillDataManager chunk by chunk.
+
+    Args:
+        manager: Loaded BillDataManager or SQLiteBillDataManager
+        scenarios: Scenarios to evaluate
+        workers: Worker processes (0 evaluates in this process; so does a single chunk)
+        chunk_accounts: Accounts per chunk
+        accounts: Accounts to evaluate (default: all)
+
+    Yields:
+        DataFrame: RESULT_COLUMNS for one chunk, in account order
+    """
+    layout = manager.get_account_matrix([USAGE_COL, GENERATION_COL, COST_COL, BILL_COL], accounts)
+    if layout is None:
+        return
+    accounts, matrices, valid = layout
+    usage, generation = matrices[USAGE_COL], matrices[GENERATION_COL]
+    own_rate = effective_rates(matrices[COST_COL], usage, valid)
+    current_cost = matrices[BILL_COL].sum(axis=1)
+
+    # A single chunk gains nothing from a pool but still pays for shipping it to a worker
+    pooled = workers > 0 and len(accounts) > chunk_accounts
+    executor = ProcessPoolExecutor(max_workers=workers) if pooled else InlineExecutor()
+    window = workers * CHUNKS_IN_FLIGHT_PER_WORKER if pooled else 1
+    submit = lambda first: executor.submit(
+        _evaluate_chunk, accounts[first:first + chunk_accounts],
+        usage[first:first + chunk_accounts], generation[first:first + chunk_accounts],
+        own_rate[first:first + chunk_accounts], valid[first:first + chunk_accounts],
+        current_cost[first:first + chunk_accounts], scenarios)
+    firsts = iter(range(0, len(accounts), chunk_accounts))
+    futures = deque()
+    try:
+        futures.extend(submit(first) for first in itertools.islice(firsts, window))
+        while futures:
+            table = futures.popleft().result()
+            # Top the window up before handing the result to the caller
+            first = next(firsts, None)
+            if first is not None:
+                futures.append(submit(first))
+            yield table
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+def run_whatif(manager, output_path: str, scenarios: Optional[List[Scenario]] = None, workers: int = 0,
+               chunk_accounts: int = DEFAULT_CHUNK_ACCOUNTS) -> Dict[str, Any]:
+    """
+    Evaluate every account against every scenario and write the results to Parquet.
+
+    Returns:
+        dict: accounts, scenarios, rows, seconds and accounts_per_second
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    scenarios = scenarios or load_scenarios()
+    start = time.perf_counter()
+    writer = None
+    accounts = rows = 0
+    try:
+        for table in iter_whatif(manager, scenarios, workers, chunk_accounts):
+            arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, arrow_table.schema)
+            writer.write_table(arrow_table)
+            accounts += len(table) // len(scenarios)
+            rows += len(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'accounts': accounts,
+        'scenarios': len(scenarios),
+        'rows': rows,
+        'seconds': round(elapsed, 3),
+        'accounts_per_second': round(accounts / elapsed, 1) if elapsed else None,
+    }
+
+def main(argv=None):
+    from src.data_processing.shared_data import configured_loader
+
+    parser = argparse.ArgumentParser(description="Compare every account under candidate tariffs and billing options.")
+    parser.add_argument('csv_path', help="Monthly bills CSV")
+    parser.add_argument('--output', '-o', required=True, help="Output .parquet file")
+    parser.add_argument('--scenarios', default=None, help="Scenarios YAML")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes (0: inline)")
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK_ACCOUNTS, help="Accounts per chunk")
+    args = parser.parse_args(argv)
+
+    manager = configured_loader()()
+    if not manager.load_data(args.csv_path):
+        return 1
+    stats = run_whatif(manager, args.output, load_scenarios(args.scenarios), args.workers, args.chunk)
+    logger.info(f"Evaluated {stats['accounts']} accounts x {stats['scenarios']} scenarios "
+                f"in {stats['seconds']}s ({stats['accounts_per_second']} accounts/s) -> {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
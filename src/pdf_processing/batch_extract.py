@@ -0,0 +1,371 @@
+"""
+Headless batch extraction of NEM bill PDFs.
+
+Usage:
+    python -m src.pdf_processing.batch_extract bills/ --output results.jsonl
+    python -m src.pdf_processing.batch_extract bills.zip --output results.parquet --workers 8
+
+PDF parsing is fanned out across CPU cores with a process pool. Bills the
+regex rules cannot fully resolve fall back to the LLM extractor through a
+bounded number of concurrent async calls. Results are streamed to JSONL or
+Parquet as they complete, and a checkpoint file records finished inputs so an
+interrupted run can be resumed.
+
+Every record carries the version of the parser rules that produced it. On
+resume, a finished file is only skipped if the rules for its utility have not
+changed since; editing one utility's rules re-extracts just that utility's bills.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import statistics
+import tarfile
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pdfplumber
+
+from src.pdf_processing.pdf_extractor import (
+    DEFAULT_MAX_LLM_CHARS, BillParser, extract_with_openai, stream_bill_text,
+)
+from src.pdf_processing.rule_registry import CompiledRules, current_rules
+from src.utils.executors import InlineExecutor
+
+logger = logging.getLogger(__name__)
+
+# Fields the rules-based parser must resolve before we skip the LLM fallback
+REQUIRED_FIELDS = [
+    ('account_info', 'account_number'),
+    ('billing_summary', 'billing_period'),
+    ('billing_summary', 'total_amount'),
+]
+
+PARQUET_BATCH_SIZE = 256
+
+
+def _inside(directory: str, member_name: str) -> bool:
+    """Check that an archive member extracts to a path under ``directory``."""
+    root = os.path.realpath(directory)
+    target = os.path.realpath(os.path.join(root, member_name))
+    return target.startswith(root + os.sep)
+
+
+def collect_pdf_paths(source: str, work_dir: str) -> List[Tuple[str, str]]:
+    """
+    Return ``(path, name)`` pairs for the PDF files in a directory or an archive.
+
+    Archives (.zip, .tar, .tar.gz, .tgz) are unpacked into ``work_dir`` first
+    so that worker processes can open members by path. ``name`` is the path
+    relative to the directory or archive and is what gets reported.
+    """
+    if os.path.isdir(source):
+        root = source
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            members = [m for m in archive.namelist() if m.lower().endswith('.pdf')]
+            archive.extractall(work_dir, members=members)
+        root = work_dir
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as archive:
+            members = [m for m in archive.getmembers()
+                       if m.isfile() and m.name.lower().endswith('.pdf') and _inside(work_dir, m.name)]
+            skipped = [m.name for m in archive.getmembers() if m.isfile() and not _inside(work_dir, m.name)]
+            if skipped:
+                logger.warning(f"Skipping {len(skipped)} archive member(s) outside the archive root: {skipped[:5]}")
+            # The 'data' filter also rejects links and device files (Python 3.11.4+)
+            extract_kwargs = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
+            archive.extractall(work_dir, members=members, **extract_kwargs)
+        root = work_dir
+    elif source.lower().endswith('.pdf') and os.path.isfile(source):
+        return [(source, os.path.basename(source))]
+    else:
+        raise ValueError(f"Input must be a directory, archive or PDF file: {source}")
+
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.lower().endswith('.pdf'):
+                path = os.path.join(dirpath, name)
+                paths.append((path, os.path.relpath(path, root)))
+    return sorted(paths)
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content, used as its checkpoint key."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def needs_llm_fallback(result: Dict[str, Any]) -> bool:
+    """Check whether the rules-based result is missing any required field."""
+    return any(not result.get(section, {}).get(field) for section, field in REQUIRED_FIELDS)
+
+
+def parse_pdf_file(path: str, name: Optional[str] = None, sha256: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse a single PDF with the rules-based BillParser.
+
+    Runs inside a worker process, so it only returns plain picklable data.
+    The page text is included only when the LLM fallback will need it.
+    """
+    start = time.perf_counter()
+    record = {'source': name or path, 'status': 'ok', 'error': None}
+    try:
+        record['sha256'] = sha256 or file_digest(path)
+        with pdfplumber.open(path) as pdf:
+            record['pages'] = len(pdf.pages)
+            result = BillParser().parse_bill(pdf)
+            record['utility'] = result.get('utility')
+            record['rule_version'] = result.get('rule_version')
+            if needs_llm_fallback(result):
+                record['text'], _, _ = stream_bill_text(pdf, {}, DEFAULT_MAX_LLM_CHARS)
+        record['result'] = result
+        record['method'] = 'rules'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+    record['parse_seconds'] = time.perf_counter() - start
+    return record
+
+
+class ResultWriter:
+    """Streams per-file records to a JSONL or Parquet file."""
+
+    def __init__(self, output_path: str, output_format: str):
+        self.output_format = output_format
+        self.output_path = output_path
+        self._rows = []
+        self._parquet_writer = None
+        if output_format == 'jsonl':
+            self._file = open(output_path, 'a', encoding='utf-8')
+        else:
+            # Parquet files cannot be appended to, so resumed runs write a new part
+            part = 0
+            while os.path.exists(self.output_path):
+                part += 1
+                stem, ext = os.path.splitext(output_path)
+                self.output_path = f"{stem}.part{part}{ext}"
+
+    def write(self, record: Dict[str, Any]):
+        if self.output_format == 'jsonl':
+            self._file.write(json.dumps(record, default=str) + "\n")
+            self._file.flush()
+            return
+
+        row = dict(record)
+        row['result'] = json.dumps(row.get('result'), default=str)
+        self._rows.append(row)
+        if len(self._rows) >= PARQUET_BATCH_SIZE:
+            self._flush_parquet()
+
+    def _flush_parquet(self):
+        if not self._rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ('source', pa.string()), ('sha256', pa.string()), ('status', pa.string()),
+            ('error', pa.string()), ('method', pa.string()), ('utility', pa.string()),
+            ('rule_version', pa.string()), ('pages', pa.int32()),
+            ('parse_seconds', pa.float64()), ('llm_seconds', pa.float64()),
+            ('total_seconds', pa.float64()), ('result', pa.string()),
+        ])
+        table = pa.Table.from_pylist([{c: row.get(c) for c in schema.names} for row in self._rows],
+                                     schema=schema)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+        self._parquet_writer.write_table(table)
+        self._rows = []
+
+    def close(self):
+        if self.output_format == 'jsonl':
+            self._file.close()
+        else:
+            self._flush_parquet()
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+
+
+class Checkpoint:
+    """
+    Append-only record of finished inputs so a batch run can be resumed.
+
+    Each line is ``sha256<TAB>utility<TAB>rule_version``. Lines holding only a
+    digest (older checkpoints) or no rule version count as finished
+    regardless of the current rules.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    fields = line.rstrip("\n").split("\t")
+                    if fields[0]:
+                        # Records written without a utility or rule version hold empty fields
+                        utility = (fields[1] if len(fields) > 2 else None) or None
+                        version = (fields[2] if len(fields) > 2 else None) or None
+                        self.done[fields[0]] = (utility, version)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def is_current(self, key: str, rules: CompiledRules) -> bool:
+        """Check whether ``key`` finished with the current rules for its utility."""
+        if key not in self.done:
+            return False
+        utility, version = self.done[key]
+        if not version:
+            return True
+        return rules.utility_versions.get(utility) == version
+
+    def mark(self, key: str, utility: Optional[str] = None, rule_version: Optional[str] = None):
+        self.done[key] = (utility, rule_version)
+        self._file.write(f"{key}\t{utility or ''}\t{rule_version or ''}\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def summarize_run(records: Iterable[Dict[str, Any]], elapsed: float, skipped: int = 0) -> Dict[str, Any]:
+    """Build the throughput summary for a batch run."""
+    records = list(records)
+    parse_times = sorted(r.get('parse_seconds', 0.0) for r in records)
+    summary = {
+        'files': len(records),
+        'skipped': skipped,
+        'ok': sum(1 for r in records if r['status'] == 'ok'),
+        'failed': sum(1 for r in records if r['status'] != 'ok'),
+        'llm_fallbacks': sum(1 for r in records if r.get('method') == 'llm'),
+        'elapsed_seconds': round(elapsed, 3),
+        'files_per_second': round(len(records) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    if parse_times:
+        summary['parse_p50_seconds'] = round(statistics.median(parse_times), 4)
+        summary['parse_p95_seconds'] = round(parse_times[min(len(parse_times) - 1, int(0.95 * len(parse_times)))], 4)
+    return summary
+
+
+async def _process_file(job, executor, llm_semaphore, use_llm) -> Dict[str, Any]:
+    """Parse one file in the pool and run the LLM fallback if it is needed."""
+    start = time.perf_counter()
+    record = await asyncio.wrap_future(executor.submit(parse_pdf_file, *job))
+    text = record.pop('text', None)
+
+    record['llm_seconds'] = 0.0
+    if use_llm and record['status'] == 'ok' and text:
+        async with llm_semaphore:
+            llm_start = time.perf_counter()
+            llm_result = await asyncio.to_thread(extract_with_openai, text)
+            record['llm_seconds'] = time.perf_counter() - llm_start
+        if 'error' not in llm_result:
+            record['result'] = llm_result
+            record['method'] = 'llm'
+
+    record['total_seconds'] = time.perf_counter() - start
+    return record
+
+
+async def run_batch_async(jobs: List[Tuple[str, str, str]], writer: ResultWriter, checkpoint: Checkpoint,
+                          workers: int, llm_concurrency: int, use_llm: bool) -> List[Dict[str, Any]]:
+    """Process ``(path, name, sha256)`` jobs concurrently, streaming each record to ``writer``."""
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else InlineExecutor()
+    llm_semaphore = asyncio.Semaphore(max(1, llm_concurrency))
+    records = []
+    try:
+        tasks = [asyncio.ensure_future(_process_file(job, executor, llm_semaphore, use_llm))
+                 for job in jobs]
+        for task in asyncio.as_completed(tasks):
+            record = await task
+            writer.write(record)
+            if record['status'] == 'ok':
+                checkpoint.mark(record['sha256'], record.get('utility'), record.get('rule_version'))
+            records.append(record)
+            logger.info(f"{record['status']:5} {record['total_seconds']:.3f}s {record['source']}")
+    finally:
+        executor.shutdown(wait=True)
+    return records
+
+
+def run_batch(source: str, output_path: str, output_format: Optional[str] = None,
+              workers: Optional[int] = None, llm_concurrency: int = 4, use_llm: bool = True,
+              checkpoint_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract every bill PDF under ``source`` and write the results to ``output_path``.
+
+    Args:
+        source: Directory, archive (.zip/.tar/.tar.gz) or single PDF
+        output_path: Destination JSONL or Parquet file
+        output_format: 'jsonl' or 'parquet' (inferred from the extension by default)
+        workers: Worker process count (defaults to the CPU count, 0 runs inline)
+        llm_concurrency: Maximum number of concurrent LLM fallback calls
+        use_llm: Whether to call the LLM for bills the rules cannot resolve
+        checkpoint_path: Checkpoint file (defaults to ``<output_path>.checkpoint``)
+
+    Returns:
+        dict: Throughput summary for the run
+    """
+    if output_format is None:
+        output_format = 'parquet' if output_path.endswith('.parquet') else 'jsonl'
+    if workers is None:
+        workers = os.cpu_count() or 1
+    checkpoint = Checkpoint(checkpoint_path or output_path + '.checkpoint')
+
+    work_dir = tempfile.mkdtemp(prefix='nem_batch_')
+    writer = None
+    try:
+        jobs = [(path, name, file_digest(path)) for path, name in collect_pdf_paths(source, work_dir)]
+        rules = current_rules()
+        pending = [job for job in jobs if not checkpoint.is_current(job[2], rules)]
+        skipped = len(jobs) - len(pending)
+        if skipped:
+            logger.info(f"Resuming: skipping {skipped} already processed file(s) "
+                        f"(parser rules {rules.version})")
+
+        writer = ResultWriter(output_path, output_format)
+        start = time.perf_counter()
+        records = asyncio.run(run_batch_async(pending, writer, checkpoint, workers,
+                                              llm_concurrency, use_llm))
+        summary = summarize_run(records, time.perf_counter() - start, skipped)
+    finally:
+        if writer is not None:
+            writer.close()
+        checkpoint.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    summary['output'] = writer.output_path
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-extract NEM bill PDFs.")
+    parser.add_argument('source', help="Directory, archive (.zip/.tar/.tar.gz) or PDF file")
+    parser.add_argument('--output', '-o', required=True, help="Output .jsonl or .parquet file")
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default=None)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count, 0 runs inline)")
+    parser.add_argument('--llm-concurrency', type=int, default=4,
+                        help="Maximum concurrent LLM fallback calls")
+    parser.add_argument('--no-llm', action='store_true', help="Disable the LLM fallback")
+    parser.add_argument('--checkpoint', default=None, help="Checkpoint file for resumable runs")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.source, args.output, args.format, args.workers,
+                        args.llm_concurrency, not args.no_llm, args.checkpoint)
+    print(json.dumps(summary, indent=2))
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,74 +1,71 @@
 import streamlit as st
 import pandas as pd
+from src.pdf_processing.bill_record import BillRecord
 
-def display_bill_data(bill_data: dict):
+def display_bill_data(bill_data):
     """
     Display the extracted bill data in a simple, readable format.
-    
+
     Args:
-        bill_data: The structured bill data from extract_bill_data
+        bill_data: A BillRecord, or the structured bill data from extract_bill_data
     """
-    if 'error' in bill_data:
-        st.error(f"Error processing bill: {bill_data['error']}")
-        return
-    
+    if isinstance(bill_data, dict):
+        if 'error' in bill_data:
+            st.error(f"Error processing bill: {bill_data['error']}")
+            return
+        bill_data = BillRecord.from_extraction(bill_data)
+
     # Display bill summary
     st.subheader("📋 Bill Summary")
-    summary = bill_data.get("bill_summary", {})
-    
+
     # Create two columns for summary display
     col1, col2 = st.columns(2)
-    
+
     with col1:
-        if "account_number" in summary:
-            st.metric("Account Number", summary["account_number"])
-        if "billing_period" in summary:
-            st.metric("Billing Period", summary["billing_period"])
-        if "previous_balance" in summary:
-            st.metric("Previous Balance", f"${summary['previous_balance']}")
-    
+        if bill_data.account_number is not None:
+            st.metric("Account Number", bill_data.account_number)
+        if bill_data.billing_period is not None:
+            st.metric("Billing Period", bill_data.billing_period)
+        if bill_data.previous_balance is not None:
+            st.metric("Previous Balance", f"${bill_data.previous_balance:,.2f}")
+
     with col2:
-        if "payment_received" in summary:
-            st.metric("Payment Received", f"${summary['payment_received']}")
-        if "current_charges" in summary:
-            st.metric("Current Charges", f"${summary['current_charges']}")
-        if "total_amount_due" in summary:
-            value = summary["total_amount_due"]
+        if bill_data.payment_received is not None:
+            st.metric("Payment Received", f"${bill_data.payment_received:,.2f}")
+        if bill_data.current_charges is not None:
+            st.metric("Current Charges", f"${bill_data.current_charges:,.2f}")
+        if bill_data.total_amount_due is not None:
             label = "Total Amount Due"
-            if value.startswith("-"):
+            if bill_data.is_credit:
                 label += " (Credit)"
-            st.metric(label, f"${value}")
-    
-    # Display note if present
-    if "note" in summary:
-        st.info(summary["note"])
-    
+            st.metric(label, f"${bill_data.total_amount_due:,.2f}")
+
+    # Display note for credit balances
+    if bill_data.is_credit:
+        st.info("Credit balance. No payment required.")
+
     # Display charges breakdown
     st.subheader("💰 Charges Breakdown")
-    charges = bill_data.get("charges_breakdown", [])
-    
-    if charges:
+
+    if bill_data.charges:
         # Create DataFrame for charges
         charge_data = []
-        for charge in charges:
-            charge_type = charge.get("charge_type", "Unknown")
-            amount = charge.get("amount", "0")
-            unit = charge.get("unit", "$")
-            
+        for charge in bill_data.charges:
             # Format the amount with the unit
-            if unit == "$" and not amount.endswith("kWh"):
-                formatted_amount = f"${amount}"
+            if charge.kwh is not None:
+                formatted_amount = f"{charge.kwh:,.0f} kWh"
+            elif charge.amount is not None:
+                formatted_amount = f"${charge.amount:,.2f}"
             else:
-                formatted_amount = f"{amount}"
-            
+                formatted_amount = "N/A"
+
             charge_data.append({
-                "Charge Type": charge_type,
+                "Charge Type": charge.charge_type,
                 "Amount": formatted_amount
             })
-        
-        if charge_data:
-            # Display as table
-            df = pd.DataFrame(charge_data)
-            st.table(df)
+
+        # Display as table
+        df = pd.DataFrame(charge_data)
+        st.table(df)
     else:
-        st.info("No detailed charges breakdown available in this bill.") 
\ No newline at end of file
+        st.info("No detailed charges breakdown available in this bill.")
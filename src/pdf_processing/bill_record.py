@@ -0,0 +1,207 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import re
+
+# Markers extractors use when a field could not be found
+MISSING_VALUES = {'', 'not found', 'n/a', 'na', 'none', 'null', 'unknown', 'error'}
+
+DATE_FORMATS = ['%B %d, %Y', '%b %d, %Y', '%b. %d, %Y', '%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d', '%B %d %Y', '%b %d %Y']
+
+_NUMBER = re.compile(r'-?\d[\d,]*\.?\d*|-?\.\d+')
+_PERIOD_SEPARATOR = re.compile(r'\s+(?:to|through|thru|-|–)\s+', re.IGNORECASE)
+# A date inside longer text (rules-based captures can run past the end of the line)
+_DATE_TOKEN = re.compile(r'[A-Za-z]{3,9}\.?\s+\d{1,2},?\s+\d{4}|\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2}')
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and value.strip().lower() in MISSING_VALUES)
+
+def parse_amount(value: Any) -> Optional[float]:
+    """
+    Parse a currency string such as '$1,234.56', '-$17.02', '($12.30)' or '12.30 CR'.
+
+    Returns None when the value is missing or not numeric.
+    """
+    if _is_missing(value):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    match = _NUMBER.search(text.replace('$', '').replace(' ', ''))
+    if not match:
+        return None
+    amount = float(match.group(0).replace(',', ''))
+    lowered = text.lower()
+    if amount > 0 and ((text.startswith('(') and text.endswith(')')) or lowered.endswith('cr')
+                       or lowered.startswith('-')):
+        amount = -amount
+    return amount
+
+def parse_kwh(value: Any) -> Optional[float]:
+    """Parse an energy quantity such as '500', '1,234 kWh' or 5."""
+    if _is_missing(value):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value).replace(' ', ''))
+    return float(match.group(0).replace(',', '')) if match else None
+
+def parse_date(value: Any) -> Optional[date]:
+    """
+    Parse a bill date such as 'February 15, 2023' or '02/15/2023'.
+
+    Text after the date (e.g. the next lines of the bill captured along with
+    it) is ignored.
+    """
+    if _is_missing(value):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    candidates = [text.split('\n', 1)[0]] + [match.group(0) for match in _DATE_TOKEN.finditer(text)]
+    for candidate in candidates:
+        candidate = " ".join(candidate.replace(',', ', ').split()).replace(' ,', ',')
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(candidate, fmt).date()
+            except ValueError:
+                continue
+    return None
+
+def parse_billing_period(value: Any) -> Tuple[Optional[date], Optional[date]]:
+    """Split a billing period such as 'January 1, 2023 to January 31, 2023' into dates."""
+    if _is_missing(value):
+        return None, None
+    parts = _PERIOD_SEPARATOR.split(str(value).strip(), maxsplit=1)
+    if len(parts) != 2:
+        return None, None
+    return parse_date(parts[0]), parse_date(parts[1])
+
+@dataclass(slots=True)
+class ChargeLine:
+    """A single line of a bill's charges breakdown."""
+    charge_type: str
+    amount: Optional[float] = None
+    kwh: Optional[float] = None
+
+    @classmethod
+    def from_raw(cls, charge_type: str, raw_amount: Any) -> 'ChargeLine':
+        """Build a line from an extracted amount, which may be dollars or kWh."""
+        if isinstance(raw_amount, str) and 'kwh' in raw_amount.lower():
+            return cls(charge_type, None, parse_kwh(raw_amount))
+        return cls(charge_type, parse_amount(raw_amount), None)
+
+@dataclass(slots=True)
+class BillRecord:
+    """
+    Typed bill data, parsed once at extraction time.
+
+    Amounts are floats in dollars (negative for credits), energy is in kWh and
+    dates are ``datetime.date``. Missing fields are None.
+    """
+    account_number: Optional[str] = None
+    billing_period: Optional[str] = None
+    period_start: Optional[date] = None
+    period_end: Optional[date] = None
+    due_date: Optional[date] = None
+    previous_balance: Optional[float] = None
+    payment_received: Optional[float] = None
+    credit_balance: Optional[float] = None
+    current_charges: Optional[float] = None
+    total_amount_due: Optional[float] = None
+    total_kwh: Optional[float] = None
+    nem_credits: Optional[float] = None
+    charges: List[ChargeLine] = field(default_factory=list)
+
+    @property
+    def is_credit(self) -> bool:
+        """True when the bill leaves the customer with a credit balance."""
+        return self.total_amount_due is not None and self.total_amount_due < 0
+
+    @property
+    def period_key(self) -> Optional[str]:
+        """Identifier of the billing period, used to deduplicate bills."""
+        if self.period_start is not None or self.period_end is not None:
+            return f"{self.period_start}/{self.period_end}"
+        return self.billing_period
+
+    @classmethod
+    def from_extraction(cls, data: Dict[str, Any]) -> 'BillRecord':
+        """
+        Build a record from the dict returned by any of the extractors.
+
+        Accepts the OpenAI shape (``bill_summary``/``charges_breakdown``), the
+        BillParser shape (``account_info``/``billing_summary``/``charges``) and
+        the ``summary`` shape used by the visualizer.
+        """
+        summary = {}
+        for section in ('account_info', 'billing_summary', 'energy_usage', 'summary', 'bill_summary'):
+            summary.update(data.get(section) or {})
+
+        charges = []
+        for charge in data.get('charges_breakdown') or []:
+            charges.append(ChargeLine.from_raw(charge.get('charge_type', 'Unknown'), charge.get('amount')))
+        for charge in (data.get('charges') or {}).get('breakdown') or []:
+            charges.append(ChargeLine.from_raw(charge.get('type', 'Unknown'), charge.get('amount')))
+
+        billing_period = summary.get('billing_period')
+        billing_period = None if _is_missing(billing_period) else str(billing_period).strip()
+        period_start, period_end = parse_billing_period(billing_period)
+        account_number = summary.get('account_number')
+        total_kwh = summary.get('total_kwh')
+        if total_kwh is None:
+            total_kwh = next((c.kwh for c in charges if c.kwh is not None), None)
+
+        return cls(
+            account_number=None if _is_missing(account_number) else str(account_number).strip(),
+            billing_period=billing_period,
+            period_start=period_start,
+            period_end=period_end,
+            due_date=parse_date(summary.get('due_date')),
+            previous_balance=parse_amount(summary.get('previous_balance')),
+            payment_received=parse_amount(summary.get('payment_received')),
+            credit_balance=parse_amount(summary.get('credit_balance')),
+            current_charges=parse_amount(summary.get('current_charges')),
+            total_amount_due=parse_amount(summary.get('total_amount_due', summary.get('total_amount'))),
+            total_kwh=parse_kwh(total_kwh),
+            nem_credits=parse_amount((data.get('nem_details') or {}).get('credits')),
+            charges=charges,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact, JSON-ready representation (dates as ISO strings, charges as lists)."""
+        return {
+            'account_number': self.account_number,
+            'billing_period': self.billing_period,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'period_end': self.period_end.isoformat() if self.period_end else None,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'previous_balance': self.previous_balance,
+            'payment_received': self.payment_received,
+            'credit_balance': self.credit_balance,
+            'current_charges': self.current_charges,
+            'total_amount_due': self.total_amount_due,
+            'total_kwh': self.total_kwh,
+            'nem_credits': self.nem_credits,
+            'charges': [[c.charge_type, c.amount, c.kwh] for c in self.charges],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BillRecord':
+        """Inverse of ``to_dict``; values are already typed so nothing is re-parsed."""
+        values = dict(data)
+        for key in ('period_start', 'period_end', 'due_date'):
+            if values.get(key):
+                values[key] = date.fromisoformat(values[key])
+        values['charges'] = [ChargeLine(*line) for line in values.get('charges') or []]
+        return cls(**values)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text: str) -> 'BillRecord':
+        return cls.from_dict(json.loads(text))
@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Callable, Dict, List, Tuple
+import logging
+
+from src.pdf_processing.bill_record import BillRecord
+from src.pdf_processing.pdf_extractor import extract_bill_data
+from src.utils.storage import spooled_upload, upload_fingerprint, UploadTooLargeError
+
+logger = logging.getLogger(__name__)
+
+# Account key used for bills whose account number could not be extracted
+UNKNOWN_ACCOUNT = "unknown"
+
+# Default number of bills extracted at the same time
+DEFAULT_EXTRACTION_WORKERS = 4
+
+def _sort_key(record: BillRecord):
+    return (record.period_start or record.period_end or date.max, record.billing_period or "")
+
+class BillTimeline:
+    """
+    Per-account, time-ordered store of BillRecords deduplicated by billing period.
+
+    Running totals for each account are updated as bills are added or replaced,
+    and every account carries a version number that changes only when its bills
+    change, so summaries and charts can be cached per account version.
+    """
+
+    def __init__(self):
+        self._bills: Dict[str, Dict[str, BillRecord]] = {}
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._versions: Dict[str, int] = {}
+
+    def add(self, record: BillRecord) -> bool:
+        """
+        Add a bill, replacing any existing bill for the same account and period.
+
+        Returns:
+            bool: True if the timeline changed
+        """
+        account = record.account_number or UNKNOWN_ACCOUNT
+        bills = self._bills.setdefault(account, {})
+        key = record.period_key
+        if key is None:
+            # Without a billing period only exact duplicates can be detected
+            if record in bills.values():
+                return False
+            key = f"unkeyed-{len(bills)}"
+        previous = bills.get(key)
+        if previous == record:
+            return False
+
+        totals = self._totals.setdefault(account, {'bills': 0, 'total_billed': 0.0, 'total_kwh': 0.0})
+        if previous is not None:
+            self._apply(totals, previous, -1)
+        self._apply(totals, record, 1)
+        bills[key] = record
+        self._versions[account] = self._versions.get(account, 0) + 1
+        return True
+
+    @staticmethod
+    def _apply(totals: Dict[str, float], record: BillRecord, sign: int):
+        totals['bills'] += sign
+        totals['total_billed'] += sign * (record.total_amount_due or 0.0)
+        totals['total_kwh'] += sign * (record.total_kwh or 0.0)
+
+    def accounts(self) -> List[str]:
+        """Accounts with at least one bill, sorted."""
+        return sorted(self._bills)
+
+    def version(self, account: str) -> int:
+        """Change counter for an account's bills."""
+        return self._versions.get(account, 0)
+
+    def bills(self, account: str) -> List[BillRecord]:
+        """Bills for an account in billing-period order."""
+        return sorted(self._bills.get(account, {}).values(), key=_sort_key)
+
+    def true_up_summary(self, account: str) -> Dict[str, Any]:
+        """
+        Summary of an account's bills so far, read from the running totals.
+
+        ``net_balance`` is the latest bill's amount due, which for NEM accounts
+        carries the accumulated charges and credits toward the true-up.
+        """
+        bills = self.bills(account)
+        totals = self._totals.get(account, {'bills': 0, 'total_billed': 0.0, 'total_kwh': 0.0})
+        latest = bills[-1] if bills else None
+        return {
+            'bills': totals['bills'],
+            'first_period': bills[0].billing_period if bills else None,
+            'last_period': latest.billing_period if latest else None,
+            'total_billed': round(totals['total_billed'], 2),
+            'total_kwh': round(totals['total_kwh'], 2),
+            'net_balance': latest.total_amount_due if latest else None,
+        }
+
+def extract_records(uploads: List[Any], extractor: Callable = extract_bill_data,
+                    max_workers: int = DEFAULT_EXTRACTION_WORKERS) -> List[Tuple[str, Any]]:
+    """
+    Extract several uploaded bills concurrently.
+
+    Each upload is spooled to disk and extracted in a worker thread; most of
+    the time is spent waiting on the OpenAI API, so threads overlap well.
+
+    Args:
+        uploads: Uploaded file objects
+        extractor: Extraction function taking a PDF path
+        max_workers: Maximum number of bills extracted at once
+
+    Returns:
+        list: (upload fingerprint, BillRecord or error dict) in upload order
+    """
+    def extract_one(upload):
+        try:
+            with spooled_upload(upload) as pdf_path:
+                data = extractor(pdf_path, streaming=True)
+        except UploadTooLargeError as e:
+            data = {"error": str(e), "message": "Please upload a smaller PDF."}
+        if 'error' in data:
+            logger.error(f"Failed to extract {getattr(upload, 'name', 'bill')}: {data['error']}")
+            return upload_fingerprint(upload), data
+        return upload_fingerprint(upload), BillRecord.from_extraction(data)
+
+    if not uploads:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(uploads)))) as executor:
+        return list(executor.map(extract_one, uploads))
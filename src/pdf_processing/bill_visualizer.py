@@ -1,154 +1,177 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import io
 import base64
+from src.pdf_processing.bill_record import BillRecord
+from src.utils.chart_cache import chart_cache, chart_key, data_version
+from src.utils.rendering import render_chart
+from src.utils.vega_charts import chart_renderer, charges_pie_spec, comparison_spec
 
-def visualize_bill_data(bill_data: dict):
+# Pixel density of the charges pie chart (what st.pyplot used)
+PIE_DPI = 200
+
+def _charges_pie(labels, amounts):
+    """PNG of the charges distribution pie chart."""
+    def build(fig):
+        ax = fig.subplots()
+        ax.pie(amounts, labels=labels, autopct='%1.1f%%', startangle=90)
+        ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
+        ax.set_title('Charges Distribution')
+    
+    return render_chart(build, (8, 6), 'png', dpi=PIE_DPI, bbox_inches='tight')
+
+def visualize_bill_data(bill_data):
     """
     Create visualizations for the extracted bill data.
     
     Args:
-        bill_data: The structured bill data from extract_bill_data
+        bill_data: A BillRecord, or the structured bill data from extract_bill_data
     """
-    if 'error' in bill_data:
-        st.error(f"Error processing bill: {bill_data['error']}")
-        return
+    if isinstance(bill_data, dict):
+        if 'error' in bill_data:
+            st.error(f"Error processing bill: {bill_data['error']}")
+            return
+        bill_data = BillRecord.from_extraction(bill_data)
     
     # Display bill summary
     st.subheader("📋 Bill Summary")
-    summary = bill_data.get('summary', {})
     
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("Account Number", summary.get('account_number', 'N/A'))
-        st.metric("Billing Period", summary.get('billing_period', 'N/A'))
-        st.metric("Due Date", summary.get('due_date', 'N/A'))
+        st.metric("Account Number", bill_data.account_number or 'N/A')
+        st.metric("Billing Period", bill_data.billing_period or 'N/A')
+        st.metric("Due Date", bill_data.due_date.strftime('%B %d, %Y') if bill_data.due_date else 'N/A')
     
     with col2:
-        st.metric("Total Amount Due", f"${summary.get('total_amount', 'N/A')}")
-        st.metric("Total kWh Used", summary.get('total_kwh', 'N/A'))
+        total = bill_data.total_amount_due
+        st.metric("Total Amount Due", f"${total:,.2f}" if total is not None else "$N/A")
+        st.metric("Total kWh Used", f"{bill_data.total_kwh:,.0f}" if bill_data.total_kwh is not None else 'N/A')
     
     # Display charges breakdown
     st.subheader("💰 Charges Breakdown")
-    charges = bill_data.get('charges', {}).get('breakdown', [])
+    charges = [c for c in bill_data.charges if c.kwh is None]
     
     if charges:
-        # Create DataFrame for charges
-        charge_data = []
-        for charge in charges:
-            charge_type = charge.get('type', 'Unknown')
-            amount = charge.get('amount', '0')
-            # Convert amount to float if possible
-            try:
-                amount = float(amount.replace(',', '')) if isinstance(amount, str) else float(amount)
-            except (ValueError, TypeError):
-                amount = 0
-            
-            charge_data.append({
-                'Charge Type': charge_type,
-                'Amount': amount
-            })
+        # Amounts were parsed to floats at extraction time
+        df = pd.DataFrame({
+            'Charge Type': [c.charge_type for c in charges],
+            'Amount': [c.amount or 0.0 for c in charges],
+        })
+        
+        # Display as table
+        st.dataframe(df)
         
-        if charge_data:
-            df = pd.DataFrame(charge_data)
-            
-            # Display as table
-            st.dataframe(df)
-            
-            # Create pie chart
-            fig, ax = plt.subplots(figsize=(8, 6))
-            ax.pie(df['Amount'], labels=df['Charge Type'], autopct='%1.1f%%', startangle=90)
-            ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
-            plt.title('Charges Distribution')
-            
-            # Display the chart
-            st.pyplot(fig)
+        labels, amounts = df['Charge Type'].tolist(), df['Amount'].tolist()
+        if chart_renderer() == 'vega':
+            st.vega_lite_chart(spec=charges_pie_spec(labels, amounts), use_container_width=True)
+        else:
+            # Pie chart, rendered once per bill's charges and reused on reruns
+            chart = chart_cache().get_or_render(
+                chart_key('charges_pie', bill_data.account_number, data_version(labels, amounts),
+                          ((8, 6), PIE_DPI, 'png')),
+                lambda: _charges_pie(labels, amounts))
+            st.image(chart, use_column_width=True)
     else:
         st.info("No detailed charges breakdown available in this bill.")
     
     # Display NEM details if available
-    nem_details = bill_data.get('nem_details', {})
-    if nem_details:
+    if bill_data.nem_credits is not None:
         st.subheader("⚡ NEM Details")
+        st.metric("Credits", f"{bill_data.nem_credits:,.2f}")
+
+def _period_label(bill: BillRecord) -> str:
+    """Short x-axis label for a bill's billing period."""
+    if bill.period_start is not None:
+        return bill.period_start.strftime('%b %Y')
+    if bill.billing_period:
+        return bill.billing_period.split('to')[0].strip().split(' ')[-1]
+    return 'Unknown'
+
+def _comparison_chart(months, amounts, usage, fmt='png'):
+    """Image bytes of the bill amount and energy usage chart."""
+    def build(fig):
+        ax1 = fig.subplots()
+        
+        # Plot amount bars
+        x = range(len(months))
+        ax1.bar(x, amounts, alpha=0.7, color='blue', label='Bill Amount ($)')
+        ax1.set_xlabel('Billing Period')
+        ax1.set_ylabel('Amount ($)', color='blue')
+        ax1.tick_params(axis='y', labelcolor='blue')
         
-        for key, value in nem_details.items():
-            st.metric(key.replace('_', ' ').title(), value)
+        # Create second y-axis for usage
+        ax2 = ax1.twinx()
+        ax2.plot(x, usage, 'r-', marker='o', linewidth=2, label='Energy Usage (kWh)')
+        ax2.set_ylabel('Energy Usage (kWh)', color='red')
+        ax2.tick_params(axis='y', labelcolor='red')
+        
+        # Set x-ticks to months
+        ax1.set_xticks(x, months)
+        
+        # Add title and legend
+        ax2.set_title('Monthly Bill Amount and Energy Usage')
+        
+        # Add legends
+        lines1, labels1 = ax1.get_legend_handles_labels()
+        lines2, labels2 = ax2.get_legend_handles_labels()
+        ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
+    
+    return render_chart(build, (10, 6), fmt)
+
+def _comparison_series(bills_data: list):
+    """Account, period labels, amounts and usage plotted by the comparison chart."""
+    bills = [b if isinstance(b, BillRecord) else BillRecord.from_extraction(b) for b in bills_data]
+    
+    # Amounts and usage are already numeric on the records
+    months = [_period_label(b) for b in bills]
+    amounts = [b.total_amount_due or 0.0 for b in bills]
+    usage = [b.total_kwh or 0.0 for b in bills]
+    account = next((b.account_number for b in bills if b.account_number), '')
+    return account, months, amounts, usage
 
-def get_monthly_comparison_chart(bills_data: list):
+def get_monthly_comparison_chart(bills_data: list, fmt: str = 'png'):
     """
     Create a comparison chart for multiple bills.
     
+    The rendered image is cached by account and plotted values, so it is only
+    drawn again when the bills change.
+    
     Args:
-        bills_data: List of bill data dictionaries
+        bills_data: List of BillRecords or bill data dictionaries
+        fmt: Image format, 'png' or 'svg'
         
     Returns:
         HTML string with the embedded chart
     """
-    # Extract relevant data from each bill
-    months = []
-    amounts = []
-    usage = []
-    
-    for bill in bills_data:
-        summary = bill.get('summary', {})
-        billing_period = summary.get('billing_period', '')
-        
-        # Extract month from billing period
-        month = billing_period.split('to')[0].strip().split(' ')[-1] if billing_period else 'Unknown'
-        months.append(month)
-        
-        # Get amount and usage
-        amount = summary.get('total_amount', '0')
-        try:
-            amount = float(amount.replace(',', '')) if isinstance(amount, str) else float(amount)
-        except (ValueError, TypeError):
-            amount = 0
-        amounts.append(amount)
-        
-        kwh = summary.get('total_kwh', '0')
-        try:
-            kwh = float(kwh.replace(',', '')) if isinstance(kwh, str) else float(kwh)
-        except (ValueError, TypeError):
-            kwh = 0
-        usage.append(kwh)
-    
-    # Create the chart
-    fig, ax1 = plt.subplots(figsize=(10, 6))
-    
-    # Plot amount bars
-    x = range(len(months))
-    ax1.bar(x, amounts, alpha=0.7, color='blue', label='Bill Amount ($)')
-    ax1.set_xlabel('Billing Period')
-    ax1.set_ylabel('Amount ($)', color='blue')
-    ax1.tick_params(axis='y', labelcolor='blue')
-    
-    # Create second y-axis for usage
-    ax2 = ax1.twinx()
-    ax2.plot(x, usage, 'r-', marker='o', linewidth=2, label='Energy Usage (kWh)')
-    ax2.set_ylabel('Energy Usage (kWh)', color='red')
-    ax2.tick_params(axis='y', labelcolor='red')
-    
-    # Set x-ticks to months
-    plt.xticks(x, months)
-    
-    # Add title and legend
-    plt.title('Monthly Bill Amount and Energy Usage')
-    
-    # Add legends
-    lines1, labels1 = ax1.get_legend_handles_labels()
-    lines2, labels2 = ax2.get_legend_handles_labels()
-    ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
-    
-    # Save to a bytes buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    buf.seek(0)
+    account, months, amounts, usage = _comparison_series(bills_data)
+    chart = chart_cache().get_or_render(
+        chart_key('monthly_comparison', account, data_version(months, amounts, usage), ((10, 6), 100, fmt)),
+        lambda: _comparison_chart(months, amounts, usage, fmt))
     
     # Encode the image to base64
-    img_str = base64.b64encode(buf.read()).decode()
+    img_str = base64.b64encode(chart).decode()
+    mime = 'image/svg+xml' if fmt == 'svg' else 'image/png'
     
     # Create HTML with the embedded image
-    html = f'<img src="data:image/png;base64,{img_str}" width="100%">'
+    html = f'<img src="data:{mime};base64,{img_str}" width="100%">'
+    
+    return html
+
+def get_monthly_comparison_spec(bills_data: list):
+    """
+    Vega-Lite spec of the comparison chart, drawn in the browser.
     
-    return html 
\ No newline at end of file
+    Args:
+        bills_data: List of BillRecords or bill data dictionaries
+        
+    Returns:
+        dict: Spec for ``st.vega_lite_chart``
+    """
+    _, months, amounts, usage = _comparison_series(bills_data)
+    return comparison_spec(months, amounts, usage)
+
+def display_monthly_comparison_chart(bills_data: list):
+    """Show the comparison chart with the renderer selected by NEM_CHART_RENDERER."""
+    if chart_renderer() == 'vega':
+        st.vega_lite_chart(spec=get_monthly_comparison_spec(bills_data), use_container_width=True)
+    else:
+        st.markdown(get_monthly_comparison_chart(bills_data), unsafe_allow_html=True)
@@ -2,9 +2,10 @@ import pdfplumber
 import re
 import openai
 import os
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Pattern, Tuple, Union
 import logging
 import json
+from src.pdf_processing.parser_rules import ParserRuleSet
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,22 +14,19 @@ logger = logging.getLogger(__name__)
 class BillParser:
     """Parser for energy bills in PDF format."""
     
-    def __init__(self):
-        # Patterns to extract different types of information
-        self.patterns = {
-            'account_number': r'Account\s*Number[:\s]*([A-Za-z0-9-]+)',
-            'billing_period': r'Billing\s*Period[:\s]*([A-Za-z0-9,\s]+to[A-Za-z0-9,\s]+)',
-            'total_amount': r'Total\s*Amount\s*Due[:\s]*\$?([0-9,.]+)',
-            'due_date': r'Due\s*Date[:\s]*([A-Za-z0-9,\s]+)',
-            'energy_usage': r'Total\s*kWh\s*Used[:\s]*([0-9,.]+)',
-            'generation_charges': r'Generation\s*Charges[:\s]*\$?([0-9,.]+)',
-            'delivery_charges': r'Delivery\s*Charges[:\s]*\$?([0-9,.]+)',
-            'nem_credits': r'NEM\s*Credits[:\s]*\$?([0-9,.]+)',
-        }
+    def __init__(self, utility: Optional[str] = None):
+        # Utility whose rules to use; detected from each bill's first page when None
+        self.utility = utility
+        
+        # Patterns to extract different types of information (generic rules from the registry)
+        self.patterns = ParserRuleSet('generic').patterns
     
-    def extract_pattern(self, text: str, pattern: str) -> Optional[str]:
-        """Extract information using regex pattern."""
-        match = re.search(pattern, text, re.IGNORECASE)
+    def extract_pattern(self, text: str, pattern: Union[str, Pattern]) -> Optional[str]:
+        """Extract information using a regex pattern string or a pre-compiled pattern."""
+        if isinstance(pattern, str):
+            match = re.search(pattern, text, re.IGNORECASE)
+        else:
+            match = pattern.search(text)
         if match:
             return match.group(1).strip()
         return None
@@ -82,27 +80,40 @@ class BillParser:
         
         # Extract text from all pages
         full_text = ""
+        first_page_text = None
         for page in pdf.pages:
             page_text = page.extract_text()
+            if first_page_text is None:
+                first_page_text = page_text or ""
             if page_text:
                 full_text += page_text + "\n"
         
+        # Dispatch to the utility's rule set, detected from the first page header
+        if self.utility is None:
+            rules = ParserRuleSet.for_bill(first_page_text or "")
+        else:
+            rules = ParserRuleSet(self.utility)
+        patterns = rules.compiled_patterns
+        result['utility'] = rules.utility_name
+        result['utility_confidence'] = rules.confidence
+        result['rule_version'] = rules.version
+        
         # Extract basic information using patterns
-        result['account_info']['account_number'] = self.extract_pattern(full_text, self.patterns['account_number'])
-        result['billing_summary']['billing_period'] = self.extract_pattern(full_text, self.patterns['billing_period'])
-        result['billing_summary']['total_amount'] = self.extract_pattern(full_text, self.patterns['total_amount'])
-        result['billing_summary']['due_date'] = self.extract_pattern(full_text, self.patterns['due_date'])
-        result['energy_usage']['total_kwh'] = self.extract_pattern(full_text, self.patterns['energy_usage'])
+        result['account_info']['account_number'] = self.extract_pattern(full_text, patterns['account_number'])
+        result['billing_summary']['billing_period'] = self.extract_pattern(full_text, patterns['billing_period'])
+        result['billing_summary']['total_amount'] = self.extract_pattern(full_text, patterns['total_amount'])
+        result['billing_summary']['due_date'] = self.extract_pattern(full_text, patterns['due_date'])
+        result['energy_usage']['total_kwh'] = self.extract_pattern(full_text, patterns['energy_usage'])
         
         # Extract charges
-        generation = self.extract_pattern(full_text, self.patterns['generation_charges'])
+        generation = self.extract_pattern(full_text, patterns['generation_charges'])
         if generation:
             result['charges']['breakdown'].append({
                 'type': 'Generation Charges',
                 'amount': generation
             })
             
-        delivery = self.extract_pattern(full_text, self.patterns['delivery_charges'])
+        delivery = self.extract_pattern(full_text, patterns['delivery_charges'])
         if delivery:
             result['charges']['breakdown'].append({
                 'type': 'Delivery Charges',
@@ -110,7 +121,7 @@ class BillParser:
             })
         
         # Extract NEM credits
-        nem_credits = self.extract_pattern(full_text, self.patterns['nem_credits'])
+        nem_credits = self.extract_pattern(full_text, patterns['nem_credits'])
         if nem_credits:
             result['nem_details']['credits'] = nem_credits
         
@@ -147,18 +158,134 @@ class BillParser:
             
         return charges
 
-def extract_bill_data(file) -> dict:
+# Summary fields the streaming mode looks for before it stops reading pages
+STREAMING_TARGET_FIELDS = [
+    'account_number', 'billing_period', 'total_amount', 'due_date',
+    'energy_usage', 'generation_charges', 'delivery_charges', 'nem_credits',
+]
+
+# bill_summary keys the streamed summary fields fill in when the LLM leaves them empty
+STREAMING_SUMMARY_KEYS = {
+    'account_number': 'account_number',
+    'billing_period': 'billing_period',
+    'total_amount': 'total_amount_due',
+    'due_date': 'due_date',
+    'energy_usage': 'total_kwh',
+}
+
+# charges_breakdown lines built from the streamed charge fields when the LLM returns none
+STREAMING_CHARGE_TYPES = {
+    'generation_charges': 'Generation Charges',
+    'delivery_charges': 'Delivery Charges',
+}
+
+# Upper bound on the amount of bill text forwarded to the LLM in streaming mode
+DEFAULT_MAX_LLM_CHARS = 12000
+
+def stream_bill_text(pdf, patterns: Dict[str, Union[str, Pattern]],
+                     max_chars: Optional[int] = DEFAULT_MAX_LLM_CHARS) -> Tuple[str, Dict[str, str], int]:
+    """
+    Read the pages of a bill lazily until every target field has been found.
+    
+    Each page is matched against the patterns that are still unresolved as soon
+    as its text is extracted. Reading stops once all patterns have matched or
+    ``max_chars`` of text have been collected, so appendices at the end of long
+    statements are never parsed. With no patterns, pages are read until the
+    text cap is reached.
+    
+    Args:
+        pdf: An open pdfplumber PDF
+        patterns: Mapping of field name to regex (string or compiled) with one capture group
+        max_chars: Cap on the returned text (None for no cap)
+        
+    Returns:
+        tuple: (text read so far, resolved field values, number of pages read)
+    """
+    unresolved = {field: re.compile(pattern, re.IGNORECASE) if isinstance(pattern, str) else pattern
+                  for field, pattern in patterns.items()}
+    found = {}
+    parts = []
+    total_chars = 0
+    pages_read = 0
+    
+    for page in pdf.pages:
+        page_text = page.extract_text()
+        pages_read += 1
+        # Drop the parsed page objects (images, chars) once the text is out
+        if hasattr(page, "flush_cache"):
+            page.flush_cache()
+        if not page_text:
+            continue
+        
+        for field, regex in list(unresolved.items()):
+            match = regex.search(page_text)
+            if match:
+                found[field] = match.group(1).strip()
+                del unresolved[field]
+        
+        parts.append(page_text)
+        total_chars += len(page_text) + 1
+        if (patterns and not unresolved) or (max_chars and total_chars >= max_chars):
+            break
+    
+    text = "\n".join(parts)
+    if max_chars:
+        text = text[:max_chars]
+    return text, found, pages_read
+
+def merge_streamed_fields(result: dict, found: Dict[str, str]) -> dict:
+    """
+    Fill fields the LLM left empty with the values found while streaming.
+    
+    Summary fields go to ``bill_summary``, the generation and delivery
+    charges become ``charges_breakdown`` lines when the LLM returned no
+    charges, and NEM credits go to ``nem_details``.
+    
+    Args:
+        result: Structured bill data returned by ``extract_with_openai``
+        found: Field values resolved by ``stream_bill_text``
+        
+    Returns:
+        dict: ``result``, updated in place (error results are returned unchanged)
+    """
+    if "error" in result:
+        return result
+    summary = result.setdefault("bill_summary", {})
+    for field, key in STREAMING_SUMMARY_KEYS.items():
+        if field in found and summary.get(key) in (None, ""):
+            summary[key] = found[field]
+    if not result.get("charges_breakdown"):
+        result["charges_breakdown"] = [{"charge_type": charge_type, "amount": found[field]}
+                                       for field, charge_type in STREAMING_CHARGE_TYPES.items() if field in found]
+    if "nem_credits" in found:
+        nem_details = result.setdefault("nem_details", {})
+        if nem_details.get("credits") in (None, ""):
+            nem_details["credits"] = found["nem_credits"]
+    return result
+
+def extract_bill_data(file, streaming: bool = False, max_llm_chars: Optional[int] = DEFAULT_MAX_LLM_CHARS) -> dict:
     """
     Extract charge information from an energy bill PDF using OpenAI.
     
     Args:
-        file: A file-like object containing the PDF data
+        file: A path or file-like object containing the PDF data
+        streaming: Read pages lazily and stop once the summary fields are found;
+            the fields found fill in any the LLM leaves empty
+        max_llm_chars: Cap on the text sent to OpenAI in streaming mode
         
     Returns:
         dict: Structured bill data focusing on charges breakdown
     """
     try:
         with pdfplumber.open(file) as pdf:
+            if streaming:
+                patterns = ParserRuleSet('generic').compiled_patterns
+                full_text, found, pages_read = stream_bill_text(
+                    pdf, {field: patterns[field] for field in STREAMING_TARGET_FIELDS}, max_llm_chars)
+                logger.info(f"Streaming extraction read {pages_read}/{len(pdf.pages)} pages, "
+                            f"resolved {len(found)}/{len(STREAMING_TARGET_FIELDS)} fields")
+                return merge_streamed_fields(extract_with_openai(full_text), found)
+            
             # Extract text from all pages
             full_text = ""
             for page in pdf.pages:
@@ -176,10 +303,132 @@ def extract_bill_data(file) -> dict:
             "message": "Failed to process the PDF bill. Please ensure it's a valid energy bill."
         }
 
+# Keywords that mark the bill sections holding the fields we extract:
+# the summary box, the charges table and the NEM section
+SECTION_KEYWORDS = re.compile(
+    r'account|billing\s*period|service\s*(from|period)|balance|payment|amount\s*due|due\s*date|'
+    r'charge|credit|adjustment|fee|tax|kwh|usage|generation|delivery|bypassable|wildfire|'
+    r'nem|net\s*(energy|metering|surplus)|true-?up',
+    re.IGNORECASE
+)
+NUMERIC_VALUE = re.compile(r'\$\s*-?[\d,]*\.?\d|-?[\d,]+\.\d{2}|\d\s*kwh', re.IGNORECASE)
+
+# Maximum characters of selected bill sections included in the prompt
+MAX_PROMPT_CHARS = 6000
+
+# Function schema the model must fill in, so no JSON has to be scraped out of prose
+BILL_EXTRACTION_FUNCTION = {
+    "name": "record_bill",
+    "description": "Record the summary and charges of an energy bill.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "bill_summary": {
+                "type": "object",
+                "properties": {
+                    "account_number": {"type": "string"},
+                    "billing_period": {"type": "string"},
+                    "previous_balance": {"type": "number"},
+                    "payment_received": {"type": "number"},
+                    "credit_balance": {"type": "number"},
+                    "current_charges": {"type": "number"},
+                    "total_amount_due": {"type": "number"},
+                },
+            },
+            "charges_breakdown": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "charge_type": {"type": "string"},
+                        "amount": {"type": "number"},
+                    },
+                    "required": ["charge_type", "amount"],
+                },
+            },
+        },
+        "required": ["bill_summary", "charges_breakdown"],
+    },
+}
+
+def select_bill_sections(text: str, max_chars: int = MAX_PROMPT_CHARS) -> str:
+    """
+    Reduce bill text to the lines that can hold the fields we extract.
+    
+    Keeps lines that mention a summary, charge or NEM keyword, or that carry a
+    dollar/kWh value right after such a line (table rows often split the label
+    and the amount). Boilerplate such as marketing copy and usage appendices
+    without amounts is dropped.
+    
+    Args:
+        text: The extracted text from the PDF
+        max_chars: Cap on the returned text
+        
+    Returns:
+        str: The selected lines, in their original order
+    """
+    selected = []
+    previous_kept = False
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            continue
+        has_keyword = SECTION_KEYWORDS.search(line) is not None
+        has_value = NUMERIC_VALUE.search(line) is not None
+        if has_keyword or (has_value and previous_kept):
+            selected.append(line)
+            previous_kept = True
+        else:
+            previous_kept = False
+    
+    sections = "\n".join(selected) if selected else text
+    return sections[:max_chars]
+
+def _message_field(message, key: str):
+    """A field of a response or message: SDK objects (OpenAIObject) and plain dicts by key, others by attribute."""
+    if isinstance(message, dict):
+        return message.get(key)
+    return getattr(message, key, None)
+
+def _parse_model_json(message) -> dict:
+    """Parse the function-call arguments, or JSON in the message content for older responses."""
+    function_call = _message_field(message, "function_call")
+    arguments = _message_field(function_call, "arguments") if function_call is not None else None
+    if isinstance(arguments, str):
+        return json.loads(arguments)
+    
+    content = _message_field(message, "content")
+    if content is None:
+        raise ValueError("The model returned neither function-call arguments nor content")
+    
+    # Find JSON in the response (in case there's additional text)
+    json_match = re.search(r'```json\n(.*?)\n```', content, re.DOTALL)
+    if json_match:
+        json_str = json_match.group(1)
+    else:
+        # If not in code block, try to find JSON directly
+        json_match = re.search(r'(\{.*\})', content, re.DOTALL)
+        if json_match:
+            json_str = json_match.group(1)
+        else:
+            json_str = content
+    
+    # Parse the JSON
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        # If JSON parsing fails, try to clean up the string
+        json_str = re.sub(r'[\n\r\t]', '', json_str)
+        return json.loads(json_str)
+
 def extract_with_openai(text: str) -> dict:
     """
     Use OpenAI to extract structured data from bill text.
     
+    Only the summary, charges and NEM sections of the bill are sent, and the
+    model is forced to answer through the ``record_bill`` function so the
+    result is strict JSON.
+    
     Args:
         text: The extracted text from the PDF
         
@@ -187,74 +436,34 @@ def extract_with_openai(text: str) -> dict:
         dict: Structured bill data
     """
     try:
-        # Create a prompt for OpenAI
-        prompt = f"""
-        Extract the following information from this energy bill text. Return the data in JSON format.
-        
-        For the bill summary, extract:
-        - Account number
-        - Billing period
-        - Previous balance
-        - Payment received
-        - Credit balance
-        - Current charges
-        - Total amount due
-        
-        For the charges breakdown, extract all charges mentioned in the bill, such as:
-        - Electricity used (in kWh)
-        - Electricity delivery charges
-        - Non-bypassable charges
-        - Wildfire fund charge
-        - Electricity generation charges
-        - Electricity generation credit
-        - Baseline adjustment credit
-        - Other adjustments
-        - Minimum charge adjustment
-        - Taxes & fees
-        - NEM credits
-        - And any other charges mentioned
-        
-        Format the response as a JSON object with two main sections:
-        1. "bill_summary" - containing the summary fields
-        2. "charges_breakdown" - an array of objects with "charge_type" and "amount" fields
-        
-        Here's the bill text:
-        {text}
-        """
+        sections = select_bill_sections(text)
+        prompt = (
+            "Extract the bill summary (account number, billing period, previous balance, "
+            "payment received, credit balance, current charges, total amount due) and every "
+            "charge, credit and kWh line. Amounts as plain numbers, negative for credits.\n\n"
+            f"{sections}"
+        )
         
         # Call OpenAI API
         response = openai.ChatCompletion.create(
             model="gpt-4",  # Use GPT-4 for better extraction accuracy
             messages=[
-                {"role": "system", "content": "You are a utility bill parsing assistant. Extract structured data from energy bills accurately."},
+                {"role": "system", "content": "You extract structured data from energy bills."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3,  # Lower temperature for more deterministic results
-            max_tokens=1000
+            functions=[BILL_EXTRACTION_FUNCTION],
+            function_call={"name": BILL_EXTRACTION_FUNCTION["name"]},
+            temperature=0,
+            max_tokens=800
         )
         
-        # Extract the JSON response
-        content = response.choices[0].message.content
-        
-        # Find JSON in the response (in case there's additional text)
-        json_match = re.search(r'```json\n(.*?)\n```', content, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # If not in code block, try to find JSON directly
-            json_match = re.search(r'(\{.*\})', content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                json_str = content
+        usage = _message_field(response, "usage")
+        if usage is not None:
+            logger.info(f"OpenAI extraction tokens: prompt={_message_field(usage, 'prompt_tokens')} "
+                        f"completion={_message_field(usage, 'completion_tokens')} "
+                        f"(bill text {len(text)} chars, sent {len(sections)} chars)")
         
-        # Parse the JSON
-        try:
-            result = json.loads(json_str)
-        except json.JSONDecodeError:
-            # If JSON parsing fails, try to clean up the string
-            json_str = re.sub(r'[\n\r\t]', '', json_str)
-            result = json.loads(json_str)
+        result = _parse_model_json(response.choices[0].message)
         
         # Ensure the result has the expected structure
         if "bill_summary" not in result:
@@ -0,0 +1,130 @@
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import yaml
+
+from src.pdf_processing.utility_detector import UtilityDetector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'parser_rules.yaml')
+
+# How often (in seconds) the rules file is checked for changes
+DEFAULT_CHECK_INTERVAL = 2.0
+
+class CompiledRules:
+    """
+    Immutable snapshot of the parser rules, compiled once when loaded.
+
+    ``version`` identifies the whole file; ``utility_versions`` identifies the
+    rules of each utility on its own, so a change to one utility's patterns
+    only invalidates extractions made with that utility's rules.
+    """
+
+    def __init__(self, config: Dict[str, Any], content_hash: str):
+        self.version = f"{config.get('version', 0)}+{content_hash[:8]}"
+        self.patterns: Dict[str, Dict[str, str]] = {}
+        self.compiled: Dict[str, Dict[str, Pattern]] = {}
+        self.utility_versions: Dict[str, str] = {}
+        signatures: Dict[str, List[Tuple[str, float]]] = {}
+
+        for utility, rules in (config.get('utilities') or {}).items():
+            patterns = {field: str(pattern) for field, pattern in (rules.get('patterns') or {}).items()}
+            self.patterns[utility] = patterns
+            self.compiled[utility] = {field: re.compile(pattern, re.IGNORECASE)
+                                      for field, pattern in patterns.items()}
+            digest = hashlib.sha256(json.dumps(patterns, sort_keys=True).encode()).hexdigest()
+            self.utility_versions[utility] = f"{config.get('version', 0)}+{digest[:8]}"
+            signatures[utility] = [(str(keyword), float(weight))
+                                   for keyword, weight in rules.get('signatures') or []]
+        if 'generic' not in self.patterns:
+            raise ValueError("Parser rules must define a 'generic' utility")
+
+        self.detector = UtilityDetector(signatures)
+        self.upload_fields = [
+            {
+                'field': entry['field'],
+                'kind': entry.get('kind', 'text'),
+                'bill_type': entry.get('bill_type'),
+                'pattern': re.compile(entry['pattern'], re.MULTILINE),
+            }
+            for entry in config.get('upload_fields') or []
+        ]
+
+    def utility_rules(self, utility_name: str) -> Tuple[str, Dict[str, str], Dict[str, Pattern]]:
+        """Return ``(utility, patterns, compiled patterns)``, falling back to the generic rules."""
+        utility = utility_name.lower() if utility_name.lower() in self.patterns else 'generic'
+        return utility, self.patterns[utility], self.compiled[utility]
+
+class RuleRegistry:
+    """
+    Loads parser rules from a YAML/JSON file and reloads them when it changes.
+
+    ``current()`` returns the latest compiled snapshot. The file is checked at
+    most once every ``check_interval`` seconds; a changed file is compiled in
+    full before the new snapshot replaces the old one, so callers always see a
+    complete rule set. A file that fails to load or compile is logged and the
+    previous snapshot stays in use.
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.path = os.path.abspath(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = 0.0
+        self._rules: Optional[CompiledRules] = None
+        self._reload(force=True)
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _reload(self, force: bool = False):
+        signature = self._file_signature()
+        if not force and signature == self._signature:
+            return
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        try:
+            config = json.loads(content) if self.path.endswith('.json') else yaml.safe_load(content)
+            rules = CompiledRules(config or {}, hashlib.sha256(content).hexdigest())
+        except (yaml.YAMLError, ValueError, KeyError, TypeError, re.error) as e:
+            if self._rules is None:
+                raise
+            logger.error(f"Keeping parser rules {self._rules.version}; failed to load {self.path}: {e}")
+            self._signature = signature
+            return
+        if self._rules is not None and rules.version != self._rules.version:
+            logger.info(f"Reloaded parser rules {self._rules.version} -> {rules.version}")
+        self._rules = rules
+        self._signature = signature
+
+    def current(self) -> CompiledRules:
+        """Return the current rules, reloading them first if the file changed."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if now - self._checked_at >= self.check_interval:
+                    try:
+                        self._reload()
+                    except OSError as e:
+                        logger.error(f"Could not check parser rules file {self.path}: {e}")
+                    self._checked_at = now
+        return self._rules
+
+@lru_cache(maxsize=1)
+def get_registry() -> RuleRegistry:
+    """Process-wide registry; the path can be overridden with NEM_PARSER_RULES."""
+    return RuleRegistry(os.getenv("NEM_PARSER_RULES", DEFAULT_RULES_PATH))
+
+def current_rules() -> CompiledRules:
+    """Shortcut for ``get_registry().current()``."""
+    return get_registry().current()
@@ -0,0 +1,114 @@
+from collections import deque
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Only the top of the first page is scanned; utility names and logos' alt text live there
+HEADER_CHARS = 2000
+
+# Below this confidence a bill is parsed with the generic rules
+MIN_CONFIDENCE = 0.3
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton for case-insensitive multi-keyword matching.
+
+    All keywords are found in a single pass over the text, so the cost of a
+    scan does not grow with the number of registered keywords.
+    """
+
+    def __init__(self, keywords: Sequence[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for keyword in keywords:
+            self._add(keyword.lower())
+        self._build_failure_links()
+
+    def _add(self, keyword: str):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(keyword)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield ``(start_index, keyword)`` for every keyword occurrence in ``text``."""
+        state = 0
+        for index, char in enumerate(text.lower()):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for keyword in self._output[state]:
+                yield index - len(keyword) + 1, keyword
+
+class UtilityDetector:
+    """
+    Identifies a bill's utility from the header of its first page.
+
+    ``signatures`` maps a utility name to ``(keyword, weight)`` pairs. Weights
+    are the confidence a single keyword gives on its own; a full company name
+    is close to 1.0 while a short abbreviation is lower. Keywords only match on
+    word boundaries, so "sce" does not match inside "scenic" or "science".
+    """
+
+    def __init__(self, signatures: Dict[str, Sequence[Tuple[str, float]]]):
+        self._weights: Dict[str, List[Tuple[str, float]]] = {}
+        for utility, keywords in signatures.items():
+            for keyword, weight in keywords:
+                self._weights.setdefault(keyword.lower(), []).append((utility, weight))
+        self._automaton = KeywordAutomaton(list(self._weights))
+
+    @staticmethod
+    def _on_word_boundary(text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not before.isalnum() and not after.isalnum()
+
+    def scores(self, first_page_text: str) -> Dict[str, float]:
+        """Combined evidence per utility, each in [0, 1]."""
+        header = (first_page_text or "")[:HEADER_CHARS]
+        matched = set()
+        for start, keyword in self._automaton.search(header):
+            if self._on_word_boundary(header, start, start + len(keyword)):
+                matched.add(keyword)
+
+        # Independent-evidence combination: 1 - product of (1 - weight)
+        misses: Dict[str, float] = {}
+        for keyword in matched:
+            for utility, weight in self._weights[keyword]:
+                misses[utility] = misses.get(utility, 1.0) * (1.0 - weight)
+        return {utility: 1.0 - miss for utility, miss in misses.items()}
+
+    def detect(self, first_page_text: str) -> Tuple[str, float]:
+        """
+        Return the most likely utility and a confidence score in [0, 1].
+
+        Confidence is the winning utility's evidence, discounted by the share
+        of evidence pointing at other utilities. Returns ``("generic", score)``
+        when nothing reaches ``MIN_CONFIDENCE``.
+        """
+        scores = self.scores(first_page_text)
+        if not scores:
+            return "generic", 0.0
+        utility, best = max(scores.items(), key=lambda item: item[1])
+        confidence = best * best / sum(scores.values())
+        if confidence < MIN_CONFIDENCE:
+            return "generic", round(confidence, 3)
+        return utility, round(confidence, 3)
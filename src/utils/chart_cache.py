@@ -0,0 +1,123 @@
+"""
+Process-wide cache of rendered chart images.
+
+Streamlit reruns the page script on every widget interaction, and each run
+used to draw its matplotlib charts again even when neither the account nor
+its data had changed. Charts are instead rendered once to PNG or SVG bytes
+and kept here, keyed by chart type, account, a version of the plotted data
+and the rendered size, so reruns and other sessions viewing the same chart
+get the cached image.
+
+Entries are evicted least recently used first once their total size exceeds
+the budget (``NEM_CHART_CACHE_MB``, 64 MB by default).
+"""
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+# Default budget for cached chart bytes, overridable with NEM_CHART_CACHE_MB
+DEFAULT_CHART_CACHE_MB = 64
+
+ChartKey = Tuple[str, str, str, Hashable]
+
+def chart_cache_bytes() -> int:
+    """Return the configured chart cache budget in bytes."""
+    return int(float(os.getenv("NEM_CHART_CACHE_MB", DEFAULT_CHART_CACHE_MB)) * 1024 * 1024)
+
+def data_version(*values: Any) -> str:
+    """
+    Short digest of the data a chart is drawn from.
+
+    DataFrames are hashed by content (``pd.util.hash_pandas_object``), other
+    values by their ``repr``; equal data gives the same version in every
+    process and session.
+    """
+    digest = hashlib.sha1()
+    for value in values:
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+        else:
+            digest.update(repr(value).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()[:16]
+
+def chart_key(chart_type: str, account: Any, version: str, size: Hashable) -> ChartKey:
+    """Cache key of a rendered chart (``size`` covers everything that changes the image's pixels)."""
+    return (chart_type, str(account), version, size)
+
+class ChartCache:
+    """Thread-safe LRU of rendered chart bytes with a byte budget."""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = chart_cache_bytes() if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[ChartKey, bytes]" = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: ChartKey) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: ChartKey, data: bytes):
+        """Store ``data``, evicting the least recently used charts to stay within the budget."""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes_used -= len(old)
+            self._entries[key] = data
+            self.bytes_used += len(data)
+            while self.bytes_used > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes_used -= len(evicted)
+                self.evictions += 1
+
+    def get_or_render(self, key: ChartKey, render: Callable[[], bytes]) -> bytes:
+        """
+        Cached bytes for ``key``, rendering and storing them on a miss.
+
+        Rendering runs outside the lock, so a slow chart does not block
+        lookups of other charts; concurrent misses on one key may render it twice.
+        """
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes_used = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes_used,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+@lru_cache(maxsize=1)
+def chart_cache() -> ChartCache:
+    """Process-wide cache shared by all sessions."""
+    return ChartCache()
@@ -1,35 +1,243 @@
+"""
+Customer details for the annual-switch flow and the website agent.
+
+Customers are kept in a SQLite table whose primary key (and so its index)
+is the account number. ``CustomerRepository.import_csv`` bulk-loads a
+customer CSV in chunks inside one transaction, ``fetch_many`` looks up a
+batch of accounts with a handful of ``IN`` queries, and single lookups go
+through a small read-through LRU so repeated reruns for the same account do
+not touch the database.
+
+The test customer 100001 is seeded into every database.
+
+Usage:
+    python -m src.utils.customer_database customers.csv
+"""
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', '.cache', 'customers.sqlite')
+
+CUSTOMER_FIELDS = ['first_name', 'last_name', 'address', 'zip', 'city', 'phone', 'email']
+
+# Other CSV headers accepted for the account number and customer fields
+COLUMN_ALIASES = {
+    'account': 'account_number',
+    'account_no': 'account_number',
+    'zip_code': 'zip',
+    'postal_code': 'zip',
+    'phone_number': 'phone',
+    'email_address': 'email',
+}
+
+# Customers seeded into every database (the demo flow's test account)
+SEED_CUSTOMERS = {
+    "100001": {
+        "first_name": "TEST Michael",
+        "last_name": "TEST Anderson",
+        "address": "789 Birch Lane",
+        "zip": "94102",
+        "city": "San Francisco",
+        "phone": "415-555-1234",
+        "email": "michael.anderson@email.com"
+    },
+}
+
+INSERT_SQL = f"INSERT OR REPLACE INTO customers VALUES ({', '.join('?' * (len(CUSTOMER_FIELDS) + 1))})"
+
+# Single-account lookups kept in memory
+DEFAULT_CACHE_SIZE = 1024
+
+# Accounts per IN query in fetch_many (SQLite caps bound parameters)
+FETCH_BATCH = 500
+
+# CSV rows read and inserted per chunk by import_csv
+IMPORT_CHUNK_ROWS = 50_000
+
+def normalize_customer_column(name: str) -> str:
+    """Map a CSV header to a customer field name ('Zip Code' -> 'zip')."""
+    key = re.sub(r'[^0-9a-z]+', '_', str(name).strip().lower()).strip('_')
+    return COLUMN_ALIASES.get(key, key)
+
+class CustomerRepository:
+    """
+    SQLite-backed customer store with a read-through LRU for single lookups.
+
+    Each thread gets its own connection, so one instance can be shared by
+    every Streamlit session and by batch enrollment workers.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, cache_size: int = DEFAULT_CACHE_SIZE):
+        """Open (creating and seeding if needed) the database at ``db_path`` (default: NEM_CUSTOMER_DB)."""
+        self.db_path = db_path or os.getenv("NEM_CUSTOMER_DB") or DEFAULT_DB_PATH
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._cache_lock = threading.Lock()
+        self._cache: "OrderedDict[str, Dict[str, Optional[str]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._create()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def _create(self):
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        # Readers are not blocked while a bulk import is writing
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS customers (account_number TEXT PRIMARY KEY, "
+                     + ", ".join(f"{field} TEXT" for field in CUSTOMER_FIELDS) + ") WITHOUT ROWID")
+        with conn:
+            conn.executemany(
+                INSERT_SQL.replace("OR REPLACE", "OR IGNORE"),
+                [[account] + [details.get(field) for field in CUSTOMER_FIELDS]
+                 for account, details in SEED_CUSTOMERS.items()])
+
+    @staticmethod
+    def _details(row) -> Dict[str, Optional[str]]:
+        return dict(zip(CUSTOMER_FIELDS, row[1:]))
+
+    def get(self, account_number) -> Optional[Dict[str, Optional[str]]]:
+        """
+        A customer's details, or None if the account is unknown.
+
+        Found customers are cached; unknown accounts are looked up again
+        each time, so customers added by another process show up at once.
+        """
+        account = str(account_number).strip()
+        with self._cache_lock:
+            details = self._cache.get(account)
+            if details is not None:
+                self._cache.move_to_end(account)
+                self.hits += 1
+                return dict(details)
+            self.misses += 1
+        row = self._connection().execute(
+            "SELECT * FROM customers WHERE account_number = ?", (account,)).fetchone()
+        if row is None:
+            return None
+        details = self._details(row)
+        with self._cache_lock:
+            self._cache[account] = details
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(details)
+
+    def fetch_many(self, account_numbers: Iterable) -> Dict[str, Dict[str, Optional[str]]]:
+        """
+        Details of many customers at once.
+
+        Results are not added to the LRU, so a batch run does not evict the
+        accounts interactive sessions are looking at.
+
+        Args:
+            account_numbers: Accounts to look up (duplicates are fine)
+
+        Returns:
+            dict: account number -> details, for the accounts that exist
+        """
+        accounts = list(dict.fromkeys(str(account).strip() for account in account_numbers))
+        found = {}
+        conn = self._connection()
+        for first in range(0, len(accounts), FETCH_BATCH):
+            batch = accounts[first:first + FETCH_BATCH]
+            rows = conn.execute(
+                f"SELECT * FROM customers WHERE account_number IN ({', '.join('?' * len(batch))})", batch)
+            for row in rows:
+                found[row[0]] = self._details(row)
+        return found
+
+    def upsert_many(self, records: Iterable[Dict[str, Optional[str]]]) -> int:
+        """Insert or replace customers given as dicts with account_number and CUSTOMER_FIELDS keys."""
+        rows = [[str(record['account_number']).strip()] + [record.get(field) for field in CUSTOMER_FIELDS]
+                for record in records]
+        conn = self._connection()
+        with conn:
+            conn.executemany(INSERT_SQL, rows)
+        self.clear_cache()
+        return len(rows)
+
+    def import_csv(self, csv_path: str, chunksize: int = IMPORT_CHUNK_ROWS) -> Dict[str, float]:
+        """
+        Bulk-import customers from a CSV, replacing existing accounts.
+
+        The file is read in chunks as text (so zip codes and account numbers
+        keep their leading zeros) and written in a single transaction.
+        Columns other than the account number and CUSTOMER_FIELDS are ignored.
+
+        Returns:
+            dict: rows and import_seconds
+        """
+        start = time.perf_counter()
+        rows = 0
+        conn = self._connection()
+        with conn:
+            for chunk in pd.read_csv(csv_path, dtype=str, keep_default_na=False, chunksize=chunksize):
+                chunk.columns = [normalize_customer_column(col) for col in chunk.columns]
+                if 'account_number' not in chunk.columns:
+                    raise ValueError(f"No account number column found in {csv_path}")
+                chunk = chunk.reindex(columns=['account_number'] + CUSTOMER_FIELDS)
+                chunk['account_number'] = chunk['account_number'].str.strip()
+                chunk = chunk[chunk['account_number'] != '']
+                # Empty cells are stored as NULL
+                values = chunk.where(chunk.notna() & (chunk != ''), None)
+                conn.executemany(INSERT_SQL, values.itertuples(index=False, name=None))
+                rows += len(chunk)
+        self.clear_cache()
+        stats = {'rows': rows, 'import_seconds': round(time.perf_counter() - start, 4)}
+        logger.info(f"Imported {rows} customers from {csv_path} into {self.db_path} in {stats['import_seconds']}s")
+        return stats
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    def cache_info(self) -> Dict[str, int]:
+        with self._cache_lock:
+            return {'entries': len(self._cache), 'max_entries': self.cache_size,
+                    'hits': self.hits, 'misses': self.misses}
+
+@lru_cache(maxsize=1)
+def customer_repository() -> CustomerRepository:
+    """Process-wide repository shared by all sessions."""
+    return CustomerRepository()
+
 def fetch_customer_details(account_number):
-    
-    """Simulate backend lookup for customer details."""
-    # Fake database with 3 customers
-    
-    customer_database = {
-        "100001": {
-            "first_name": "TEST Michael",
-            "last_name": "TEST Anderson",
-            "address": "789 Birch Lane",
-            "zip": "94102",
-            "city": "San Francisco",
-            "phone": "415-555-1234",
-            "email": "michael.anderson@email.com"
-        },
-        # "100002": {
-        #     "first_name": "TEST Samantha",
-        #     "last_name": "TEST Carter",
-        #     "address": "456 Maple Avenue",
-        #     "zip": "60611",
-        #     "city": "Chicago",
-        #     "phone": "312-555-5678",
-        #     "email": "samantha.carter@email.com"
-        # },
-        # "100003": {
-        #     "first_name": "TEST Daniel",
-        #     "last_name": "TEST Martinez",
-        #     "address": "321 Oak Drive",
-        #     "zip": "10001",
-        #     "city": "New York",
-        #     "phone": "212-555-9876",
-        #     "email": "daniel.martinez@email.com"
-        # }
-    }
-    return customer_database.get(account_number, None)  # Return customer data or None
+    """Look up a customer's details (None if the account is unknown)."""
+    return customer_repository().get(account_number)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-import customers into the customer database.")
+    parser.add_argument('csv_path', help="Customer CSV with an account number column")
+    parser.add_argument('--db', default=None, help="Database path (default: NEM_CUSTOMER_DB or data/.cache/customers.sqlite)")
+    args = parser.parse_args(argv)
+
+    repository = CustomerRepository(args.db)
+    stats = repository.import_csv(args.csv_path)
+    logger.info(f"{repository.count()} customers in {repository.db_path}")
+    return 0 if stats['rows'] else 1
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(main())
@@ -0,0 +1,18 @@
+"""
+Executor helpers shared by the batch jobs (bill extraction, what-if runs, reports).
+"""
+from concurrent.futures import Future
+
+class InlineExecutor:
+    """Executor stand-in that runs work in the calling process (``workers=0``)."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
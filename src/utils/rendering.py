@@ -0,0 +1,122 @@
+"""
+Thread-safe matplotlib rendering without pyplot.
+
+Streamlit serves every session from threads of one process, so pyplot's
+global state is shared by all of them: ``rcParams`` changed for one chart
+apply to charts other sessions are drawing at the same moment, and figures
+created with ``plt.subplots`` stay in pyplot's figure registry (and in
+memory) until someone calls ``plt.close``.
+
+Charts are built here on standalone ``Figure`` objects instead:
+
+* ``new_figure`` yields a figure and releases its artists on exit, whether
+  rendering succeeded or not;
+* font sizes are applied per axes (``apply_style``), never via ``rcParams``;
+* ``render_chart`` builds, draws and encodes a chart; charts for different
+  sessions render concurrently.
+
+Once imported, matplotlib's shared state is safe to use from several
+threads: FreeType fonts are cached per thread and the other caches are
+``lru_cache``\s. What is not is its first use, when font files are opened
+and the mathtext parser is built, so the first render warms these up under
+a lock (``prepare_rendering``). The mathtext parser itself stays shared, so
+chart text keeps to a single '$' per string (plain text, never mathtext).
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+import io
+import threading
+
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+
+# Held while the first render sets up matplotlib's font and mathtext state
+_SETUP_LOCK = threading.Lock()
+_prepared = False
+
+# Font size keys understood by apply_style (other keys are left to the chart)
+FONT_KEYS = ('title', 'label', 'tick', 'legend')
+
+@contextmanager
+def new_figure(figsize: Tuple[float, float] = (6.4, 4.8), **figure_kwargs) -> Iterator[Figure]:
+    """
+    A standalone figure, released when the block exits.
+
+    The figure is never registered with pyplot, so nothing outside the block
+    keeps it alive.
+    """
+    fig = Figure(figsize=figsize, **figure_kwargs)
+    try:
+        yield fig
+    finally:
+        release_figure(fig)
+
+def release_figure(fig: Figure):
+    """Drop a figure's axes and artists so their memory is freed right away rather than by the cycle collector."""
+    fig.clear()
+
+def apply_style(ax: Axes, style: Dict[str, Any]):
+    """
+    Apply font sizes to one axes' title, axis labels, tick labels and legend.
+
+    Args:
+        ax: Axes to style
+        style: Sizes in points for any of 'title', 'label', 'tick' and 'legend'
+    """
+    if 'title' in style:
+        ax.title.set_fontsize(style['title'])
+    if 'label' in style:
+        ax.xaxis.label.set_fontsize(style['label'])
+        ax.yaxis.label.set_fontsize(style['label'])
+    if 'tick' in style:
+        ax.tick_params(axis='both', labelsize=style['tick'])
+    legend = ax.get_legend()
+    if legend is not None and 'legend' in style:
+        for text in legend.get_texts():
+            text.set_fontsize(style['legend'])
+
+def prepare_rendering():
+    """Set up matplotlib's font and mathtext state once, before charts render concurrently."""
+    global _prepared
+    if _prepared:
+        return
+    with _SETUP_LOCK:
+        if _prepared:
+            return
+        with new_figure((1, 1)) as fig:
+            ax = fig.subplots()
+            ax.set_title('Amount ($)')
+            ax.text(0.5, 0.5, r'$x$')
+            fig.savefig(io.BytesIO(), format='png')
+        _prepared = True
+
+def figure_bytes(fig: Figure, fmt: str = 'png', dpi: int = 100, **savefig_kwargs) -> bytes:
+    """Render a figure to PNG, SVG or PDF bytes (extra arguments go to ``savefig``)."""
+    prepare_rendering()
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=dpi, **savefig_kwargs)
+    return buf.getvalue()
+
+def render_chart(build: Callable[[Figure], Any], figsize: Tuple[float, float], fmt: str = 'png', dpi: int = 100,
+                 style: Optional[Dict[str, Any]] = None, **savefig_kwargs) -> bytes:
+    """
+    Build a chart on a fresh figure, render it and release the figure.
+
+    Args:
+        build: Draws the chart into the figure it is given
+        figsize: Figure size in inches
+        fmt: 'png', 'svg' or 'pdf'
+        dpi: Pixel density of raster output
+        style: Font sizes applied to every axes after ``build`` (see ``apply_style``)
+        **savefig_kwargs: Passed to ``savefig`` (e.g. ``bbox_inches='tight'``)
+
+    Returns:
+        bytes: The rendered image
+    """
+    prepare_rendering()
+    with new_figure(figsize) as fig:
+        build(fig)
+        if style:
+            for ax in fig.axes:
+                apply_style(ax, style)
+        return figure_bytes(fig, fmt, dpi, **savefig_kwargs)
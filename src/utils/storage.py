@@ -0,0 +1,74 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Default cap on uploaded bill size, overridable with the NEM_MAX_UPLOAD_MB environment variable
+DEFAULT_MAX_UPLOAD_MB = 25
+
+# Size of the blocks copied from an upload to its spool file
+SPOOL_CHUNK_SIZE = 1 << 20
+
+class UploadTooLargeError(ValueError):
+    """Raised when an uploaded file exceeds the configured size limit."""
+
+def max_upload_bytes():
+    """Return the configured upload size limit in bytes."""
+    return int(float(os.getenv("NEM_MAX_UPLOAD_MB", DEFAULT_MAX_UPLOAD_MB)) * 1024 * 1024)
+
+def upload_fingerprint(uploaded_file):
+    """
+    Small, hashable identifier for an uploaded file.
+
+    Session state stores this instead of the upload itself, so the PDF bytes
+    are not pinned in memory after extraction.
+    """
+    file_id = getattr(uploaded_file, "file_id", None) or getattr(uploaded_file, "id", None)
+    if file_id is not None:
+        return str(file_id)
+    return f"{getattr(uploaded_file, 'name', '')}:{getattr(uploaded_file, 'size', '')}"
+
+@contextmanager
+def spooled_upload(uploaded_file, max_bytes=None, suffix=".pdf"):
+    """
+    Copy an upload to a temporary file in fixed-size chunks and yield its path.
+
+    Parsers open the spooled file by path and read pages on demand instead of
+    holding the whole PDF in a bytes object. The file is deleted on exit.
+
+    Args:
+        uploaded_file: A file-like object (e.g. a Streamlit UploadedFile) or a path
+        max_bytes: Size limit in bytes (defaults to ``max_upload_bytes()``)
+        suffix: Suffix of the temporary file
+
+    Raises:
+        UploadTooLargeError: If the upload is larger than ``max_bytes``
+    """
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        yield os.fspath(uploaded_file)
+        return
+
+    if max_bytes is None:
+        max_bytes = max_upload_bytes()
+    size = getattr(uploaded_file, "size", None)
+    if size is not None and size > max_bytes:
+        raise UploadTooLargeError(
+            f"File is {size / 1048576:.1f} MB; the limit is {max_bytes / 1048576:.1f} MB.")
+
+    fd, path = tempfile.mkstemp(prefix="nem_upload_", suffix=suffix)
+    try:
+        written = 0
+        with os.fdopen(fd, "wb") as spool:
+            if hasattr(uploaded_file, "seek"):
+                uploaded_file.seek(0)
+            while True:
+                chunk = uploaded_file.read(SPOOL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLargeError(
+                        f"File exceeds the upload limit of {max_bytes / 1048576:.1f} MB.")
+                spool.write(chunk)
+        yield path
+    finally:
+        os.remove(path)
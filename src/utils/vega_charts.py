@@ -0,0 +1,114 @@
+"""
+Vega-Lite versions of the bill charts, drawn in the browser.
+
+With ``NEM_CHART_RENDERER=vega`` the app sends these specs to
+``st.vega_lite_chart`` (Streamlit's Altair/Vega-Lite frontend) instead of
+rasterizing matplotlib figures on the server: a spec is a few hundred bytes
+of JSON holding only the plotted values and encodings, so building one costs
+a fraction of drawing and encoding a PNG, and the browser does the drawing.
+
+Specs are plain Vega-Lite dicts, the same JSON Altair emits, built directly
+so each page view does not pay for Altair's schema validation.
+"""
+from typing import Any, Dict, List, Sequence
+import json
+import os
+
+import pandas as pd
+
+CHART_RENDERERS = ('matplotlib', 'vega')
+DEFAULT_CHART_RENDERER = 'matplotlib'
+
+# Stand-in for the plotted month when a breakdown has no Month column
+INDEX_FIELD = 'Month'
+
+def chart_renderer() -> str:
+    """Renderer selected with NEM_CHART_RENDERER: 'matplotlib' (server-side images) or 'vega'."""
+    renderer = os.getenv("NEM_CHART_RENDERER", DEFAULT_CHART_RENDERER).lower()
+    return renderer if renderer in CHART_RENDERERS else DEFAULT_CHART_RENDERER
+
+def frame_values(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rows of a DataFrame as JSON-safe records (NaN becomes null)."""
+    return json.loads(frame.to_json(orient='records'))
+
+def breakdown_spec(breakdown_data: pd.DataFrame, cost_col: str, credit_col: str, bill_col: str,
+                   height: int = 250) -> Dict[str, Any]:
+    """
+    Generation vs. consumption bars (credits below zero) with the monthly bill as a line.
+
+    Args:
+        breakdown_data: Bills with numeric cost, credit and bill columns
+        height: Chart height in pixels (the width follows the container)
+    """
+    months = (breakdown_data['Month'] if 'Month' in breakdown_data.columns
+              else pd.Series(breakdown_data.index)).astype(object).astype(str)
+    values = frame_values(pd.DataFrame({
+        INDEX_FIELD: months.to_numpy(),
+        'Cost': breakdown_data[cost_col].to_numpy(dtype=float),
+        'Credit': -breakdown_data[credit_col].to_numpy(dtype=float),
+        'Bill': breakdown_data[bill_col].to_numpy(dtype=float),
+    }))
+    return {
+        'title': 'Generation vs. Consumption',
+        'height': height,
+        'data': {'values': values},
+        'encoding': {'x': {'field': INDEX_FIELD, 'type': 'ordinal', 'sort': None, 'title': 'Month'}},
+        'layer': [
+            {
+                'transform': [{'fold': ['Cost', 'Credit'], 'as': ['Series', 'Amount']}],
+                'mark': 'bar',
+                'encoding': {
+                    'y': {'field': 'Amount', 'type': 'quantitative', 'title': 'Amount ($)'},
+                    'color': {'field': 'Series', 'type': 'nominal', 'title': None,
+                              'scale': {'domain': ['Cost', 'Credit'], 'range': ['indianred', 'forestgreen']}},
+                    'tooltip': [{'field': INDEX_FIELD}, {'field': 'Series'},
+                                {'field': 'Amount', 'type': 'quantitative', 'format': '$,.2f'}],
+                },
+            },
+            {
+                'mark': {'type': 'line', 'point': True, 'color': 'black'},
+                'encoding': {
+                    'y': {'field': 'Bill', 'type': 'quantitative'},
+                    'tooltip': [{'field': INDEX_FIELD}, {'field': 'Bill', 'type': 'quantitative', 'format': '$,.2f'}],
+                },
+            },
+        ],
+    }
+
+def charges_pie_spec(labels: Sequence[str], amounts: Sequence[float]) -> Dict[str, Any]:
+    """Share of each charge in a bill."""
+    return {
+        'title': 'Charges Distribution',
+        'data': {'values': [{'Charge Type': label, 'Amount': float(amount)}
+                            for label, amount in zip(labels, amounts)]},
+        'mark': {'type': 'arc'},
+        'encoding': {
+            'theta': {'field': 'Amount', 'type': 'quantitative'},
+            'color': {'field': 'Charge Type', 'type': 'nominal'},
+            'tooltip': [{'field': 'Charge Type'}, {'field': 'Amount', 'type': 'quantitative', 'format': '$,.2f'}],
+        },
+    }
+
+def comparison_spec(months: Sequence[str], amounts: Sequence[float], usage: Sequence[float],
+                    height: int = 300) -> Dict[str, Any]:
+    """Bill amount bars and energy usage line on independent y axes, one point per billing period."""
+    return {
+        'title': 'Monthly Bill Amount and Energy Usage',
+        'height': height,
+        'data': {'values': [{'Billing Period': month, 'Amount': float(amount), 'Usage': float(kwh)}
+                            for month, amount, kwh in zip(months, amounts, usage)]},
+        'encoding': {'x': {'field': 'Billing Period', 'type': 'ordinal', 'sort': None}},
+        'layer': [
+            {
+                'mark': {'type': 'bar', 'color': 'blue', 'opacity': 0.7},
+                'encoding': {'y': {'field': 'Amount', 'type': 'quantitative', 'title': 'Amount ($)',
+                                   'axis': {'titleColor': 'blue'}}},
+            },
+            {
+                'mark': {'type': 'line', 'color': 'red', 'point': {'color': 'red'}},
+                'encoding': {'y': {'field': 'Usage', 'type': 'quantitative', 'title': 'Energy Usage (kWh)',
+                                   'axis': {'titleColor': 'red'}}},
+            },
+        ],
+        'resolve': {'scale': {'y': 'independent'}},
+    }
@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+import tempfile
+import pandas as pd
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_processing.aggregates import aggregate_sorted
+from src.data_processing.csv_bill_loader import BillDataManager
+from src.data_processing.sqlite_store import SQLiteBillDataManager
+
+CSV_CONTENT = (
+    "Account,Month,Usage (kWh),Generation (kWh),Cost for Usage ($),Credit for Generation ($),Final Monthly Bill ($)\n"
+    "A2,2024-01,500,100,80.00,10.00,70.00\n"
+    "A1,2024-01,300,400,40.00,50.00,-10.00\n"
+    "A2,2024-02,450,150,70.00,20.00,50.00\n"
+    "A1,2024-02,310,380,41.00,45.00,\n"
+    "A3,2024-01,100,0,20.00,0.00,20.00\n"
+)
+
+class TestAccountAggregates(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp_dir.name, 'bills.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write(CSV_CONTENT)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_materialized_at_load(self):
+        manager = BillDataManager(self.csv_path)
+        summary = manager.get_account_summary('A1')
+
+        self.assertEqual(summary['months'], 2)
+        self.assertAlmostEqual(summary['total_usage_kwh'], 610)
+        self.assertAlmostEqual(summary['total_consumption'], 81.0)
+        self.assertAlmostEqual(summary['monthly_bills_total'], -10.0)
+        self.assertAlmostEqual(summary['net_balance'], 81.0 - 95.0)
+        self.assertEqual(summary['last_bill_date'], '2024-02')
+        self.assertIsNone(manager.get_account_summary('A9'))
+
+    def test_sqlite_backend_matches(self):
+        expected = BillDataManager(self.csv_path).get_aggregates()
+        actual = SQLiteBillDataManager(self.csv_path).get_aggregates()
+
+        self.assertEqual(actual.index.tolist(), expected.index.tolist())
+        self.assertEqual(actual['last_bill_date'].tolist(), expected['last_bill_date'].tolist())
+        for column in ['months', 'total_generation_kwh', 'total_generation', 'net_balance']:
+            for a, b in zip(actual[column], expected[column]):
+                self.assertAlmostEqual(float(a), float(b), places=3)
+
+    def test_delta_refresh_matches_full_rebuild(self):
+        manager = BillDataManager(self.csv_path)
+        rows = manager.data[manager.data['account'] == 'A2'].copy()
+        rows.iloc[0, rows.columns.get_loc('cost for usage ($)')] = 100.0
+        updated = manager.with_rows(rows, replaced_accounts={'A2'})
+
+        offsets = [updated._offsets[account] for account in updated._accounts]
+        full = aggregate_sorted(updated._display, updated._accounts,
+                                [o[0] for o in offsets], [o[1] for o in offsets])
+        pd.testing.assert_frame_equal(updated.get_aggregates(), full)
+        self.assertAlmostEqual(updated.get_account_summary('A2')['total_consumption'], 170.0, places=3)
+        self.assertEqual(updated.get_savings_table().set_index('account').loc['A2', 'net_balance'], 140.0)
+        # The original manager is untouched
+        self.assertAlmostEqual(manager.get_account_summary('A2')['total_consumption'], 150.0, places=3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import zipfile
+
+import fitz  # PyMuPDF
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pdf_processing.batch_extract import Checkpoint, collect_pdf_paths, run_batch
+from src.pdf_processing.rule_registry import current_rules
+
+BILL_TEXT = """Account Number: {account}
+Billing Period: January 1, 2023 to January 31, 2023
+Total Amount Due: ${amount}
+Due Date: February 15, 2023
+Total kWh Used: 500"""
+
+
+def write_pdf(path, text):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+
+
+class TestBatchExtract(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bills_dir = os.path.join(self.tmp.name, 'bills')
+        os.makedirs(self.bills_dir)
+        for i in range(3):
+            write_pdf(os.path.join(self.bills_dir, f'bill_{i}.pdf'),
+                      BILL_TEXT.format(account=f'10000{i}', amount=f'{i}1.50'))
+        self.output = os.path.join(self.tmp.name, 'results.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_output(self):
+        with open(self.output) as f:
+            return [json.loads(line) for line in f]
+
+    def test_batch_directory_with_process_pool(self):
+        summary = run_batch(self.bills_dir, self.output, workers=2, use_llm=False)
+
+        self.assertEqual(summary['files'], 3)
+        self.assertEqual(summary['ok'], 3)
+        self.assertIn('files_per_second', summary)
+
+        records = sorted(self.read_output(), key=lambda r: r['source'])
+        self.assertEqual(records[0]['source'], 'bill_0.pdf')
+        self.assertEqual(records[0]['result']['account_info']['account_number'], '100000')
+        self.assertEqual(records[2]['result']['billing_summary']['total_amount'], '21.50')
+        self.assertGreater(records[0]['parse_seconds'], 0)
+
+    def test_resume_skips_processed_files(self):
+        run_batch(self.bills_dir, self.output, workers=0, use_llm=False)
+        write_pdf(os.path.join(self.bills_dir, 'bill_new.pdf'),
+                  BILL_TEXT.format(account='200000', amount='5.00'))
+
+        summary = run_batch(self.bills_dir, self.output, workers=0, use_llm=False)
+
+        self.assertEqual(summary['files'], 1)
+        self.assertEqual(summary['skipped'], 3)
+        self.assertEqual(len(self.read_output()), 4)
+
+    @patch('src.pdf_processing.batch_extract.extract_with_openai')
+    def test_llm_fallback_for_unresolved_bills(self, mock_extract):
+        mock_extract.return_value = {"bill_summary": {"total_amount_due": "9.99"}, "charges_breakdown": []}
+        archive = os.path.join(self.tmp.name, 'bills.zip')
+        unresolved = os.path.join(self.tmp.name, 'odd.pdf')
+        write_pdf(unresolved, "Amount owed this cycle 9.99")
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.write(unresolved, 'odd.pdf')
+            zf.write(os.path.join(self.bills_dir, 'bill_0.pdf'), 'bill_0.pdf')
+
+        summary = run_batch(archive, self.output, workers=0, llm_concurrency=2)
+
+        self.assertEqual(summary['llm_fallbacks'], 1)
+        records = {r['source']: r for r in self.read_output()}
+        self.assertEqual(records['odd.pdf']['method'], 'llm')
+        self.assertEqual(records['bill_0.pdf']['method'], 'rules')
+        mock_extract.assert_called_once()
+
+    def test_checkpoint_without_rule_version_is_current(self):
+        path = os.path.join(self.tmp.name, 'run.checkpoint')
+        checkpoint = Checkpoint(path)
+        checkpoint.mark('abc')
+        checkpoint.close()
+
+        reopened = Checkpoint(path)
+        self.assertEqual(reopened.done['abc'], (None, None))
+        self.assertTrue(reopened.is_current('abc', current_rules()))
+        reopened.close()
+
+    def test_tar_members_outside_work_dir_are_skipped(self):
+        archive = os.path.join(self.tmp.name, 'bills.tar')
+        bill = os.path.join(self.bills_dir, 'bill_0.pdf')
+        escape = os.path.join(self.tmp.name, 'escape.pdf')
+        with tarfile.open(archive, 'w') as tf:
+            tf.add(bill, 'bill_0.pdf')
+            for name in ('../escape.pdf', escape):
+                info = tf.gettarinfo(bill, name)
+                info.name = name  # gettarinfo strips a leading '/'
+                with open(bill, 'rb') as f:
+                    tf.addfile(info, f)
+
+        work_dir = os.path.join(self.tmp.name, 'work')
+        os.makedirs(work_dir)
+        paths = collect_pdf_paths(archive, work_dir)
+
+        self.assertEqual([name for _, name in paths], ['bill_0.pdf'])
+        self.assertFalse(os.path.exists(escape))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from datetime import date
+import os
+import sys
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pdf_processing.bill_record import BillRecord, ChargeLine, parse_amount, parse_billing_period, parse_date
+
+class TestBillRecord(unittest.TestCase):
+    
+    def test_parse_amount(self):
+        self.assertEqual(parse_amount("$1,234.56"), 1234.56)
+        self.assertEqual(parse_amount("-$17.02"), -17.02)
+        self.assertEqual(parse_amount("($12.30)"), -12.30)
+        self.assertEqual(parse_amount("12.30 CR"), -12.30)
+        self.assertIsNone(parse_amount("Not Found"))
+        self.assertIsNone(parse_amount(None))
+    
+    def test_from_openai_extraction(self):
+        record = BillRecord.from_extraction({
+            "bill_summary": {
+                "account_number": "123456789",
+                "billing_period": "July 1, 2024 to July 31, 2024",
+                "previous_balance": "-39.59",
+                "total_amount_due": "-17.02"
+            },
+            "charges_breakdown": [
+                {"charge_type": "Electricity Used (Net Usage)", "amount": "5 kWh"},
+                {"charge_type": "Electricity Delivery Charges", "amount": "$31.47"}
+            ]
+        })
+        
+        self.assertEqual(record.account_number, "123456789")
+        self.assertEqual(record.period_start, date(2024, 7, 1))
+        self.assertEqual(record.period_end, date(2024, 7, 31))
+        self.assertEqual(record.previous_balance, -39.59)
+        self.assertTrue(record.is_credit)
+        self.assertEqual(record.total_kwh, 5.0)
+        self.assertEqual(record.charges[0], ChargeLine("Electricity Used (Net Usage)", None, 5.0))
+        self.assertEqual(record.charges[1].amount, 31.47)
+    
+    def test_from_bill_parser_extraction(self):
+        record = BillRecord.from_extraction({
+            'account_info': {'account_number': '123456789'},
+            'billing_summary': {'total_amount': '1,123.45', 'due_date': 'February 15, 2023',
+                                'billing_period': None},
+            'energy_usage': {'total_kwh': '500'},
+            'charges': {'breakdown': [{'type': 'Generation Charges', 'amount': '75.00'}]},
+            'nem_details': {'credits': '0.00'}
+        })
+        
+        self.assertEqual(record.total_amount_due, 1123.45)
+        self.assertEqual(record.due_date, date(2023, 2, 15))
+        self.assertEqual(record.total_kwh, 500.0)
+        self.assertEqual(record.nem_credits, 0.0)
+        self.assertIsNone(record.billing_period)
+    
+    def test_dates_in_parser_captures(self):
+        # BillParser captures run on into the following lines of the bill
+        period = "March 1, 2024 to April 1, 2024\nAccount Summary\nPrevious Balance"
+        self.assertEqual(parse_billing_period(period), (date(2024, 3, 1), date(2024, 4, 1)))
+        self.assertEqual(parse_date("April 22, 2024\nThank you for being a valued customer"), date(2024, 4, 22))
+        self.assertEqual(parse_date("Due 05/01/2024 to avoid late fees"), date(2024, 5, 1))
+        self.assertIsNone(parse_date("Thank you"))
+        
+        record = BillRecord.from_extraction({'billing_summary': {
+            'billing_period': "September 27, 2024 to October 28, 2024\nAccount Summary\nPrevious Balance",
+            'due_date': "November 18, 2024\nSave energy during peak hours from 4 p"}})
+        self.assertEqual(record.period_end, date(2024, 10, 28))
+        self.assertEqual(record.due_date, date(2024, 11, 18))
+    
+    def test_json_round_trip(self):
+        record = BillRecord(account_number="1", period_start=date(2024, 1, 1), total_amount_due=-3.5,
+                            charges=[ChargeLine("Taxes & Fees", 0.0)])
+        
+        self.assertEqual(BillRecord.from_json(record.to_json()), record)
+        self.assertFalse(hasattr(record, '__dict__'))
+
+if __name__ == '__main__':
+    unittest.main()
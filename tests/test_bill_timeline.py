@@ -0,0 +1,82 @@
+import unittest
+import io
+import os
+import sys
+import threading
+import time
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pdf_processing.bill_record import BillRecord
+from src.pdf_processing.bill_timeline import BillTimeline, extract_records
+
+def make_bill(account, month, total, kwh=100):
+    return BillRecord.from_extraction({
+        "bill_summary": {
+            "account_number": account,
+            "billing_period": f"{month} 1, 2024 to {month} 28, 2024",
+            "total_amount_due": str(total)
+        },
+        "charges_breakdown": [{"charge_type": "Electricity Used", "amount": f"{kwh} kWh"}]
+    })
+
+class TestBillTimeline(unittest.TestCase):
+    
+    def test_orders_and_deduplicates_by_period(self):
+        timeline = BillTimeline()
+        self.assertTrue(timeline.add(make_bill("A1", "March", 30)))
+        self.assertTrue(timeline.add(make_bill("A1", "January", 10)))
+        self.assertFalse(timeline.add(make_bill("A1", "January", 10)))
+        
+        bills = timeline.bills("A1")
+        self.assertEqual([b.total_amount_due for b in bills], [10.0, 30.0])
+        self.assertEqual(timeline.true_up_summary("A1")['bills'], 2)
+    
+    def test_replacing_a_period_updates_totals_and_version(self):
+        timeline = BillTimeline()
+        timeline.add(make_bill("A1", "January", 10, kwh=100))
+        timeline.add(make_bill("A1", "February", -5, kwh=50))
+        version = timeline.version("A1")
+        
+        timeline.add(make_bill("A1", "January", 12, kwh=110))
+        summary = timeline.true_up_summary("A1")
+        
+        self.assertEqual(summary['bills'], 2)
+        self.assertEqual(summary['total_billed'], 7.0)
+        self.assertEqual(summary['total_kwh'], 160.0)
+        self.assertEqual(summary['net_balance'], -5.0)
+        self.assertGreater(timeline.version("A1"), version)
+        self.assertEqual(timeline.version("B2"), 0)
+    
+    def test_extract_records_runs_concurrently(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+        
+        def fake_extractor(path, streaming=False):
+            with lock:
+                active.append(path)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(path)
+            with open(path, 'rb') as f:
+                month = f.read().decode()
+            return {"bill_summary": {"account_number": "A1", "total_amount_due": "1.00",
+                                     "billing_period": f"{month} 1, 2024 to {month} 28, 2024"}}
+        
+        uploads = []
+        for i, month in enumerate(["January", "February", "March", "April"]):
+            upload = io.BytesIO(month.encode())
+            upload.id = f"file-{i}"
+            uploads.append(upload)
+        
+        results = extract_records(uploads, extractor=fake_extractor, max_workers=4)
+        
+        self.assertEqual([fingerprint for fingerprint, _ in results], ["file-0", "file-1", "file-2", "file-3"])
+        self.assertEqual(results[1][1].billing_period, "February 1, 2024 to February 28, 2024")
+        self.assertGreater(max(peak), 1)
+
+if __name__ == '__main__':
+    unittest.main()
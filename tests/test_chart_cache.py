@@ -0,0 +1,71 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+import pandas as pd
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pdf_processing import bill_visualizer
+from src.pdf_processing.bill_record import BillRecord
+from src.utils.chart_cache import ChartCache, chart_key, data_version
+
+class TestChartCache(unittest.TestCase):
+
+    def test_lru_eviction_within_budget(self):
+        cache = ChartCache(max_bytes=10)
+        cache.put(chart_key('a', 1, 'v1', 'small'), b'1234')
+        cache.put(chart_key('b', 1, 'v1', 'small'), b'1234')
+        # Touch 'a' so 'b' is the least recently used
+        self.assertEqual(cache.get(chart_key('a', 1, 'v1', 'small')), b'1234')
+        cache.put(chart_key('c', 1, 'v1', 'small'), b'1234')
+
+        self.assertIsNone(cache.get(chart_key('b', 1, 'v1', 'small')))
+        self.assertIsNotNone(cache.get(chart_key('a', 1, 'v1', 'small')))
+        stats = cache.stats()
+        self.assertEqual((stats['entries'], stats['bytes'], stats['evictions']), (2, 8, 1))
+
+        # Charts larger than the whole budget are not cached
+        cache.put(chart_key('d', 1, 'v1', 'small'), b'x' * 11)
+        self.assertIsNone(cache.get(chart_key('d', 1, 'v1', 'small')))
+
+    def test_get_or_render(self):
+        cache = ChartCache(max_bytes=1024)
+        renders = []
+        render = lambda: renders.append(1) or b'png'
+        key = chart_key('breakdown', 'A1', 'v1', ((3, 2), 200, 'png'))
+
+        self.assertEqual(cache.get_or_render(key, render), b'png')
+        self.assertEqual(cache.get_or_render(key, render), b'png')
+        cache.get_or_render(chart_key('breakdown', 'A1', 'v2', ((3, 2), 200, 'png')), render)
+        self.assertEqual(len(renders), 2)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_data_version(self):
+        frame = pd.DataFrame({'Month': ['2024-01', '2024-02'], 'Bill': [10.0, 20.0]})
+        self.assertEqual(data_version(frame), data_version(frame.copy()))
+        changed = frame.copy()
+        changed.loc[1, 'Bill'] = 21.0
+        self.assertNotEqual(data_version(frame), data_version(changed))
+        self.assertNotEqual(data_version([1, 2]), data_version([1, 3]))
+
+    def test_comparison_chart_rendered_once(self):
+        bills = [BillRecord(account_number='A1', billing_period='01/01/2024 to 01/31/2024',
+                            total_amount_due=50.0, total_kwh=300.0),
+                 BillRecord(account_number='A1', billing_period='02/01/2024 to 02/29/2024',
+                            total_amount_due=40.0, total_kwh=250.0)]
+        cache = ChartCache(max_bytes=1 << 24)
+        with patch.object(bill_visualizer, 'chart_cache', return_value=cache), \
+                patch.object(bill_visualizer, '_comparison_chart', wraps=bill_visualizer._comparison_chart) as render:
+            first = bill_visualizer.get_monthly_comparison_chart(bills)
+            second = bill_visualizer.get_monthly_comparison_chart(bills)
+            svg = bill_visualizer.get_monthly_comparison_chart(bills, fmt='svg')
+
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith('<img src="data:image/png;base64,'))
+        self.assertTrue(svg.startswith('<img src="data:image/svg+xml;base64,'))
+        self.assertEqual(render.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_processing.columnar_cache import cache_path_for, load_cached_csv
+from src.data_processing.csv_bill_loader import BillDataManager
+
+CSV_CONTENT = (
+    "Account,Month,Usage (kWh),Final Monthly Bill ($)\n"
+    "00200,Jan,500,80.25\n"
+    "00100,Jan,300,40.00\n"
+    "00200,Feb,450,70.10\n"
+    "00100,Feb,320,42.50\n"
+)
+
+class TestColumnarCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp_dir.name, 'bills.csv')
+        self._write(CSV_CONTENT)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, content):
+        with open(self.csv_path, 'w') as f:
+            f.write(content)
+
+    def test_builds_cache_once_and_reuses_it(self):
+        first = load_cached_csv(self.csv_path)
+        self.assertTrue(os.path.exists(cache_path_for(self.csv_path)))
+        # Account IDs keep their leading zeros and rows are grouped by account
+        self.assertEqual(first['account'].tolist(), ['00100', '00100', '00200', '00200'])
+        self.assertEqual(first['month'].tolist(), ['Jan', 'Feb', 'Jan', 'Feb'])
+
+        with patch('src.data_processing.columnar_cache.pd.read_csv') as read_csv:
+            second = load_cached_csv(self.csv_path, columns=['account', 'usage (kwh)'])
+            read_csv.assert_not_called()
+        self.assertEqual(list(second.columns), ['account', 'usage (kwh)'])
+        self.assertEqual(second['usage (kwh)'].tolist(), [300, 320, 500, 450])
+
+    def test_touched_file_with_same_content_keeps_cache(self):
+        load_cached_csv(self.csv_path)
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+        with patch('src.data_processing.columnar_cache.pd.read_csv') as read_csv:
+            load_cached_csv(self.csv_path)
+            read_csv.assert_not_called()
+
+    def test_changed_file_rebuilds_cache(self):
+        load_cached_csv(self.csv_path)
+        self._write(CSV_CONTENT + "00300,Jan,100,10.00\n")
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+        data = load_cached_csv(self.csv_path)
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data['account'].iloc[-1], '00300')
+
+    def test_bill_data_manager_loads_through_cache(self):
+        manager = BillDataManager(self.csv_path)
+        self.assertEqual(manager.get_all_accounts(), ['00100', '00200'])
+        bills = manager.get_account_data('00200')['final monthly bill ($)'].astype(float).round(2).tolist()
+        self.assertEqual(bills, [80.25, 70.10])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,7 @@ import sys
 # Add the src directory to the path so we can import our modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.data_processing.csv_bill_loader import BillDataManager
+from src.data_processing.csv_bill_loader import BillDataManager, DISPLAY_COLUMNS
 
 class TestCSVBillLoader(unittest.TestCase):
     
@@ -85,5 +85,54 @@ class TestCSVBillLoader(unittest.TestCase):
         self.assertIn('feb', monthly_bills.columns)
         self.assertIn('mar', monthly_bills.columns)
 
+    def test_account_index_groups_rows_in_file_order(self):
+        manager = BillDataManager()
+        manager.data = pd.DataFrame({
+            'account': ['B', 'A', 'B', None, 'A', 'B'],
+            'month': ['Jan', 'Jan', 'Feb', 'Jan', 'Feb', 'Mar'],
+        })
+        
+        self.assertEqual(manager.get_all_accounts(), ['A', 'B'])
+        self.assertEqual(manager.get_account_data('B')['month'].tolist(), ['Jan', 'Feb', 'Mar'])
+        self.assertEqual(manager.get_account_data('A')['month'].tolist(), ['Jan', 'Feb'])
+        self.assertIsNone(manager.get_account_data('C'))
+    
+    def test_account_index_is_built_once(self):
+        manager = BillDataManager()
+        manager.data = self.sample_data.copy()
+        
+        with patch('src.data_processing.csv_bill_loader.pd.factorize', wraps=pd.factorize) as factorize:
+            for account in ['A001', 'A002', 'A003']:
+                self.assertEqual(len(manager.get_account_data(account)), 1)
+            manager.get_all_accounts()
+            self.assertEqual(factorize.call_count, 1)
+            
+            # Replacing the data invalidates the index
+            manager.data = self.sample_data.iloc[:1].copy()
+            self.assertEqual(manager.get_all_accounts(), ['A001'])
+            self.assertEqual(factorize.call_count, 2)
+
+    def test_display_schema_resolved_once_with_numeric_fields(self):
+        manager = BillDataManager()
+        manager.data = pd.DataFrame({
+            'account': ['A001', 'A002', 'A001'],
+            'month': ['Jan', 'Jan', 'Feb'],
+            'usage (kwh)': ['500', '300', '450'],
+            'cost for usage ($) ': [80.0, 40.0, 70.0],
+            'total credit for generation ($)': [10.0, 5.0, 12.5],
+            'final monthly bill ($)': ['70.00', '35.00', 'n/a'],
+        })
+        
+        display = manager.get_display_data('A001')
+        
+        self.assertEqual(manager.display_schema['Cost for Usage ($)'], 'cost for usage ($) ')
+        self.assertEqual(manager.display_schema['Credit for Generation ($)'], 'total credit for generation ($)')
+        self.assertNotIn('Generation (kWh)', manager.display_schema)
+        self.assertEqual(list(display.columns), DISPLAY_COLUMNS)
+        self.assertEqual(display['Usage (kWh)'].tolist(), [500, 450])
+        self.assertTrue(pd.api.types.is_numeric_dtype(display['Final Monthly Bill ($)']))
+        self.assertTrue(display['Final Monthly Bill ($)'].isna().iloc[1])
+        self.assertTrue(display['Generation (kWh)'].isna().all())
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,92 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import customer_database
+from src.utils.customer_database import CustomerRepository, fetch_customer_details
+
+class TestCustomerDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'customers.sqlite')
+        self.repository = CustomerRepository(self.db_path, cache_size=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_csv(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_seed_customer(self):
+        details = self.repository.get('100001')
+        self.assertEqual(details['first_name'], 'TEST Michael')
+        self.assertEqual(details['zip'], '94102')
+        self.assertIsNone(self.repository.get('999999'))
+
+        # Reopening does not duplicate the seed
+        self.assertEqual(CustomerRepository(self.db_path).count(), 1)
+
+    def test_import_and_fetch_many(self):
+        path = self.write_csv('customers.csv',
+                              "Account No,First Name,Last Name,Zip Code,Email,Notes\n"
+                              "00042,Ana,Lopez,02134,ana@example.com,x\n"
+                              "100002,Sarah,Johnson,,sarah@example.com,y\n")
+        stats = self.repository.import_csv(path)
+        self.assertEqual(stats['rows'], 2)
+        self.assertEqual(self.repository.count(), 3)
+
+        with mock.patch.object(customer_database, 'FETCH_BATCH', 2):
+            found = self.repository.fetch_many(['00042', '100002', '777', '100001', '00042'])
+        self.assertEqual(sorted(found), ['00042', '100001', '100002'])
+        self.assertEqual(found['00042']['zip'], '02134')
+        self.assertIsNone(found['100002']['zip'])
+        self.assertEqual(self.repository.fetch_many([]), {})
+
+        with self.assertRaises(ValueError):
+            self.repository.import_csv(self.write_csv('bad.csv', "name\nBob\n"))
+
+    def test_lru_cache(self):
+        self.repository.get('100001')
+        self.repository.get('100001')
+        info = self.repository.cache_info()
+        self.assertEqual((info['hits'], info['misses'], info['entries']), (1, 1, 1))
+
+        # A returned dict can be changed without touching the cache
+        self.repository.get('100001')['city'] = 'Oakland'
+        self.assertEqual(self.repository.get('100001')['city'], 'San Francisco')
+
+        # Imports invalidate cached customers
+        self.repository.import_csv(self.write_csv('update.csv', "account_number,city\n100001,Fresno\n"))
+        self.assertEqual(self.repository.cache_info()['entries'], 0)
+        self.assertEqual(self.repository.get('100001')['city'], 'Fresno')
+
+        self.repository.upsert_many([{'account_number': 'a'}, {'account_number': 'b'}])
+        for account in ('a', 'b', '100001'):
+            self.repository.get(account)
+        self.assertEqual(self.repository.cache_info()['entries'], 2)
+
+    def test_lookup_uses_primary_key(self):
+        plan = self.repository._connection().execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM customers WHERE account_number = ?", ('1',)).fetchall()
+        self.assertIn('PRIMARY KEY', ' '.join(row[-1] for row in plan))
+
+    def test_fetch_customer_details(self):
+        customer_database.customer_repository.cache_clear()
+        try:
+            with mock.patch.dict(os.environ, {'NEM_CUSTOMER_DB': os.path.join(self.tmp.name, 'env.sqlite')}):
+                self.assertEqual(fetch_customer_details(' 100001 ')['last_name'], 'TEST Anderson')
+                self.assertIsNone(fetch_customer_details('100003'))
+        finally:
+            customer_database.customer_repository.cache_clear()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_processing.csv_bill_loader import BillDataManager
+from src.data_processing.file_watch import BillFileWatcher
+from src.data_processing import incremental
+from src.data_processing.incremental import apply_file_changes, flush_cache
+from src.data_processing.shared_data import SharedBillData
+
+HEADER = "Account,Month,Usage (kWh),Generation (kWh),Cost for Usage ($),Credit for Generation ($),Final Monthly Bill ($)\n"
+ROWS = (
+    "0002,2024-01,500,100,80,10,70\n"
+    "0001,2024-01,300,400,40,50,-10\n"
+    "0003,2024-01,100,0,20,0,20\n"
+    "0002,2024-02,450,150,70,20,50\n"
+)
+
+class TestIncrementalReload(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp_dir.name, 'bills.csv')
+        self._write(HEADER + ROWS)
+        self.manager = BillDataManager(self.csv_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, content, mode='w'):
+        with open(self.csv_path, mode) as f:
+            f.write(content)
+
+    def assertMatchesFullLoad(self, updated):
+        # Parsed from scratch (a file object bypasses the columnar cache)
+        fresh = BillDataManager()
+        with open(self.csv_path, 'rb') as f:
+            self.assertTrue(fresh.load_data(f))
+        self.assertEqual(updated.get_all_accounts(), fresh.get_all_accounts())
+        for account in fresh.get_all_accounts():
+            self.assertEqual(updated.get_display_data(account)['Month'].tolist(),
+                             fresh.get_display_data(account)['Month'].tolist())
+            for column in ['Cost for Usage ($)', 'Final Monthly Bill ($)']:
+                self.assertEqual(updated.get_display_data(account)[column].astype(float).round(2).tolist(),
+                                 fresh.get_display_data(account)[column].astype(float).round(2).tolist())
+        pd.testing.assert_frame_equal(updated.get_aggregates().astype({'last_bill_date': str}),
+                                      fresh.get_aggregates().astype({'last_bill_date': str}),
+                                      check_dtype=False, atol=1e-3)
+
+    def test_appended_rows_are_parsed_alone(self):
+        self._write("0001,2024-02,310,380,41.5,45,-3.5\n0004,2024-02,10,0,2,0,2\n", mode='a')
+
+        with patch('src.data_processing.incremental.file_sha256') as full_hash:
+            updated = apply_file_changes(self.manager, self.csv_path)
+            full_hash.assert_not_called()
+        self.assertEqual(updated.load_stats['delta_rows'], 2)
+        self.assertMatchesFullLoad(updated)
+        # The loaded manager is left as it was
+        self.assertEqual(self.manager.get_all_accounts(), ['0001', '0002', '0003'])
+        # Two rows on a table of four are past CACHE_REWRITE_FRACTION, so the cache was
+        # rewritten and a cold start picks up the update without parsing
+        with patch('src.data_processing.columnar_cache.read_bill_csv') as read_bill_csv:
+            reloaded = BillDataManager(self.csv_path)
+            read_bill_csv.assert_not_called()
+        self.assertEqual(reloaded.get_all_accounts(), ['0001', '0002', '0003', '0004'])
+
+    def test_small_appends_defer_the_cache_rewrite(self):
+        with patch.object(incremental, 'CACHE_REWRITE_FRACTION', 1.0), \
+                patch.object(incremental, 'CACHE_REWRITE_DELTAS', 2), \
+                patch('src.data_processing.incremental.write_cache') as write_cache:
+            self._write("0003,2024-02,90,0,18,0,18\n", mode='a')
+            first = apply_file_changes(self.manager, self.csv_path)
+            write_cache.assert_not_called()
+            self.assertEqual((first.uncached_deltas, first.uncached_rows), (1, 1))
+            self._write("0003,2024-03,80,0,16,0,16\n", mode='a')
+            second = apply_file_changes(first, self.csv_path)
+            write_cache.assert_called_once()
+            self.assertEqual(second.uncached_deltas, 0)
+
+        # A pending delta is written by flush_cache (called at exit by the shared registry)
+        self._write("0003,2024-04,70,0,14,0,14\n", mode='a')
+        with patch.object(incremental, 'CACHE_REWRITE_FRACTION', 1.0):
+            third = apply_file_changes(second, self.csv_path)
+        self.assertTrue(flush_cache(third, self.csv_path))
+        self.assertFalse(flush_cache(third, self.csv_path))
+        with patch('src.data_processing.columnar_cache.read_bill_csv') as read_bill_csv:
+            reloaded = BillDataManager(self.csv_path)
+            read_bill_csv.assert_not_called()
+        self.assertEqual(len(reloaded.get_display_data('0003')), 4)
+
+    def test_partial_line_waits_for_newline(self):
+        self._write("0001,2024-02,310", mode='a')
+        self.assertIs(apply_file_changes(self.manager, self.csv_path), self.manager)
+
+        self._write(",380,41,45,-4\n", mode='a')
+        updated = apply_file_changes(self.manager, self.csv_path)
+        self.assertEqual(len(updated.get_display_data('0001')), 2)
+
+    def test_edited_rows_replace_only_changed_accounts(self):
+        self._write(HEADER + ROWS.replace("0003,2024-01,100,0,20,0,20\n", "").replace(",70,20,50", ",75,20,55"))
+
+        updated = apply_file_changes(self.manager, self.csv_path)
+        self.assertEqual(updated.load_stats['replaced_accounts'], 2)
+        self.assertMatchesFullLoad(updated)
+
+    def test_shared_registry_swaps_in_delta(self):
+        shared = SharedBillData(check_interval=0, updater=apply_file_changes)
+        with shared.lease(self.csv_path) as before:
+            self._write("0003,2024-02,90,0,18,0,18\n", mode='a')
+            with patch.object(BillDataManager, 'load_data') as load_data:
+                self.assertEqual(shared.refresh(self.csv_path), 2)
+                load_data.assert_not_called()
+            with shared.lease(self.csv_path) as after:
+                self.assertEqual(len(after.get_display_data('0003')), 2)
+            self.assertEqual(len(before.get_display_data('0003')), 1)
+
+    def test_watcher_refreshes_on_write(self):
+        shared = SharedBillData(check_interval=3600, updater=apply_file_changes)
+        shared.acquire(self.csv_path)
+        watcher = BillFileWatcher(shared, [self.csv_path], debounce=0.05).start()
+        try:
+            self._write("0003,2024-02,90,0,18,0,18\n", mode='a')
+            deadline = time.monotonic() + 5
+            while shared.version(self.csv_path) == 1 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            watcher.stop()
+        self.assertEqual(shared.version(self.csv_path), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import io
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_processing.ingest import read_bill_csv
+from src.data_processing.csv_bill_loader import BillDataManager
+
+CSV_CONTENT = (
+    "Account,Month,\"Usage\n(kWh)\",Cost for Usage ($),Final Monthly Bill ($),Notes\n"
+    "00200,Jan,500,\"$1,080.25\",80.25,ok\n"
+    "00100,Jan,300,$40.00,40,late\n"
+    "00200,Feb,450,$70.10,-12.5,\n"
+    "00100,Feb,,$42.50,42,ok\n"
+    "00300,Mar,200,$10.00,10,n/a\n"
+)
+
+class TestChunkedIngest(unittest.TestCase):
+
+    def test_chunks_are_coerced_and_downcast(self):
+        data, stats = read_bill_csv(io.StringIO(CSV_CONTENT), chunksize=2)
+
+        self.assertEqual(stats['chunks'], 3)
+        self.assertEqual(stats['rows'], 5)
+        self.assertGreater(stats['peak_rss_mb'], 0)
+        self.assertIn('load_seconds', stats)
+
+        # Header mapping: trimmed, single-line, lowercase
+        self.assertEqual(list(data.columns), ['account', 'month', 'usage (kwh)', 'cost for usage ($)',
+                                              'final monthly bill ($)', 'notes'])
+        self.assertIsInstance(data['account'].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(data['month'].dtype, pd.CategoricalDtype)
+        self.assertEqual(data['account'].tolist(), ['00200', '00100', '00200', '00100', '00300'])
+        # Money strings are parsed; a missing value makes the column float32 across all chunks
+        self.assertEqual(data['cost for usage ($)'].dtype, np.float32)
+        self.assertAlmostEqual(float(data['cost for usage ($)'].iloc[0]), 1080.25, places=2)
+        self.assertEqual(data['usage (kwh)'].dtype, np.float32)
+        self.assertEqual(data['final monthly bill ($)'].dtype, np.float32)
+        self.assertEqual(data['notes'].dtype, object)
+
+    def test_bill_data_manager_reports_load_stats(self):
+        manager = BillDataManager()
+        self.assertTrue(manager.load_data(io.StringIO(CSV_CONTENT)))
+
+        self.assertEqual(manager.load_stats['rows'], 5)
+        self.assertEqual(manager.load_stats['source'], 'csv')
+        self.assertEqual(manager.get_all_accounts(), ['00100', '00200', '00300'])
+        self.assertEqual(manager.get_account_data('00200')['month'].tolist(), ['Jan', 'Feb'])
+
+if __name__ == '__main__':
+    unittest.main()
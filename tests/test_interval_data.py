@@ -0,0 +1,176 @@
+import unittest
+import os
+import sys
+import tempfile
+import numpy as np
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_processing.interval_data import (IntervalChunk, IntervalStore, IntervalStoreWriter,
+                                               ingest_green_button, iter_green_button_xml)
+
+PGE_CSV = (
+    "Name,JANE DOE\n"
+    "Address,1 MAIN ST\n"
+    "Account Number,0012345\n"
+    "Service,Service 1\n"
+    "\n"
+    "TYPE,DATE,START TIME,END TIME,USAGE (kWh),COST,NOTES\n"
+    "Electric usage,2024-01-01,00:00,00:14,0.50,$0.10,\n"
+    "Electric usage,2024-01-01,00:15,00:29,-0.25,$0.00,\n"
+    "Electric usage,2024-01-01,00:30,00:44,\"1,000\",$0.10,\n"
+)
+
+MULTI_ACCOUNT_CSV = (
+    "Meter Number,Interval Start,Import (Wh),Export (Wh)\n"
+    "M2,2024-06-01T12:00:00-07:00,0,800\n"
+    "M1,2024-06-01 12:00,1500,0\n"
+    "M2,2024-06-01T11:00:00-07:00,200,0\n"
+)
+
+# ReadingTypes are listed after the interval blocks that use them
+ESPI_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:espi="http://naesb.org/espi">
+  <entry>
+    <link rel="self" href="/espi/Subscription/1/UsagePoint/7"/>
+    <title>Home meter</title>
+    <content><espi:UsagePoint/></content>
+  </entry>
+  <entry>
+    <link rel="self" href="/espi/LocalTimeParameters/1"/>
+    <content><espi:LocalTimeParameters><espi:dstOffset>3600</espi:dstOffset>
+      <espi:tzOffset>-28800</espi:tzOffset></espi:LocalTimeParameters></content>
+  </entry>
+  <entry>
+    <link rel="up" href="/espi/Subscription/1/UsagePoint/7/MeterReading/1/IntervalBlock"/>
+    <content><espi:IntervalBlock>
+      <espi:IntervalReading><espi:timePeriod><espi:duration>3600</espi:duration>
+        <espi:start>1704096000</espi:start></espi:timePeriod><espi:value>1500</espi:value></espi:IntervalReading>
+      <espi:IntervalReading><espi:timePeriod><espi:duration>3600</espi:duration>
+        <espi:start>1719792000</espi:start></espi:timePeriod><espi:value>500</espi:value></espi:IntervalReading>
+    </espi:IntervalBlock></content>
+  </entry>
+  <entry>
+    <link rel="up" href="/espi/Subscription/1/UsagePoint/7/MeterReading/2/IntervalBlock"/>
+    <content><espi:IntervalBlock>
+      <espi:IntervalReading><espi:timePeriod><espi:duration>3600</espi:duration>
+        <espi:start>1719792000</espi:start></espi:timePeriod><espi:value>2</espi:value></espi:IntervalReading>
+    </espi:IntervalBlock></content>
+  </entry>
+  <entry>
+    <link rel="self" href="/espi/Subscription/1/UsagePoint/7/MeterReading/1"/>
+    <link rel="related" href="/espi/ReadingType/1"/>
+    <link rel="related" href="/espi/Subscription/1/UsagePoint/7/MeterReading/1/IntervalBlock"/>
+    <content><espi:MeterReading/></content>
+  </entry>
+  <entry>
+    <link rel="self" href="/espi/Subscription/1/UsagePoint/7/MeterReading/2"/>
+    <link rel="related" href="/espi/ReadingType/2"/>
+    <link rel="related" href="/espi/Subscription/1/UsagePoint/7/MeterReading/2/IntervalBlock"/>
+    <content><espi:MeterReading/></content>
+  </entry>
+  <entry>
+    <link rel="self" href="/espi/ReadingType/1"/>
+    <content><espi:ReadingType><espi:flowDirection>1</espi:flowDirection>
+      <espi:powerOfTenMultiplier>0</espi:powerOfTenMultiplier><espi:uom>72</espi:uom></espi:ReadingType></content>
+  </entry>
+  <entry>
+    <link rel="self" href="/espi/ReadingType/2"/>
+    <content><espi:ReadingType><espi:flowDirection>19</espi:flowDirection>
+      <espi:powerOfTenMultiplier>3</espi:powerOfTenMultiplier><espi:uom>72</espi:uom></espi:ReadingType></content>
+  </entry>
+</feed>
+"""
+
+def local(text):
+    return np.datetime64(text, 's').astype(np.int64)
+
+class TestIntervalData(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _file(self, name, content):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_green_button_csv_and_xml_into_one_store(self):
+        sources = [self._file('pge.csv', PGE_CSV), self._file('meters.csv', MULTI_ACCOUNT_CSV),
+                   self._file('feed.xml', ESPI_XML)]
+        store = ingest_green_button(sources, os.path.join(self.tmp_dir.name, 'store'), chunksize=2)
+
+        self.assertEqual(sorted(store.accounts), ['0012345', 'Home meter', 'M1', 'M2'])
+        pge = store.get_account('0012345')
+        # Negative usage is export; thousands separators are parsed
+        np.testing.assert_allclose(pge['import_kwh'], [0.5, 0.0, 1000.0])
+        np.testing.assert_allclose(pge['export_kwh'], [0.0, 0.25, 0.0])
+
+        meter = store.get_account('M2')
+        # Wall-clock times in time order, Wh converted to kWh
+        self.assertEqual(meter['timestamp'].astype(str).tolist(), ['2024-06-01 11:00:00', '2024-06-01 12:00:00'])
+        np.testing.assert_allclose(meter['export_kwh'], [0.0, 0.8])
+
+        home = store.get_account('Home meter')
+        # 2024-01-01 08:00 UTC is midnight PST; 2024-07-01 00:00 UTC is 17:00 PDT
+        self.assertEqual(store.start[store.account_rows('Home meter')[0]], local('2024-01-01T00:00'))
+        self.assertEqual(home['timestamp'].astype(str).tolist()[-1], '2024-06-30 17:00:00')
+        # The import and export readings of one hour merge into one row
+        np.testing.assert_allclose(home['import_kwh'], [1.5, 0.5])
+        np.testing.assert_allclose(home['export_kwh'], [0.0, 2.0])
+
+        reopened = IntervalStore.open(os.path.join(self.tmp_dir.name, 'store'), mmap=False)
+        self.assertEqual(reopened.rows, store.rows)
+
+    def test_xml_is_streamed_per_block(self):
+        chunks = list(iter_green_button_xml(self._file('feed.xml', ESPI_XML), account='A1'))
+        self.assertEqual(len(chunks), 2)
+        self.assertTrue(all(chunk.account == 'A1' for chunk in chunks))
+
+    def test_reading_type_href_with_trailing_slash(self):
+        feed = ESPI_XML.replace('<link rel="self" href="/espi/ReadingType/2"/>',
+                                '<link rel="self" href="/espi/ReadingType/2/"/>')
+        chunks = list(iter_green_button_xml(self._file('feed.xml', feed), account='A1'))
+        self.assertEqual(len(chunks), 2)
+        np.testing.assert_allclose(chunks[1].export_kwh, [2.0])
+
+    def test_reingest_swaps_store(self):
+        store_path = os.path.join(self.tmp_dir.name, 'store')
+        first = ingest_green_button([self._file('pge.csv', PGE_CSV)], store_path)
+        second = ingest_green_button([self._file('meters.csv', MULTI_ACCOUNT_CSV)], store_path)
+
+        self.assertEqual(sorted(second.accounts), ['M1', 'M2'])
+        # Readers of the replaced store keep their mapped data
+        np.testing.assert_allclose(first.get_account('0012345')['import_kwh'], [0.5, 0.0, 1000.0])
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ['meters.csv', 'pge.csv', 'store'])
+
+        # A crash between the two renames leaves the old store aside, still readable
+        os.replace(store_path, store_path + '.old')
+        self.assertEqual(sorted(IntervalStore.open(store_path).accounts), ['M1', 'M2'])
+
+    def test_writer_groups_interleaved_chunks(self):
+        writer = IntervalStoreWriter(os.path.join(self.tmp_dir.name, 'store'), buckets=2)
+        starts = local('2024-01-01T00:00') + np.arange(4) * 900
+        writer.append(IntervalChunk(np.array(['B', 'A', 'B', 'C']), starts[::-1].copy(),
+                                    np.ones(4, np.float32), np.zeros(4, np.float32)))
+        writer.append(IntervalChunk('A', starts[:2], np.full(2, 3, np.float32), np.zeros(2, np.float32)))
+        store = writer.close()
+
+        self.assertEqual(store.rows, 6)
+        for account in store.accounts:
+            start, stop = store.account_rows(account)
+            self.assertTrue((np.diff(store.start[start:stop]) > 0).all())
+        a_rows = store.get_account('A')
+        self.assertEqual(a_rows['import_kwh'].tolist(), [3.0, 3.0, 1.0])
+        self.assertFalse([name for name in os.listdir(store_dir(store)) if name.startswith('_spool')])
+
+def store_dir(store):
+    return os.path.dirname(store.start.filename)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,9 @@ import sys
 # Add the src directory to the path so we can import our modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.pdf_processing.pdf_extractor import extract_with_openai
+from openai.openai_object import OpenAIObject
+
+from src.pdf_processing.pdf_extractor import extract_with_openai, select_bill_sections
 
 class TestOpenAIExtraction(unittest.TestCase):
     
@@ -80,5 +82,76 @@ class TestOpenAIExtraction(unittest.TestCase):
         self.assertEqual(result["charges_breakdown"][0]["charge_type"], "Electricity Used (Net Usage)")
         self.assertEqual(result["charges_breakdown"][0]["amount"], "5 kWh")
 
+    @patch('openai.ChatCompletion.create')
+    def test_extract_with_function_call(self, mock_openai):
+        # The model answers through the record_bill function with strict JSON arguments
+        arguments = json.dumps({
+            "bill_summary": {"account_number": "123456789", "total_amount_due": -17.02},
+            "charges_breakdown": [{"charge_type": "Wildfire Fund Charge", "amount": 2.93}]
+        })
+        message = {"role": "assistant", "content": None,
+                   "function_call": {"name": "record_bill", "arguments": arguments}}
+        # SDK responses are dicts, so usage is read by key
+        mock_openai.return_value = OpenAIObject.construct_from({
+            "choices": [{"message": message}],
+            "usage": {"prompt_tokens": 120, "completion_tokens": 40},
+        })
+        
+        bill_text = "\n".join(
+            ["Thank you for being a valued customer. Visit our website for energy saving tips."] * 50
+            + ["Account Number: 123456789", "Total Amount Due: -$17.02", "Wildfire Fund Charge: $2.93"]
+        )
+        
+        with self.assertLogs('src.pdf_processing.pdf_extractor', level='INFO') as logs:
+            result = extract_with_openai(bill_text)
+        
+        self.assertIn("prompt=120 completion=40", logs.output[0])
+        self.assertEqual(result["bill_summary"]["account_number"], "123456789")
+        self.assertEqual(result["bill_summary"]["note"], "Credit balance. No payment required.")
+        self.assertEqual(result["charges_breakdown"][0]["amount"], 2.93)
+        
+        kwargs = mock_openai.call_args.kwargs
+        self.assertEqual(kwargs["function_call"], {"name": "record_bill"})
+        amount = kwargs["functions"][0]["parameters"]["properties"]["charges_breakdown"]["items"]["properties"]["amount"]
+        self.assertEqual(amount, {"type": "number"})
+        prompt = kwargs["messages"][-1]["content"]
+        self.assertNotIn("valued customer", prompt)
+        self.assertIn("Wildfire Fund Charge: $2.93", prompt)
+    
+    @patch('openai.ChatCompletion.create')
+    def test_function_call_message_types(self, mock_openai):
+        arguments = json.dumps({"bill_summary": {"account_number": "42"}, "charges_breakdown": []})
+        message = {"role": "assistant", "content": None,
+                   "function_call": {"name": "record_bill", "arguments": arguments}}
+        replies = [
+            message,
+            OpenAIObject.construct_from(message),
+            MagicMock(content=None, function_call=MagicMock(arguments=arguments)),
+        ]
+        for reply in replies:
+            mock_openai.return_value = MagicMock(choices=[MagicMock(message=reply)])
+            self.assertEqual(extract_with_openai("Account Number: 42")["bill_summary"]["account_number"], "42")
+        
+        # A reply with neither arguments nor content is reported, not a TypeError
+        mock_openai.return_value = MagicMock(choices=[MagicMock(message={"role": "assistant", "content": None})])
+        result = extract_with_openai("Account Number: 42")
+        self.assertIn("neither function-call arguments nor content", result["error"])
+    
+    def test_select_bill_sections(self):
+        text = """
+        Sign up for paperless billing today!
+        ACCOUNT NUMBER 1234 5678
+        Electricity Delivery Charges
+        $31.47
+        Community events this summer at the park
+        """
+        sections = select_bill_sections(text)
+        
+        self.assertEqual(sections.splitlines(), [
+            "ACCOUNT NUMBER 1234 5678",
+            "Electricity Delivery Charges",
+            "$31.47",
+        ])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -12,8 +12,10 @@ import matplotlib.pyplot as plt
 # Add the src directory to the path so we can import our modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.pdf_processing.pdf_extractor import extract_bill_data, BillParser
+from src.pdf_processing.pdf_extractor import extract_bill_data, stream_bill_text, BillParser
 from src.pdf_processing.parser_rules import ParserRuleSet
+from src.pdf_processing.utility_detector import KeywordAutomaton
+from src.pdf_processing.rule_registry import DEFAULT_RULES_PATH, RuleRegistry
 
 class TestPDFProcessing(unittest.TestCase):
     
@@ -83,6 +85,74 @@ class TestPDFProcessing(unittest.TestCase):
         
         # Check NEM details
         self.assertEqual(result['nem_details']['credits'], "0.00")
+        self.assertEqual(set(result['bill_summary']),
+                         {'account_number', 'billing_period', 'total_amount_due', 'due_date', 'total_kwh'})
+        self.assertEqual(result['charges_breakdown'], [
+            {'charge_type': 'Generation Charges', 'amount': '75.00'},
+            {'charge_type': 'Delivery Charges', 'amount': '48.45'},
+        ])
+    
+    @patch('src.pdf_processing.pdf_extractor.extract_with_openai')
+    @patch('pdfplumber.open')
+    def test_extract_bill_data_streaming_stops_early(self, mock_pdf_open, mock_openai):
+        """Streaming mode stops reading pages once all summary fields are found."""
+        summary_page = MagicMock()
+        summary_page.extract_text.return_value = """
+        Account Number: 123456789
+        Billing Period: January 1, 2023 to January 31, 2023
+        Total Amount Due: $123.45
+        Due Date: February 15, 2023
+        Total kWh Used: 500
+        """
+        charges_page = MagicMock()
+        charges_page.extract_text.return_value = """
+        Generation Charges: $75.00
+        Delivery Charges: $48.45
+        NEM Credits: $0.00
+        """
+        appendix_pages = [MagicMock() for _ in range(8)]
+        mock_pdf = MagicMock()
+        mock_pdf.pages = [summary_page, charges_page] + appendix_pages
+        mock_pdf_open.return_value.__enter__.return_value = mock_pdf
+        mock_openai.return_value = {"bill_summary": {"total_amount_due": "120.00", "account_number": ""},
+                                    "charges_breakdown": []}
+        
+        result = extract_bill_data(io.BytesIO(b"mock pdf content"), streaming=True, max_llm_chars=5000)
+        
+        for page in appendix_pages:
+            page.extract_text.assert_not_called()
+        sent_text = mock_openai.call_args[0][0]
+        self.assertIn("Account Number: 123456789", sent_text)
+        self.assertIn("NEM Credits", sent_text)
+        
+        # Fields the LLM left empty are filled from the streamed summary; its own values win
+        self.assertEqual(result['bill_summary']['account_number'], "123456789")
+        self.assertEqual(result['bill_summary']['total_amount_due'], "120.00")
+        self.assertEqual(result['bill_summary']['total_kwh'], "500")
+        self.assertEqual(result['nem_details']['credits'], "0.00")
+        self.assertEqual(set(result['bill_summary']),
+                         {'account_number', 'billing_period', 'total_amount_due', 'due_date', 'total_kwh'})
+        self.assertEqual(result['charges_breakdown'], [
+            {'charge_type': 'Generation Charges', 'amount': '75.00'},
+            {'charge_type': 'Delivery Charges', 'amount': '48.45'},
+        ])
+    
+    def test_stream_bill_text_caps_llm_text(self):
+        """The text forwarded to the LLM never exceeds the cap."""
+        pages = []
+        for _ in range(10):
+            page = MagicMock()
+            page.extract_text.return_value = "usage detail " * 100
+            pages.append(page)
+        mock_pdf = MagicMock()
+        mock_pdf.pages = pages
+        
+        text, found, pages_read = stream_bill_text(mock_pdf, {'total_amount': r'Total\s*Amount\s*Due[:\s]*\$?([0-9,.]+)'}, max_chars=2000)
+        
+        self.assertLessEqual(len(text), 2000)
+        self.assertEqual(found, {})
+        self.assertEqual(pages_read, 2)
+        pages[2].extract_text.assert_not_called()
     
     def test_parser_rules(self):
         """Test the utility-specific parser rules."""
@@ -106,6 +176,89 @@ class TestPDFProcessing(unittest.TestCase):
         self.assertEqual(generic_rules.utility_name, "unknown")
         self.assertIn('account_number', generic_rules.patterns)
 
+    def test_detect_utility_from_header(self):
+        """Utility detection uses the first page header and word boundaries."""
+        utility, confidence = ParserRuleSet.detect_utility("SDG&E\nSan Diego Gas & Electric\nACCOUNT NUMBER 123")
+        self.assertEqual(utility, "sdge")
+        self.assertGreater(confidence, 0.9)
+        
+        self.assertEqual(ParserRuleSet.detect_utility_from_text("Pacific Gas and Electric Company"), "pge")
+        self.assertEqual(ParserRuleSet.detect_utility_from_text("Southern California Edison"), "sce")
+        
+        # "sce" inside other words must not count as Southern California Edison
+        self.assertEqual(ParserRuleSet.detect_utility_from_text("Scenic views and science fairs"), "generic")
+        
+        # Evidence for several utilities lowers the confidence
+        _, mixed = ParserRuleSet.detect_utility("SDG&E bill. Previously served by PG&E.")
+        self.assertLess(mixed, 0.9)
+    
+    def test_keyword_automaton_finds_overlapping_keywords(self):
+        automaton = KeywordAutomaton(["he", "she", "hers", "his"])
+        found = sorted(automaton.search("ushers"))
+        self.assertEqual(found, [(1, "she"), (2, "he"), (2, "hers")])
+    
+    def test_bill_parser_dispatches_on_detected_utility(self):
+        """BillParser uses the rule set of the utility detected on page one."""
+        first_page = MagicMock()
+        first_page.extract_text.return_value = (
+            "Southern California Edison\n"
+            "Account number: 700123456\n"
+            "Total amount due: $50.00\n"
+            "Payment Due by: March 1, 2024\n"
+        )
+        first_page.extract_tables.return_value = []
+        mock_pdf = MagicMock()
+        mock_pdf.pages = [first_page]
+        
+        result = BillParser().parse_bill(mock_pdf)
+        
+        self.assertEqual(result['utility'], "sce")
+        self.assertEqual(result['billing_summary']['due_date'], "March 1, 2024")
+        self.assertEqual(result['billing_summary']['total_amount'], "50.00")
+        self.assertEqual(result['rule_version'], ParserRuleSet("sce").version)
+
+class TestRuleRegistry(unittest.TestCase):
+    
+    def setUp(self):
+        import tempfile
+        with open(DEFAULT_RULES_PATH, 'r', encoding='utf-8') as f:
+            self.original = f.read()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'parser_rules.yaml')
+        self._write(self.original)
+        self.registry = RuleRegistry(self.path, check_interval=0)
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def _write(self, content):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        # Make sure the change is visible even on filesystems with coarse mtimes
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    
+    def test_reloads_changed_rules_and_versions_per_utility(self):
+        before = self.registry.current()
+        self._write(self.original.replace(
+            "Payment\\s*Due\\s*by", "Pay\\s*by"))
+        after = self.registry.current()
+        
+        self.assertIsNot(before, after)
+        self.assertNotEqual(before.version, after.version)
+        self.assertIn('Pay', after.patterns['sce']['due_date'])
+        # Only the edited utility's rule version changes
+        self.assertNotEqual(before.utility_versions['sce'], after.utility_versions['sce'])
+        self.assertEqual(before.utility_versions['sdge'], after.utility_versions['sdge'])
+        # Unchanged file keeps the same snapshot
+        self.assertIs(self.registry.current(), after)
+    
+    def test_invalid_rules_keep_previous_snapshot(self):
+        before = self.registry.current()
+        self._write(self.original.replace("Account\\s*No[:", "Account\\s*No([:"))
+        self.assertIs(self.registry.current(), before)
+        self.assertIn('account_number', self.registry.current().compiled['pge'])
+
 def visualize_bill_data(bill_data: dict):
     """
     Create visualizations for the extracted bill data.
@@ -0,0 +1,87 @@
+import unittest
+import os
+import sys
+import threading
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+from benchmarks.soak_rendering import live_artists, sample_bills
+from src.data_processing.charts import COMPACT_STYLE, REPORT_STYLE, breakdown_chart
+from src.utils.rendering import new_figure, render_chart
+
+class TestRendering(unittest.TestCase):
+
+    def test_figure_released_after_render(self):
+        built = []
+
+        def build(fig):
+            fig.subplots().plot([1, 2, 3])
+            built.append(fig)
+
+        self.assertTrue(render_chart(build, (2, 1.5), 'png', dpi=50).startswith(b'\x89PNG'))
+        self.assertEqual(built[0].axes, [])
+
+        # Released on errors as well
+        with self.assertRaises(RuntimeError):
+            with new_figure((2, 1.5)) as fig:
+                fig.subplots()
+                raise RuntimeError("draw failed")
+        self.assertEqual(fig.axes, [])
+
+    def test_no_global_state(self):
+        before = dict(matplotlib.rcParams)
+        breakdown_chart(sample_bills(), dpi=50)
+        breakdown_chart(sample_bills(), style=REPORT_STYLE, figsize=(6, 4), dpi=50)
+        self.assertEqual(dict(matplotlib.rcParams), before)
+        self.assertEqual(plt.get_fignums(), [])
+
+    def test_concurrent_renders_match_serial(self):
+        bills = sample_bills()
+        styles = [COMPACT_STYLE, REPORT_STYLE]
+        expected = [breakdown_chart(bills, style=style, figsize=(4, 3), dpi=50) for style in styles]
+        results = {}
+
+        def worker(i):
+            results[i] = breakdown_chart(bills, style=styles[i % 2], figsize=(4, 3), dpi=50)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for i, data in results.items():
+            self.assertEqual(data, expected[i % 2])
+
+    def test_renders_are_not_serialized(self):
+        # Both builds must be running at once to get past the barrier
+        barrier = threading.Barrier(2, timeout=10)
+        results = []
+
+        def build(fig):
+            fig.subplots().plot([1, 2, 3])
+            barrier.wait()
+
+        threads = [threading.Thread(target=lambda: results.append(render_chart(build, (2, 1.5), 'png', dpi=30)))
+                   for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 2)
+        self.assertFalse(barrier.broken)
+
+    def test_memory_flat_over_repeated_renders(self):
+        # A short version of benchmarks/soak_rendering.py
+        bills = sample_bills()
+        breakdown_chart(bills, dpi=30)
+        baseline = live_artists()
+        for _ in range(30):
+            breakdown_chart(bills, dpi=30)
+        self.assertEqual(live_artists(), baseline)
+
+if __name__ == '__main__':
+    unittest.main()
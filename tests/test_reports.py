@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import matplotlib.pyplot as plt
+
+from src.data_processing.csv_bill_loader import BillDataManager
+from src.data_processing.reports import account_metrics, render_report, report_filename, run_reports
+
+CSV_CONTENT = (
+    "Account,Month,Usage (kWh),Generation (kWh),Cost for Usage ($),Credit for Generation ($),Final Monthly Bill ($)\n"
+    "A2,2024-01,500,100,80.00,10.00,70.00\n"
+    "A1,2024-01,300,400,40.00,50.00,-10.00\n"
+    "A2,2024-02,450,150,70.00,20.00,50.00\n"
+    "A1,2024-02,310,380,41.00,45.00,\n"
+    "A/3,2024-01,100,0,20.00,0.00,20.00\n"
+)
+
+class TestReports(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp_dir.name, 'bills.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write(CSV_CONTENT)
+        self.manager = BillDataManager(self.csv_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_metrics_match_aggregates(self):
+        display = self.manager.get_display_data('A2')
+        from_rows = account_metrics(display)
+        from_summary = account_metrics(display, self.manager.get_account_summary('A2'))
+        self.assertEqual(from_rows, from_summary)
+        self.assertAlmostEqual(from_rows['net_balance'], 120.0)
+        self.assertAlmostEqual(from_rows['difference'], 0.0)
+
+    def test_render_formats(self):
+        display = self.manager.get_display_data('A1')
+        self.assertTrue(render_report(display, 'A1', 'png').startswith(b'\x89PNG'))
+        self.assertTrue(render_report(display, 'A1', 'pdf').startswith(b'%PDF'))
+        page = render_report(display, 'A1', 'html').decode('utf-8')
+        self.assertIn('data:image/png;base64,', page)
+        self.assertIn('Account A1', page)
+        with self.assertRaises(ValueError):
+            render_report(display, 'A1', 'gif')
+        # Rendering must not register figures with pyplot
+        self.assertEqual(plt.get_fignums(), [])
+
+    def test_run_reports(self):
+        output_dir = os.path.join(self.tmp_dir.name, 'reports')
+        stats = run_reports(self.manager, self.csv_path, output_dir, 'html', chunk_accounts=2,
+                            accounts=['A1', 'A2', 'A/3', 'A9'])
+
+        self.assertEqual(stats['accounts'], 3)
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(stats['errors'][0][0], 'A9')
+        self.assertEqual(sorted(os.listdir(output_dir)), ['A1.html', 'A2.html', 'A_3.html'])
+        self.assertEqual(report_filename('A/3', 'pdf'), 'A_3.pdf')
+
+    def test_worker_processes(self):
+        output_dir = os.path.join(self.tmp_dir.name, 'reports')
+        stats = run_reports(self.manager, self.csv_path, output_dir, 'png', workers=2, chunk_accounts=1)
+
+        self.assertEqual(stats['accounts'], 3)
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(len(os.listdir(output_dir)), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_processing.csv_bill_loader import BillDataManager
+from src.data_processing.savings import rank_savings, savings_metrics
+
+class TestSavings(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        rows = 600
+        self.data = pd.DataFrame({
+            'account': rng.choice([f"A{i:03d}" for i in range(40)], size=rows),
+            'month': rng.choice(['Jan', 'Feb', 'Mar', 'Apr'], size=rows),
+            'cost for usage ($)': rng.uniform(20, 200, size=rows).round(2),
+            'credit for generation ($)': rng.uniform(0, 250, size=rows).round(2),
+            'final monthly bill ($)': rng.uniform(0, 150, size=rows).round(2),
+        })
+        self.data.loc[5, 'final monthly bill ($)'] = np.nan
+        self.manager = BillDataManager()
+        self.manager.data = self.data
+
+    def test_matches_per_account_definitions(self):
+        table = self.manager.get_savings_table().set_index('account')
+
+        for account, bills in self.data.groupby('account'):
+            metrics = savings_metrics(bills['cost for usage ($)'].sum(),
+                                      bills['credit for generation ($)'].sum(),
+                                      bills['final monthly bill ($)'].sum())
+            row = table.loc[account]
+            self.assertEqual(row['months'], len(bills))
+            self.assertAlmostEqual(row['net_balance'], metrics['net_balance'], places=6)
+            self.assertAlmostEqual(row['difference'], metrics['difference'], places=6)
+
+    def test_ranked_by_savings_with_recommendation(self):
+        table = self.manager.get_savings_table()
+
+        self.assertEqual(len(table), self.data['account'].nunique())
+        self.assertTrue(table['difference'].is_monotonic_decreasing)
+        self.assertTrue((table.loc[table['difference'] > 0.01, 'recommendation'] == 'annual').all())
+        self.assertTrue((table.loc[table['difference'] < -0.01, 'recommendation'] == 'monthly').all())
+        # Computed once per dataset
+        self.assertIs(self.manager.get_savings_table(), table)
+
+    def test_rank_savings_on_plain_frame(self):
+        totals = pd.DataFrame({
+            'account': ['Y', 'X'],
+            'total_consumption': [30.0, 150.0],
+            'total_generation': [0.0, 90.0],
+            'monthly_bills_total': [30.0, 80.0],
+        })
+        table = rank_savings(totals)
+
+        self.assertEqual(table['account'].tolist(), ['X', 'Y'])
+        self.assertEqual(table['net_balance'].tolist(), [60.0, 30.0])
+        self.assertEqual(table['difference'].tolist(), [20.0, 0.0])
+        self.assertEqual(table['recommendation'].tolist(), ['annual', 'either'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import tempfile
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_processing.shared_data import SharedBillData
+
+class TestSharedBillData(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp_dir.name, 'bills.csv')
+        self._write("Account,Month\nA001,Jan\n")
+        self.loader = MagicMock(side_effect=lambda path: MagicMock(name=f"manager:{path}"))
+        self.registry = SharedBillData(loader=self.loader, check_interval=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, content):
+        with open(self.csv_path, 'w') as f:
+            f.write(content)
+
+    def _bump_mtime(self):
+        stat = os.stat(self.csv_path)
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_sessions_share_one_manager(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            managers = list(executor.map(self.registry.acquire, [self.csv_path] * 16))
+
+        self.assertEqual(self.loader.call_count, 1)
+        self.assertTrue(all(manager is managers[0] for manager in managers))
+        self.assertEqual(self.registry.stats()[os.path.abspath(self.csv_path)]['refs'], 16)
+        for manager in managers:
+            self.registry.release(manager)
+        self.assertEqual(self.registry.stats()[os.path.abspath(self.csv_path)]['refs'], 0)
+
+    def test_changed_file_swaps_in_new_manager(self):
+        old = self.registry.acquire(self.csv_path)
+        self._write("Account,Month\nA001,Jan\nA002,Jan\n")
+        self._bump_mtime()
+
+        with self.registry.lease(self.csv_path) as new:
+            self.assertIsNot(new, old)
+            self.assertEqual(self.registry.version(self.csv_path), 2)
+            # The old manager stays retired until its lease ends
+            self.assertEqual(self.registry.stats()[os.path.abspath(self.csv_path)]['retired'], 1)
+            old.close.assert_not_called()
+
+        self.registry.release(old)
+        stats = self.registry.stats()[os.path.abspath(self.csv_path)]
+        self.assertEqual((stats['refs'], stats['retired']), (0, 0))
+        self.assertEqual(self.loader.call_count, 2)
+        # Dropped with its last lease
+        old.close.assert_called_once()
+        new.close.assert_not_called()
+
+    def test_unleased_manager_is_closed_when_replaced(self):
+        with self.registry.lease(self.csv_path) as old:
+            pass
+        self._write("Account,Month\nA001,Jan\nA002,Jan\n")
+        self._bump_mtime()
+
+        self.registry.refresh(self.csv_path)
+        old.close.assert_called_once()
+        self.assertEqual(self.registry.stats()[os.path.abspath(self.csv_path)]['retired'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
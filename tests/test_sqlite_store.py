@@ -0,0 +1,83 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_processing.csv_bill_loader import BillDataManager
+from src.data_processing.sqlite_store import SQLiteBillDataManager, database_path_for
+
+CSV_CONTENT = (
+    "Account,Month,Usage (kWh),Cost for Usage ($),Credit for Generation ($),Final Monthly Bill ($)\n"
+    "00200,Jan,500,80.10,10.00,70.10\n"
+    "00100,Jan,300,40.00,50.00,-10.00\n"
+    "00200,Feb,450,70.00,20.00,50.00\n"
+    "00110,Jan,320,42.50,0.00,42.50\n"
+    "00100,Feb,310,41.00,45.00,0.00\n"
+)
+
+class TestSQLiteBillDataManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp_dir.name, 'bills.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write(CSV_CONTENT)
+        self.store = SQLiteBillDataManager(self.csv_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_import_and_queries(self):
+        self.assertEqual(self.store.load_stats['source'], 'csv')
+        self.assertEqual(self.store.load_stats['rows'], 5)
+        self.assertTrue(os.path.exists(database_path_for(self.csv_path)))
+
+        self.assertEqual(self.store.get_all_accounts(), ['00100', '00110', '00200'])
+        bills = self.store.get_account_data('00200')
+        self.assertEqual(bills['month'].tolist(), ['Jan', 'Feb'])
+        self.assertEqual(bills['final monthly bill ($)'].tolist(), [70.10, 50.00])
+        self.assertIsNone(self.store.get_account_data('99999'))
+
+        display = self.store.get_display_data('00100')
+        self.assertEqual(display['Cost for Usage ($)'].tolist(), [40.0, 41.0])
+
+    def test_reopens_existing_database_without_import(self):
+        reopened = SQLiteBillDataManager(self.csv_path)
+        self.assertEqual(reopened.load_stats['source'], 'sqlite')
+        self.assertEqual(reopened.get_all_accounts(), self.store.get_all_accounts())
+
+    def test_close_closes_every_thread_connection(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            connections = list(executor.map(lambda _: self.store._connection(), range(2)))
+        connections.append(self.store._connection())
+        self.store.close()
+
+        for conn in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+        # A later query opens a new connection
+        self.assertEqual(self.store.get_all_accounts(), ['00100', '00110', '00200'])
+
+    def test_accounts_page(self):
+        self.assertEqual(self.store.get_accounts_page(limit=2), ['00100', '00110'])
+        self.assertEqual(self.store.get_accounts_page(after='00110', limit=2), ['00200'])
+        self.assertEqual(self.store.get_accounts_page(prefix='001'), ['00100', '00110'])
+
+    def test_matches_dataframe_backend(self):
+        manager = BillDataManager(self.csv_path)
+        self.assertEqual(manager.get_accounts_page(prefix='001'), self.store.get_accounts_page(prefix='001'))
+
+        expected = manager.get_savings_table()
+        actual = self.store.get_savings_table()
+        self.assertEqual(actual['account'].tolist(), expected['account'].tolist())
+        for column in ['months', 'net_balance', 'difference']:
+            for a, b in zip(actual[column], expected[column]):
+                self.assertAlmostEqual(float(a), float(b), places=3)
+
+if __name__ == '__main__':
+    unittest.main()
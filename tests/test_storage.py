@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch
+import io
+import os
+import sys
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.pages import upload_bill
+from src.utils.storage import spooled_upload, upload_fingerprint, UploadTooLargeError
+
+class TestSpooledUpload(unittest.TestCase):
+    
+    def test_spools_to_temp_file_and_cleans_up(self):
+        upload = io.BytesIO(b"%PDF-1.4 " + b"x" * 5000)
+        upload.read(10)  # Position should not matter
+        
+        with spooled_upload(upload, max_bytes=10000) as path:
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), upload.getvalue())
+        
+        self.assertFalse(os.path.exists(path))
+    
+    def test_rejects_oversized_upload(self):
+        upload = io.BytesIO(b"x" * 3000)
+        
+        with self.assertRaises(UploadTooLargeError):
+            with spooled_upload(upload, max_bytes=1000):
+                pass
+    
+    def test_rejects_by_declared_size_before_copying(self):
+        upload = io.BytesIO(b"x" * 10)
+        upload.size = 5 * 1024 * 1024
+        
+        with self.assertRaises(UploadTooLargeError):
+            with spooled_upload(upload, max_bytes=1024 * 1024):
+                pass
+        self.assertEqual(upload.tell(), 0)
+    
+    @patch('app.pages.upload_bill.st')
+    def test_upload_page_reports_oversized_upload(self, mock_st):
+        upload = io.BytesIO(b"x" * 10)
+        upload.size = 30 * 1024 * 1024
+        
+        with patch.dict(os.environ, {'NEM_MAX_UPLOAD_MB': '25'}):
+            result = upload_bill.extract_bill_data(upload)
+        
+        self.assertIn("limit is 25.0 MB", result["Error"])
+        self.assertIn("limit is 25.0 MB", mock_st.error.call_args[0][0])
+    
+    def test_upload_fingerprint(self):
+        upload = io.BytesIO(b"data")
+        upload.id = "abc123"
+        self.assertEqual(upload_fingerprint(upload), "abc123")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+import numpy as np
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_processing.interval_data import IntervalStore
+from src.data_processing.true_up import RateSchedule, load_rate_schedules, monthly_balances, simulate_store
+
+SCHEDULE = {
+    'periods': [
+        {'name': 'weekend_peak', 'days': 'weekend', 'hours': [16, 21]},
+        {'name': 'on_peak', 'hours': [16, 21]},
+        {'name': 'night', 'hours': [22, 2]},
+        {'name': 'off_peak'},
+    ],
+    'import_rates': {'weekend_peak': 0.30, 'on_peak': 0.50, 'night': 0.10, 'off_peak': 0.20},
+    'non_bypassable': 0.05,
+    'net_surplus_rate': 0.04,
+    'monthly_fixed': 10.0,
+}
+
+def local(text):
+    return np.datetime64(text, 's').astype(np.int64)
+
+class TestTrueUp(unittest.TestCase):
+
+    def setUp(self):
+        self.schedule = RateSchedule('test', SCHEDULE)
+        # 2024-01-01 is a Monday, 2024-02-03 a Saturday
+        start = np.array([local('2024-01-01T12:00'), local('2024-01-01T17:00'), local('2024-02-03T17:00'),
+                          local('2024-01-01T12:00')])
+        self.store = IntervalStore(
+            ['X', 'Y'], np.array([0, 3, 4]), start,
+            import_kwh=np.array([0, 10, 0, 5], dtype=np.float32),
+            export_kwh=np.array([20, 0, 10, 0], dtype=np.float32))
+
+    def test_period_lookup(self):
+        periods = [self.schedule.periods[i] for i in self.schedule.period_index(np.array([
+            local('2024-01-01T17:00'), local('2024-02-03T17:00'), local('2024-01-01T23:00'),
+            local('2024-01-02T01:45'), local('2024-01-02T02:00')]))]
+        self.assertEqual(periods, ['on_peak', 'weekend_peak', 'night', 'night', 'off_peak'])
+        # Without export rates, exports earn the import rate less non-bypassable charges
+        np.testing.assert_allclose(self.schedule.export_prices, [0.25, 0.45, 0.05, 0.15])
+
+    def test_monthly_and_annual_true_up(self):
+        monthly, annual = simulate_store(self.store, self.schedule, batch_accounts=1)
+
+        x = monthly[monthly['account'] == 'X']
+        self.assertEqual(x['month'].tolist(), ['2024-01', '2024-02'])
+        # January: 10 kWh on-peak import ($5) less 20 kWh off-peak export ($3)
+        np.testing.assert_allclose(x['net_charge'], [12.0, 7.5])
+        np.testing.assert_allclose(x['running_balance'], [2.0, -0.5])
+
+        row = annual.set_index('account').loc['X']
+        self.assertEqual(row['months'], 2)
+        # Monthly: $12 + the $10 minimum; annual: credits carried, fixed charges only
+        self.assertAlmostEqual(row['monthly_settlement'], 22.0)
+        self.assertAlmostEqual(row['true_up'], 20.0)
+        self.assertAlmostEqual(row['net_surplus_payment'], 20 * 0.04)
+        self.assertAlmostEqual(row['savings'], 22.0 - (20.0 - 0.8))
+        self.assertAlmostEqual(annual.set_index('account').loc['Y', 'true_up'], 11.0)
+
+    def test_batches_match_single_pass(self):
+        together = monthly_balances(self.schedule, self.store.accounts, self.store.offsets,
+                                    self.store.start, self.store.import_kwh, self.store.export_kwh)
+        batched, _ = simulate_store(self.store, self.schedule, batch_accounts=1)
+        np.testing.assert_allclose(together['net_charge'], batched['net_charge'])
+
+    def test_configured_schedules_compile(self):
+        schedules = load_rate_schedules()
+        self.assertIn('tou_nem2', schedules)
+        nem3 = schedules['tou_nem3']
+        self.assertLess(nem3.export_prices.max(), nem3.import_prices.min())
+
+    def test_incomplete_schedule_is_rejected(self):
+        with self.assertRaises(ValueError):
+            RateSchedule('bad', {'periods': [{'name': 'on_peak', 'hours': [16, 21]}],
+                                 'import_rates': {'on_peak': 0.5}})
+        with self.assertRaises(ValueError):
+            RateSchedule('bad', {'periods': [{'name': 'all'}], 'import_rates': {}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+import numpy as np
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import altair as alt
+
+from benchmarks.soak_rendering import sample_bills
+from src.data_processing.savings import BILL_COL, COST_COL, CREDIT_COL
+from src.pdf_processing import bill_visualizer
+from src.pdf_processing.bill_record import BillRecord
+from src.utils.vega_charts import breakdown_spec, chart_renderer, charges_pie_spec, comparison_spec
+
+def validate(spec):
+    """Parse a spec with Altair, which checks it against the Vega-Lite schema."""
+    chart_class = alt.LayerChart if 'layer' in spec else alt.Chart
+    return chart_class.from_dict({'$schema': 'https://vega.github.io/schema/vega-lite/v5.json', **spec})
+
+class TestVegaCharts(unittest.TestCase):
+
+    def test_specs_are_valid_vega_lite(self):
+        bills = sample_bills()
+        validate(breakdown_spec(bills, COST_COL, CREDIT_COL, BILL_COL))
+        validate(charges_pie_spec(['Generation', 'Delivery'], [60.0, 40.0]))
+        validate(comparison_spec(['Jan 2024', 'Feb 2024'], [50.0, 40.0], [300.0, 250.0]))
+
+    def test_breakdown_values(self):
+        bills = sample_bills(months=2)
+        bills.loc[1, BILL_COL] = np.nan
+        values = breakdown_spec(bills, COST_COL, CREDIT_COL, BILL_COL)['data']['values']
+
+        self.assertEqual([v['Month'] for v in values], ['2024-01', '2024-02'])
+        self.assertAlmostEqual(values[0]['Credit'], -bills.loc[0, CREDIT_COL])
+        self.assertIsNone(values[1]['Bill'])
+
+    def test_renderer_setting(self):
+        with patch.dict(os.environ, {'NEM_CHART_RENDERER': 'Vega'}):
+            self.assertEqual(chart_renderer(), 'vega')
+        with patch.dict(os.environ, {'NEM_CHART_RENDERER': 'svg'}):
+            self.assertEqual(chart_renderer(), 'matplotlib')
+
+    def test_comparison_chart_in_vega_mode(self):
+        bills = [BillRecord(account_number='A1', billing_period='01/01/2024 to 01/31/2024',
+                            total_amount_due=50.0, total_kwh=300.0)]
+        with patch.dict(os.environ, {'NEM_CHART_RENDERER': 'vega'}), \
+                patch.object(bill_visualizer.st, 'vega_lite_chart') as vega_lite_chart, \
+                patch.object(bill_visualizer, '_comparison_chart') as render:
+            bill_visualizer.display_monthly_comparison_chart(bills)
+
+        spec = vega_lite_chart.call_args.kwargs['spec']
+        self.assertEqual(spec['data']['values'], [{'Billing Period': '01/01/2024', 'Amount': 50.0, 'Usage': 300.0}])
+        render.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add the src directory to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_processing import whatif
+from src.data_processing.csv_bill_loader import BillDataManager
+from src.data_processing.sqlite_store import SQLiteBillDataManager
+from src.data_processing.whatif import (
+    Scenario, evaluate_scenarios, iter_whatif, load_scenarios, run_whatif,
+)
+from src.utils.executors import InlineExecutor
+
+CSV_CONTENT = (
+    "Account,Month,Usage (kWh),Generation (kWh),Cost for Usage ($),Credit for Generation ($),Final Monthly Bill ($)\n"
+    "A2,2024-01,500,100,80.00,10.00,70.00\n"
+    "A1,2024-01,300,400,40.00,50.00,-10.00\n"
+    "A2,2024-02,450,150,70.00,20.00,50.00\n"
+    "A1,2024-02,310,380,41.00,45.00,\n"
+    "A3,2024-01,100,0,20.00,0.00,20.00\n"
+)
+
+def scenario(name, import_rate, export_retail, export_rate=0.0, annual=False, monthly_fixed=0.0):
+    return Scenario(name=name, tariff=name, export_credit='nem2' if export_retail else 'nem3',
+                    settlement='annual' if annual else 'monthly', import_rate=import_rate,
+                    monthly_fixed=monthly_fixed, export_retail=export_retail, non_bypassable=0.03,
+                    export_rate=export_rate, annual=annual)
+
+class TestWhatIf(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp_dir.name, 'bills.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write(CSV_CONTENT)
+        self.manager = BillDataManager(self.csv_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_evaluate_scenarios(self):
+        usage = np.array([[100.0, 100.0]])
+        generation = np.array([[0.0, 200.0]])
+        own_rate = np.full((1, 2), 0.20)
+        valid = np.ones((1, 2), dtype=bool)
+        scenarios = [
+            scenario('retail_monthly', 0.30, True),
+            scenario('retail_annual', 0.30, True, annual=True),
+            scenario('nem3_monthly', 0.30, False, export_rate=0.08),
+            scenario('own_fixed', np.nan, False, export_rate=0.08, monthly_fixed=24.0),
+        ]
+        costs = evaluate_scenarios(usage, generation, own_rate, valid, scenarios)
+
+        # Month 2 credits 200 kWh at 0.27 ($54) against $30: the surplus is lost
+        # monthly and carried against month 1 annually
+        np.testing.assert_allclose(costs[:, 0], [30.0, 6.0, 44.0, 20.0 + 4.0 + 48.0])
+
+    def test_default_scenarios(self):
+        scenarios = load_scenarios()
+        self.assertEqual(len(scenarios), 12)
+        self.assertEqual(len({s.name for s in scenarios}), 12)
+        current = [s for s in scenarios if s.tariff == 'current']
+        self.assertTrue(all(np.isnan(s.import_rate) for s in current))
+
+    def test_run_whatif_writes_parquet(self):
+        scenarios = load_scenarios()
+        output_path = os.path.join(self.tmp_dir.name, 'whatif.parquet')
+        stats = run_whatif(self.manager, output_path, scenarios, chunk_accounts=2)
+
+        self.assertEqual(stats['accounts'], 3)
+        self.assertEqual(stats['rows'], 3 * len(scenarios))
+        results = pd.read_parquet(output_path)
+        self.assertEqual(len(results), stats['rows'])
+        self.assertEqual(results.groupby('account', observed=True)['best'].sum().tolist(), [1, 1, 1])
+        # A missing bill counts as $0 of current cost
+        current = results.groupby('account', observed=True)['current_cost'].first()
+        self.assertEqual(current.to_dict(), {'A1': -10.0, 'A2': 120.0, 'A3': 20.0})
+        np.testing.assert_allclose(results['savings'], results['current_cost'] - results['annual_cost'])
+
+    def test_worker_processes_match_inline(self):
+        scenarios = load_scenarios()
+        inline = pd.concat(list(iter_whatif(self.manager, scenarios, workers=0, chunk_accounts=1)))
+        pooled = pd.concat(list(iter_whatif(self.manager, scenarios, workers=2, chunk_accounts=1)))
+        pd.testing.assert_frame_equal(inline.reset_index(drop=True).astype({'account': str}),
+                                      pooled.reset_index(drop=True).astype({'account': str}))
+
+    def test_pool_submits_a_bounded_window(self):
+        submitted = []
+
+        class RecordingExecutor(InlineExecutor):
+            def __init__(self, max_workers):
+                pass
+
+            def submit(self, fn, *args):
+                submitted.append(args[0])
+                return super().submit(fn, *args)
+
+        with patch.object(whatif, 'ProcessPoolExecutor', RecordingExecutor), \
+                patch.object(whatif, 'CHUNKS_IN_FLIGHT_PER_WORKER', 1):
+            tables = iter_whatif(self.manager, load_scenarios(), workers=1, chunk_accounts=1)
+            next(tables)
+            # The first chunk, and the one submitted to replace it
+            self.assertEqual(submitted, [['A1'], ['A2']])
+            self.assertEqual(len(list(tables)), 2)
+        self.assertEqual(len(submitted), 3)
+
+    def test_sqlite_backend_matches(self):
+        sqlite_manager = SQLiteBillDataManager(self.csv_path,
+                                               db_path=os.path.join(self.tmp_dir.name, 'bills.sqlite'))
+        scenarios = load_scenarios()
+        expected = pd.concat(list(iter_whatif(self.manager, scenarios)))
+        actual = pd.concat(list(iter_whatif(sqlite_manager, scenarios)))
+        pd.testing.assert_frame_equal(actual.reset_index(drop=True).astype({'account': str}),
+                                      expected.reset_index(drop=True).astype({'account': str}))
+
+if __name__ == '__main__':
+    unittest.main()